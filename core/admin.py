@@ -1,32 +1,105 @@
 # ewaste_backend/core/admin.py
 
 from django.contrib import admin
-from .models import PickupRequest, ContactMessage
+from django.contrib.admin.views.main import ORDER_VAR, ChangeList
+from django.core.paginator import Paginator
+from django.db import transaction
+from django.utils import timezone
+from django.utils.functional import cached_property
+from . import exports, rollups, search
+from .models import PickupRequest, ContactMessage, QueuedEmail
+
+
+class SearchChangeList(ChangeList):
+    """Shows the displayed page of search results best match first."""
+
+    def get_results(self, request):
+        super().get_results(request)
+        # Keep the user's order if they clicked a column header.
+        if self.query and search.is_supported() and ORDER_VAR not in self.params:
+            self.result_list = search.rank_page(self.result_list, self.query)
+
+class FullTextSearchMixin:
+    """Route changelist search through core.search and rank each page of results.
+
+    Every match is listed, in the changelist's usual order; only the rows on
+    the displayed page are scored and reordered best first. search_fields
+    still apply on databases without full-text support.
+    """
+
+    def get_search_results(self, request, queryset, search_term):
+        if not search_term or not search.is_supported():
+            return super().get_search_results(request, queryset, search_term)
+        return search.search(queryset, search_term), False
+
+    def get_changelist(self, request, **kwargs):
+        return SearchChangeList
+
+class EstimatedCountPaginator(Paginator):
+    """Page count from core.rollups.estimated_count, not a COUNT(*) per page load."""
+
+    @cached_property
+    def count(self):
+        return rollups.estimated_count(self.object_list)
+
+class ExportMixin:
+    """Stream the selected rows (or every filtered row with "select all") to a file."""
+
+    def export_csv(self, request, queryset):
+        return exports.streaming_export(queryset, "csv")
+    export_csv.short_description = "Export selected rows as CSV"
+
+    def export_ndjson(self, request, queryset):
+        return exports.streaming_export(queryset, "ndjson")
+    export_ndjson.short_description = "Export selected rows as NDJSON"
 
 @admin.register(PickupRequest)
-class PickupRequestAdmin(admin.ModelAdmin):
+class PickupRequestAdmin(ExportMixin, FullTextSearchMixin, admin.ModelAdmin):
     # UPDATED: Only include fields that exist in the simplified PickupRequest model
-    list_display = ('name', 'email', 'phone', 'created_at')
-    # Removed 'status' and 'preferred_pickup_date' as they no longer exist
-    list_filter = ('created_at',)
+    list_display = ('name', 'email', 'phone', 'pincode', 'status', 'created_at')
+    list_filter = ('status', 'created_at')
     # Update search_fields to reflect the new model fields
     search_fields = ('name', 'email', 'phone', 'address')
-    readonly_fields = ('created_at',)
+    readonly_fields = ('created_at', 'geohash')
+    ordering = ('-created_at', '-id')
+    # Skip the unfiltered COUNT(*) on every changelist page.
+    show_full_result_count = False
+    paginator = EstimatedCountPaginator
+    actions = ['export_csv', 'export_ndjson']
 
 @admin.register(ContactMessage)
-class ContactMessageAdmin(admin.ModelAdmin):
+class ContactMessageAdmin(ExportMixin, FullTextSearchMixin, admin.ModelAdmin):
     list_display = ('name', 'email', 'subject', 'submitted_at', 'read')
     list_filter = ('read', 'submitted_at')
     search_fields = ('name', 'email', 'subject', 'message')
     readonly_fields = ('submitted_at',)
-    actions = ['mark_as_read', 'mark_as_unread']
+    show_full_result_count = False
+    paginator = EstimatedCountPaginator
+    actions = ['mark_as_read', 'mark_as_unread', 'export_csv', 'export_ndjson']
 
     def mark_as_read(self, request, queryset):
-        queryset.update(read=True)
+        with transaction.atomic():
+            rollups.contacts_marked(queryset.filter(read=False).update(read=True), read=True)
         self.message_user(request, "Selected messages marked as read.")
     mark_as_read.short_description = "Mark selected messages as read"
 
     def mark_as_unread(self, request, queryset):
-        queryset.update(read=False)
+        with transaction.atomic():
+            rollups.contacts_marked(queryset.filter(read=True).update(read=False), read=False)
         self.message_user(request, "Selected messages marked as unread.")
-    mark_as_unread.short_description = "Mark selected messages as unread"
\ No newline at end of file
+    mark_as_unread.short_description = "Mark selected messages as unread"
+
+@admin.register(QueuedEmail)
+class QueuedEmailAdmin(admin.ModelAdmin):
+    list_display = ('subject', 'to', 'status', 'attempts', 'available_at', 'sent_at')
+    list_filter = ('status',)
+    search_fields = ('to', 'subject')
+    readonly_fields = ('created_at', 'sent_at', 'last_error')
+    actions = ['retry_now']
+
+    def retry_now(self, request, queryset):
+        queryset.exclude(status=QueuedEmail.SENT).update(
+            status=QueuedEmail.PENDING, available_at=timezone.now(),
+        )
+        self.message_user(request, "Selected emails queued for retry.")
+    retry_now.short_description = "Retry selected emails now"
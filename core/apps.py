@@ -4,3 +4,10 @@ from django.apps import AppConfig
 class CoreConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'core'
+
+    def ready(self):
+        from . import mail_queue, rollups, vision
+
+        rollups.connect()
+        mail_queue.connect()
+        vision.warm_up_in_background()
@@ -0,0 +1,92 @@
+"""Helpers shared by the benchmark management commands."""
+
+import io
+import multiprocessing
+import os
+import resource
+import statistics
+import time
+import tracemalloc
+
+from PIL import Image
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def summarize(latencies):
+    """Latency summary in milliseconds for a list of durations in seconds."""
+    ms = lambda seconds: round(seconds * 1000, 3)
+    return {
+        "n": len(latencies),
+        "mean_ms": ms(statistics.mean(latencies)) if latencies else 0.0,
+        "p50_ms": ms(percentile(latencies, 50)),
+        "p95_ms": ms(percentile(latencies, 95)),
+        "p99_ms": ms(percentile(latencies, 99)),
+    }
+
+
+def make_image(width, height, format="JPEG", quality=85):
+    """Encode a camera-like test frame: a gradient with sensor noise."""
+    base = Image.linear_gradient("L").resize((width, height))
+    noise = Image.effect_noise((width, height), 24)
+    img = Image.merge("RGB", (base, noise, Image.blend(base, noise, 0.5)))
+    out = io.BytesIO()
+    if format == "JPEG":
+        img.save(out, format, quality=quality)
+    else:
+        img.save(out, format)
+    return out.getvalue()
+
+
+def timed(fn, iterations, setup=None):
+    """Call ``fn(setup())`` repeatedly; return per-call durations in seconds."""
+    durations = []
+    for _ in range(iterations):
+        arg = setup() if setup else None
+        start = time.perf_counter()
+        fn(arg) if setup else fn()
+        durations.append(time.perf_counter() - start)
+    return durations
+
+
+def peak_memory(fn, setup=None):
+    """Peak bytes allocated by Python during one call of ``fn``."""
+    arg = setup() if setup else None
+    tracemalloc.start()
+    try:
+        tracemalloc.reset_peak()
+        fn(arg) if setup else fn()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def _rss_child(fn, setup, conn):
+    arg = setup() if setup else None
+    before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    fn(arg) if setup else fn()
+    after = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    conn.send((after - before) * 1024)
+    conn.close()
+    # Skip finalizers: the parent still owns temp files inherited by the fork.
+    os._exit(0)
+
+
+def peak_rss_growth(fn, setup=None):
+    """
+    Growth of peak RSS in bytes during one call of ``fn``, measured in a forked
+    child. Unlike tracemalloc this also sees Pillow's native pixel buffers.
+    """
+    ctx = multiprocessing.get_context("fork")
+    parent, child = ctx.Pipe(duplex=False)
+    process = ctx.Process(target=_rss_child, args=(fn, setup, child))
+    process.start()
+    result = parent.recv()
+    process.join()
+    return result
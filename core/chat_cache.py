@@ -0,0 +1,346 @@
+"""
+Response cache for the chatbot.
+
+Answers are stored under a normalized form of the question. Questions that
+miss on the exact key are matched against previously answered ones with a
+small in-process TF-IDF index, so "How do I recycle a laptop battery?" and
+"how to recycle laptop batteries" share one LLM call.
+
+The similarity index lives in each worker; with the Django cache or SQLite
+backend exact-key hits are still shared between workers.
+"""
+
+import hashlib
+import math
+import re
+import sqlite3
+import threading
+import time
+from collections import Counter, OrderedDict
+
+from django.conf import settings
+from django.core.cache import caches
+
+from . import metrics
+
+DEFAULTS = {
+    "BACKEND": "locmem",
+    "TTL": 60 * 60 * 24,
+    "MAX_ENTRIES": 1000,
+    "SIMILARITY_THRESHOLD": 0.8,
+    "CACHE_ALIAS": "default",
+    "PATH": None,
+}
+
+STOPWORDS = frozenset(
+    "a an and are can do does for how i in is it me my of on or please should "
+    "the to what where which who why with you your".split()
+)
+
+_punctuation = re.compile(r"[^\w\s]")
+_whitespace = re.compile(r"\s+")
+
+
+def normalize(text):
+    text = _punctuation.sub(" ", text.lower())
+    return _whitespace.sub(" ", text).strip()
+
+
+def fold_plural(word):
+    # Cheap plural folding is enough for short chat questions.
+    if len(word) > 3 and word.endswith("ies"):
+        return word[:-3] + "y"
+    if len(word) > 3 and word.endswith("s") and not word.endswith("ss"):
+        return word[:-1]
+    return word
+
+
+def tokenize(normalized):
+    return [fold_plural(word) for word in normalized.split() if word not in STOPWORDS]
+
+
+def cache_key(normalized):
+    return "chatbot:" + hashlib.sha1(normalized.encode()).hexdigest()
+
+
+# ============================================================
+# STORAGE BACKENDS
+# ============================================================
+class LocMemBackend:
+    """Per-process dict with TTL and LRU eviction."""
+
+    def __init__(self, options):
+        self.max_entries = options["MAX_ENTRIES"]
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            value, expires_at = item
+            if expires_at < time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl):
+        with self._lock:
+            self._data[key] = (value, time.monotonic() + ttl)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+class DjangoCacheBackend:
+    """Delegates to a configured Django cache, which owns TTL and eviction."""
+
+    def __init__(self, options):
+        self.cache = caches[options["CACHE_ALIAS"]]
+
+    def get(self, key):
+        return self.cache.get(key)
+
+    def set(self, key, value, ttl):
+        self.cache.set(key, value, ttl)
+
+    def clear(self):
+        self.cache.clear()
+
+
+class SQLiteBackend:
+    """A standalone SQLite file, shared by every worker on the host."""
+
+    def __init__(self, options):
+        self.max_entries = options["MAX_ENTRIES"]
+        self.path = str(options["PATH"] or settings.BASE_DIR / "chat_cache.sqlite3")
+        self._local = threading.local()
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS chat_cache ("
+                " key TEXT PRIMARY KEY, value TEXT NOT NULL,"
+                " expires_at REAL NOT NULL, used_at REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS chat_cache_used ON chat_cache (used_at)")
+
+    def _connect(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, key):
+        conn = self._connect()
+        now = time.time()
+        row = conn.execute(
+            "SELECT value FROM chat_cache WHERE key = ? AND expires_at > ?", (key, now)
+        ).fetchone()
+        if row is None:
+            return None
+        with conn:
+            conn.execute("UPDATE chat_cache SET used_at = ? WHERE key = ?", (now, key))
+        return row[0]
+
+    def set(self, key, value, ttl):
+        conn = self._connect()
+        now = time.time()
+        with conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO chat_cache VALUES (?, ?, ?, ?)",
+                (key, value, now + ttl, now),
+            )
+            conn.execute("DELETE FROM chat_cache WHERE expires_at <= ?", (now,))
+            conn.execute(
+                "DELETE FROM chat_cache WHERE key IN ("
+                " SELECT key FROM chat_cache ORDER BY used_at DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,),
+            )
+
+    def clear(self):
+        conn = self._connect()
+        with conn:
+            conn.execute("DELETE FROM chat_cache")
+
+
+BACKENDS = {
+    "locmem": LocMemBackend,
+    "django": DjangoCacheBackend,
+    "sqlite": SQLiteBackend,
+}
+
+
+# ============================================================
+# SIMILARITY INDEX
+# ============================================================
+class SimilarityIndex:
+    """TF-IDF cosine search over the questions currently in the cache."""
+
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+        self._docs = OrderedDict()  # key -> term counts
+        self._postings = {}  # term -> set of keys
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._docs)
+
+    def add(self, key, tokens):
+        if not tokens:
+            return
+        with self._lock:
+            if key in self._docs:
+                self._docs.move_to_end(key)
+                return
+            self._docs[key] = Counter(tokens)
+            for term in self._docs[key]:
+                self._postings.setdefault(term, set()).add(key)
+            while len(self._docs) > self.max_entries:
+                self._remove(next(iter(self._docs)))
+
+    def discard(self, key):
+        with self._lock:
+            if key in self._docs:
+                self._remove(key)
+
+    def _remove(self, key):
+        for term in self._docs.pop(key):
+            keys = self._postings[term]
+            keys.discard(key)
+            if not keys:
+                del self._postings[term]
+
+    def _idf(self, term):
+        df = len(self._postings.get(term, ()))
+        return math.log((len(self._docs) + 1) / (df + 1)) + 1
+
+    def _vector(self, counts):
+        vector = {term: tf * self._idf(term) for term, tf in counts.items()}
+        norm = math.sqrt(sum(w * w for w in vector.values()))
+        return vector, norm
+
+    def best_match(self, tokens):
+        """Return ``(key, similarity)`` for the closest cached question."""
+        if not tokens:
+            return None, 0.0
+        with self._lock:
+            query, query_norm = self._vector(Counter(tokens))
+            candidates = set()
+            for term in query:
+                candidates |= self._postings.get(term, set())
+
+            best_key, best_score = None, 0.0
+            for key in candidates:
+                doc, doc_norm = self._vector(self._docs[key])
+                dot = sum(w * doc.get(term, 0.0) for term, w in query.items())
+                score = dot / (query_norm * doc_norm) if query_norm and doc_norm else 0.0
+                if score > best_score:
+                    best_key, best_score = key, score
+            return best_key, best_score
+
+
+# ============================================================
+# CACHE FRONT
+# ============================================================
+class ChatResponseCache:
+
+    def __init__(self, options=None):
+        self.options = {**DEFAULTS, **(options or {})}
+        self.backend = BACKENDS[self.options["BACKEND"]](self.options)
+        self.index = SimilarityIndex(self.options["MAX_ENTRIES"])
+        self.hits = 0
+        self.similar_hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def _count(self, field):
+        with self._lock:
+            setattr(self, field, getattr(self, field) + 1)
+
+    def get(self, message):
+        normalized = normalize(message)
+        if not normalized:
+            return None
+
+        key = cache_key(normalized)
+        reply = self.backend.get(key)
+        if reply is not None:
+            self._count("hits")
+            return reply
+
+        similar_key, score = self.index.best_match(tokenize(normalized))
+        if similar_key is not None and score >= self.options["SIMILARITY_THRESHOLD"]:
+            reply = self.backend.get(similar_key)
+            if reply is not None:
+                self._count("similar_hits")
+                return reply
+            # Expired or evicted from the backend; stop matching against it.
+            self.index.discard(similar_key)
+
+        self._count("misses")
+        return None
+
+    def closest(self, message, threshold):
+        """Reply to the most similar cached question scoring ``threshold`` or more; not counted in stats."""
+        normalized = normalize(message)
+        if not normalized:
+            return None
+        key, score = self.index.best_match(tokenize(normalized))
+        if key is None or score < threshold:
+            return None
+        return self.backend.get(key)
+
+    def set(self, message, reply):
+        normalized = normalize(message)
+        if not normalized or not reply:
+            return
+        key = cache_key(normalized)
+        self.backend.set(key, reply, self.options["TTL"])
+        self.index.add(key, tokenize(normalized))
+
+    def clear(self):
+        self.backend.clear()
+        self.index = SimilarityIndex(self.options["MAX_ENTRIES"])
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.similar_hits + self.misses
+            return {
+                "backend": self.options["BACKEND"],
+                "hits": self.hits,
+                "similar_hits": self.similar_hits,
+                "misses": self.misses,
+                "hit_rate": (self.hits + self.similar_hits) / lookups if lookups else 0.0,
+                "indexed_questions": len(self.index),
+            }
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_cache():
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = ChatResponseCache(getattr(settings, "CHATBOT_CACHE", None))
+    return _cache
+
+
+@metrics.REGISTRY.collector
+def _cache_metrics():
+    if _cache is None:
+        return []
+    lookups = metrics.Gauge("chat_cache_lookups", "Chatbot response cache lookups by result.", ("result",))
+    stats = _cache.stats()
+    for result in ("hits", "similar_hits", "misses"):
+        lookups.set(stats[result], result=result)
+    return [lookups]
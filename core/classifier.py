@@ -0,0 +1,94 @@
+"""
+Keyword classifier for detection captions.
+
+The category table in ``core/data/ewaste_categories.json`` is compiled once
+at import into a phrase table keyed on whole words. A caption is split into
+words with one regex pass and looked up n-gram by n-gram (longest first), so
+"tech" no longer matches inside "technique" and the cost depends on the
+caption length, not on how many synonyms there are.
+"""
+
+import json
+import re
+from dataclasses import dataclass
+from pathlib import Path
+
+CATEGORIES_PATH = Path(__file__).resolve().parent / "data" / "ewaste_categories.json"
+
+_word = re.compile(r"[a-z0-9]+")
+
+
+def _inflections(word):
+    yield word
+    if word.endswith("y"):
+        yield word[:-1] + "ies"
+    elif word.endswith(("s", "x", "z", "ch", "sh")):
+        yield word + "es"
+    else:
+        yield word + "s"
+
+
+@dataclass(frozen=True)
+class Classification:
+    category: str
+    hazard: str
+    handling: str
+    matched: str
+
+    def as_dict(self):
+        return {"category": self.category, "hazard": self.hazard, "handling": self.handling}
+
+
+class KeywordClassifier:
+
+    def __init__(self, table):
+        self.version = table["version"]
+        self.hazard_classes = table["hazard_classes"]
+        self.categories = table["categories"]
+
+        # Plurals are expanded here so lookups at request time are plain dict hits.
+        self._phrases = {}
+        for category, spec in self.categories.items():
+            if spec["hazard"] not in self.hazard_classes:
+                raise ValueError(f"Unknown hazard class {spec['hazard']!r} for {category!r}")
+            for synonym in spec["synonyms"]:
+                *head, last = _word.findall(synonym.lower())
+                for form in _inflections(last):
+                    self._phrases.setdefault((*head, form), category)
+        self._first_words = frozenset(phrase[0] for phrase in self._phrases)
+        self.max_words = max(len(phrase) for phrase in self._phrases)
+
+    @classmethod
+    def from_file(cls, path=CATEGORIES_PATH):
+        with open(path, encoding="utf-8") as fh:
+            return cls(json.load(fh))
+
+    def classify(self, text):
+        """Return the :class:`Classification` of the first e-waste term in ``text``."""
+        if not text:
+            return None
+        words = _word.findall(text.lower())
+        phrases, first_words = self._phrases, self._first_words
+        if first_words.isdisjoint(words):
+            return None
+        for i, word in enumerate(words):
+            if word not in first_words:
+                continue
+            # Longest first so "usb cable" wins over "usb".
+            for n in range(min(self.max_words, len(words) - i), 0, -1):
+                category = phrases.get(tuple(words[i:i + n]))
+                if category is not None:
+                    spec = self.categories[category]
+                    return Classification(
+                        category, spec["hazard"], spec["handling"], " ".join(words[i:i + n]),
+                    )
+        return None
+
+    def classify_many(self, texts):
+        return [self.classify(text) for text in texts]
+
+
+CLASSIFIER = KeywordClassifier.from_file()
+
+classify = CLASSIFIER.classify
+classify_many = CLASSIFIER.classify_many
@@ -0,0 +1,365 @@
+"""
+Contact form intake: duplicate suppression, spam scoring and batched writes.
+
+Every valid :class:`~core.forms.ContactForm` submission goes through
+:func:`submit`, which
+
+1. drops exact repeats - a SHA-256 of the normalised sender and text is
+   ``add()``-ed to ``CACHES[CACHE_ALIAS]`` for ``DEDUP_WINDOW`` seconds, so a
+   refresh or a bot replaying one payload is seen once (across workers when
+   the cache is shared);
+2. drops near-duplicates - messages whose word bigrams overlap one seen in
+   the window by ``NEAR_DUP_SIMILARITY`` (Jaccard), found through a MinHash
+   LSH index, which catches floods that rotate the sender or vary a few words;
+3. scores spam with :class:`SpamModel`, a handful of precompiled regex rules
+   plus per-token log-odds weights from ``data/spam_model.json`` - no network
+   call, a few microseconds per message;
+4. hands accepted rows to :class:`ContactBuffer`, which writes them with one
+   ``bulk_create`` per ``BATCH_SIZE`` rows or every ``FLUSH_INTERVAL`` seconds
+   from a daemon thread, so a burst of submissions is a few INSERTs.
+
+The sender sees the same thank-you whatever the outcome, so bots learn
+nothing from the response. Buffered rows not yet flushed are lost if the
+worker is killed (at most ``BATCH_SIZE - 1`` rows or ``FLUSH_INTERVAL``
+seconds); they are flushed on normal exit.
+"""
+
+import atexit
+import hashlib
+import json
+import logging
+import math
+import random
+import re
+import threading
+import time
+from collections import deque
+from pathlib import Path
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import close_old_connections, transaction
+
+from . import metrics, rollups
+from .models import ContactMessage
+
+logger = logging.getLogger(__name__)
+
+SPAM_MODEL_PATH = Path(__file__).resolve().parent / "data" / "spam_model.json"
+
+DEFAULTS = {
+    "DEDUP_WINDOW": 10 * 60,
+    "CACHE_ALIAS": "default",
+    "NEAR_DUP_SIMILARITY": 0.8,
+    "NEAR_DUP_MIN_TOKENS": 8,
+    "NEAR_DUP_MAX_RECENT": 5000,
+    "SPAM_THRESHOLD": 0.8,
+    "BUFFERED": True,
+    "BATCH_SIZE": 25,
+    "FLUSH_INTERVAL": 2.0,
+    "MAX_BUFFER": 1000,
+}
+
+
+def get_options():
+    return {**DEFAULTS, **getattr(settings, "CONTACT_INTAKE", {})}
+
+
+SUBMISSIONS = metrics.REGISTRY.register(metrics.Counter(
+    "contact_submissions_total", "Contact form submissions by outcome.", ("outcome",),
+))
+
+ACCEPTED = "accepted"
+DUPLICATE = "duplicate"
+NEAR_DUPLICATE = "near_duplicate"
+SPAM = "spam"
+
+TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+
+def normalize(text):
+    return " ".join(TOKEN_RE.findall((text or "").lower()))
+
+
+def content_hash(email, subject, message):
+    key = "\x1f".join((email.strip().lower(), normalize(subject), normalize(message)))
+    return hashlib.sha256(key.encode()).hexdigest()
+
+
+# ============================================================
+# NEAR-DUPLICATES
+# ============================================================
+# MinHash over word bigrams, split into BANDS bands of ROWS values for
+# locality-sensitive lookup: texts with Jaccard similarity s share a band with
+# probability 1 - (1 - s**ROWS)**BANDS (0.997 at s=0.8, 0.2 at s=0.3), so only a
+# few candidates are compared exactly instead of every recent message.
+BANDS, ROWS = 8, 3
+_MERSENNE = (1 << 61) - 1
+_rng = random.Random(20250101)
+_PERMUTATIONS = [(_rng.randrange(1, _MERSENNE), _rng.randrange(_MERSENNE)) for _ in range(BANDS * ROWS)]
+
+
+def shingles(tokens, size=2):
+    return frozenset(" ".join(tokens[i:i + size]) for i in range(max(1, len(tokens) - size + 1)))
+
+
+def minhash(shingle_set):
+    hashes = [int.from_bytes(hashlib.blake2b(s.encode(), digest_size=8).digest(), "big") for s in shingle_set]
+    return [min((a * h + b) % _MERSENNE for h in hashes) for a, b in _PERMUTATIONS]
+
+
+def jaccard(a, b):
+    return len(a & b) / len(a | b) if a or b else 1.0
+
+
+class NearDuplicateIndex:
+    """Shingle sets seen in the last ``window`` seconds, LSH-bucketed (per process)."""
+
+    def __init__(self, window, similarity=0.8, max_entries=5000, clock=time.monotonic):
+        self.window = window
+        self.similarity = similarity
+        self.max_entries = max_entries
+        self.clock = clock
+        self._order = deque()
+        self._entries = {}
+        self._buckets = {}
+        self._next_id = 0
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def seen(self, shingle_set):
+        """True if a set at least ``similarity``-similar was seen; records this one either way."""
+        signature = minhash(shingle_set)
+        keys = [(band, tuple(signature[band * ROWS:(band + 1) * ROWS])) for band in range(BANDS)]
+        now = self.clock()
+        with self._lock:
+            self._evict(now)
+            candidates = set().union(*(self._buckets.get(key, ()) for key in keys))
+            match = any(jaccard(shingle_set, self._entries[c][1]) >= self.similarity for c in candidates)
+            entry_id, self._next_id = self._next_id, self._next_id + 1
+            self._entries[entry_id] = (now, shingle_set, keys)
+            self._order.append(entry_id)
+            for key in keys:
+                self._buckets.setdefault(key, set()).add(entry_id)
+        return match
+
+    def _evict(self, now):
+        while self._order and (len(self._order) >= self.max_entries
+                               or now - self._entries[self._order[0]][0] > self.window):
+            entry_id = self._order.popleft()
+            for key in self._entries.pop(entry_id)[2]:
+                bucket = self._buckets[key]
+                bucket.discard(entry_id)
+                if not bucket:
+                    del self._buckets[key]
+
+
+# ============================================================
+# SPAM SCORING
+# ============================================================
+# Rule name -> (field, pattern, per-match cap). Weights live in the model file.
+RULES = {
+    "link": ("message", re.compile(r"https?://|www\.", re.I), 5),
+    "markup_link": ("message", re.compile(r"\[url=|<a\s+href|\[/url\]", re.I), 1),
+    "link_in_name": ("name", re.compile(r"https?://|www\.|\.(?:com|ru|xyz|top|info)\b", re.I), 1),
+    "repeated_symbols": ("message", re.compile(r"([!$?*])\1{3,}"), 1),
+    "money": ("message", re.compile(r"[$€£₹]\s?\d[\d,]*|\b\d+\s?(?:usd|usdt|btc)\b", re.I), 3),
+    "contact_me_elsewhere": ("message", re.compile(r"\b(?:whatsapp|telegram|skype)\b.{0,20}\+?\d{7,}", re.I), 1),
+}
+
+
+class SpamModel:
+    """Logistic score: ``sigmoid(bias + rule weights + sum of unique token weights)``."""
+
+    def __init__(self, bias, rules, tokens):
+        self.bias = bias
+        self.rule_weights = rules
+        self.token_weights = tokens
+
+    @classmethod
+    def from_file(cls, path=SPAM_MODEL_PATH):
+        data = json.loads(Path(path).read_text(encoding="utf-8"))
+        return cls(data["bias"], data["rules"], data["tokens"])
+
+    def features(self, name, subject, message):
+        fields = {"name": name or "", "subject": subject or "", "message": message or ""}
+        hits = {}
+        for rule, (field, pattern, cap) in RULES.items():
+            count = min(cap, len(pattern.findall(fields[field])))
+            if count:
+                hits[rule] = count
+        letters = [c for c in fields["message"] if c.isalpha()]
+        if len(letters) >= 20 and sum(c.isupper() for c in letters) / len(letters) > 0.6:
+            hits["shouting"] = 1
+        return hits
+
+    def score(self, name, subject, message):
+        """Spam probability in [0, 1]."""
+        hits = self.features(name, subject, message)
+        logit = self.bias + sum(self.rule_weights.get(rule, 0) * n for rule, n in hits.items())
+        tokens = set(TOKEN_RE.findall(f"{subject or ''} {message or ''}".lower()))
+        logit += sum(self.token_weights.get(token, 0) for token in tokens)
+        return 1 / (1 + math.exp(-logit))
+
+
+SPAM_MODEL = SpamModel.from_file()
+
+
+# ============================================================
+# BATCHED WRITES
+# ============================================================
+class ContactBuffer:
+    """
+    Accepted rows waiting for ``bulk_create``. A full batch is written by the
+    request that filled it; the rest by the flusher thread every
+    ``flush_interval`` seconds. If the write fails the rows are kept (up to
+    ``max_buffer``) and retried on the next flush.
+    """
+
+    def __init__(self, batch_size=25, flush_interval=2.0, max_buffer=1000):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_buffer = max_buffer
+        self._rows = []
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread = None
+        self.written = 0
+        self.batches = 0
+        self.dropped = 0
+
+    def add(self, row):
+        with self._lock:
+            if len(self._rows) >= self.max_buffer:
+                self.dropped += 1
+                logger.warning("Contact buffer full; dropping message from %s", row.email)
+                return
+            self._rows.append(row)
+            full = len(self._rows) >= self.batch_size
+        if full:
+            self.flush()
+        else:
+            self._start()
+
+    def pending(self):
+        with self._lock:
+            return len(self._rows)
+
+    def flush(self):
+        """Write everything buffered; returns the number of rows written."""
+        with self._flush_lock:
+            with self._lock:
+                rows, self._rows = self._rows, []
+            if not rows:
+                return 0
+            try:
+                with transaction.atomic():
+                    ContactMessage.objects.bulk_create(rows, batch_size=self.batch_size)
+                    rollups.contacts_created(rows)
+            except Exception:
+                logger.exception("Writing %d contact messages failed; will retry", len(rows))
+                with self._lock:
+                    self._rows = (rows + self._rows)[:self.max_buffer]
+                return 0
+            self.written += len(rows)
+            self.batches += math.ceil(len(rows) / self.batch_size)
+            return len(rows)
+
+    def _start(self):
+        if self._thread is None:
+            with self._lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._run, name="contact-flush", daemon=True)
+                    self._thread.start()
+                    atexit.register(self.flush)
+
+    def _run(self):
+        while True:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            try:
+                self.flush()
+            finally:
+                close_old_connections()
+
+    def stats(self):
+        return {"pending": self.pending(), "written": self.written,
+                "batches": self.batches, "dropped": self.dropped}
+
+
+_buffer = None
+_recent = None
+_singleton_lock = threading.Lock()
+
+
+def get_buffer():
+    global _buffer
+    if _buffer is None:
+        with _singleton_lock:
+            if _buffer is None:
+                options = get_options()
+                _buffer = ContactBuffer(options["BATCH_SIZE"], options["FLUSH_INTERVAL"], options["MAX_BUFFER"])
+    return _buffer
+
+
+def get_recent():
+    global _recent
+    if _recent is None:
+        with _singleton_lock:
+            if _recent is None:
+                options = get_options()
+                _recent = NearDuplicateIndex(
+                    options["DEDUP_WINDOW"], options["NEAR_DUP_SIMILARITY"], options["NEAR_DUP_MAX_RECENT"],
+                )
+    return _recent
+
+
+# ============================================================
+# INTAKE
+# ============================================================
+def classify(name, email, subject, message, options=None):
+    """Return ``(outcome, spam_score)`` and remember the submission for dedup."""
+    options = options or get_options()
+    digest = content_hash(email, subject or "", message)
+    if not caches[options["CACHE_ALIAS"]].add(f"contact:{digest}", 1, timeout=options["DEDUP_WINDOW"]):
+        return DUPLICATE, None
+
+    tokens = normalize(message).split()
+    if len(tokens) >= options["NEAR_DUP_MIN_TOKENS"]:
+        if get_recent().seen(shingles(tokens)):
+            return NEAR_DUPLICATE, None
+
+    score = SPAM_MODEL.score(name, subject, message)
+    if score >= options["SPAM_THRESHOLD"]:
+        return SPAM, score
+    return ACCEPTED, score
+
+
+def submit(form, options=None):
+    """Take a valid ``ContactForm``; buffer the row if it is new and not spam. Returns the outcome."""
+    options = options or get_options()
+    data = form.cleaned_data
+    outcome, _ = classify(data["name"], data["email"], data.get("subject"), data["message"], options)
+    SUBMISSIONS.inc(outcome=outcome)
+    if outcome != ACCEPTED:
+        return outcome
+    row = form.save(commit=False)
+    if options["BUFFERED"]:
+        get_buffer().add(row)
+    else:
+        row.save()
+    return outcome
+
+
+@metrics.REGISTRY.collector
+def _buffer_metrics():
+    if _buffer is None:
+        return []
+    rows = metrics.Gauge("contact_buffer_rows", "Contact messages pending, written and dropped.", ("state",))
+    stats = _buffer.stats()
+    for state in ("pending", "written", "dropped"):
+        rows.set(stats[state], state=state)
+    return [rows]
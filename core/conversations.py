@@ -0,0 +1,189 @@
+"""
+Server-side chatbot conversations with a token budget.
+
+A conversation is the recent turns kept verbatim plus a short summary of
+older ones. After each answer, :meth:`Conversation.record` folds the oldest
+turns into the summary until the history fits ``HISTORY_TOKENS``. Each
+folded turn becomes one line: the question and the first sentence of the
+answer. The summary is capped at ``SUMMARY_TOKENS`` by dropping its oldest
+lines. This is done locally, so no extra LLM call is made.
+
+Every prompt starts with the same system message (``llm.SYSTEM_MESSAGE``).
+Then come the summary, the recent turns and the new question, so the
+prefix stays stable from one turn to the next.
+
+Conversations are stored as JSON under ``conversation:<id>`` in the
+chatbot cache backends (``locmem`` per worker, or ``django`` for
+``CACHES[CACHE_ALIAS]`` shared between workers). Each save renews the
+``IDLE_TTL`` expiry, and locmem also drops the least recently used
+conversations beyond ``MAX_SESSIONS``.
+
+Token counts are estimates (about four characters per token, plus a few per
+message for the chat format); no tokenizer is loaded.
+"""
+
+import json
+import re
+import secrets
+import threading
+
+from django.conf import settings
+
+from . import chat_cache, llm, metrics
+
+DEFAULTS = {
+    "ENABLED": True,
+    "BACKEND": "locmem",
+    "CACHE_ALIAS": "default",
+    "IDLE_TTL": 30 * 60,
+    "MAX_SESSIONS": 10_000,
+    "HISTORY_TOKENS": 600,
+    "SUMMARY_TOKENS": 150,
+    # False keeps every turn verbatim (unbounded); only for measuring.
+    "COMPACT": True,
+}
+
+
+def get_options():
+    return {**DEFAULTS, **getattr(settings, "CHATBOT_CONVERSATIONS", {})}
+
+
+BACKENDS = {
+    "locmem": chat_cache.LocMemBackend,
+    "django": chat_cache.DjangoCacheBackend,
+}
+
+PROMPT_TOKENS = metrics.REGISTRY.register(metrics.Histogram(
+    "chat_prompt_tokens", "Estimated prompt tokens per chatbot LLM call.",
+    buckets=(64, 128, 256, 512, 1024, 2048, 4096, 8192),
+))
+COMPACTIONS = metrics.REGISTRY.register(metrics.Counter(
+    "chat_turns_compacted_total", "Conversation turns folded into a summary.",
+))
+
+MESSAGE_OVERHEAD = 4
+SUMMARY_HEADER = "Summary of earlier turns in this conversation:"
+
+_valid_id = re.compile(r"^[\w-]{8,64}$")
+_sentence = re.compile(r"(?<=[.!?])\s")
+
+
+def estimate_tokens(text):
+    return (len(text) + 3) // 4 + MESSAGE_OVERHEAD
+
+
+SYSTEM_TOKENS = estimate_tokens(llm.SYSTEM_PROMPT)
+
+
+def _clip(text, words):
+    parts = text.split()
+    return " ".join(parts[:words]) + (" ..." if len(parts) > words else "")
+
+
+def summarize_turn(question, answer):
+    first = _sentence.split(answer.strip(), maxsplit=1)[0]
+    return f"- User: {_clip(question, 18)} | You: {_clip(first, 24)}"
+
+
+# ============================================================
+# CONVERSATIONS
+# ============================================================
+class Conversation:
+
+    def __init__(self, conversation_id, summary=(), turns=()):
+        self.id = conversation_id
+        self.summary = list(summary)  # lines, oldest first
+        self.turns = [tuple(turn) for turn in turns]  # (question, answer), oldest first
+
+    @property
+    def is_new(self):
+        return not self.turns and not self.summary
+
+    def _summary_tokens(self):
+        return estimate_tokens("\n".join([SUMMARY_HEADER, *self.summary])) if self.summary else 0
+
+    def history_tokens(self):
+        return self._summary_tokens() + sum(estimate_tokens(q) + estimate_tokens(a) for q, a in self.turns)
+
+    def context(self):
+        """Messages between the system prompt and the new question."""
+        messages = []
+        if self.summary:
+            messages.append({"role": "system", "content": "\n".join([SUMMARY_HEADER, *self.summary])})
+        for question, answer in self.turns:
+            messages.append({"role": "user", "content": question})
+            messages.append({"role": "assistant", "content": answer})
+        return messages
+
+    def prompt_tokens(self, user_message):
+        return SYSTEM_TOKENS + self.history_tokens() + estimate_tokens(user_message)
+
+    def record(self, question, answer, options=None):
+        options = options or get_options()
+        self.turns.append((question, answer))
+        if options["COMPACT"]:
+            self.compact(options["HISTORY_TOKENS"], options["SUMMARY_TOKENS"])
+
+    def compact(self, history_tokens, summary_tokens):
+        """Fold the oldest turns into the summary until the history fits; the latest turn stays verbatim."""
+        folded = 0
+        while len(self.turns) > 1 and self.history_tokens() > history_tokens:
+            self.summary.append(summarize_turn(*self.turns.pop(0)))
+            folded += 1
+            while len(self.summary) > 1 and self._summary_tokens() > summary_tokens:
+                self.summary.pop(0)
+        if folded:
+            COMPACTIONS.inc(folded)
+        return folded
+
+    def to_json(self):
+        return json.dumps({"summary": self.summary, "turns": self.turns})
+
+    @classmethod
+    def from_json(cls, conversation_id, data):
+        data = json.loads(data)
+        return cls(conversation_id, data["summary"], data["turns"])
+
+
+class ConversationStore:
+
+    def __init__(self, options=None):
+        self.options = {**DEFAULTS, **(options or {})}
+        self.backend = BACKENDS[self.options["BACKEND"]]({
+            "MAX_ENTRIES": self.options["MAX_SESSIONS"], "CACHE_ALIAS": self.options["CACHE_ALIAS"],
+        })
+
+    @staticmethod
+    def _key(conversation_id):
+        return f"conversation:{conversation_id}"
+
+    def load(self, conversation_id):
+        """The stored conversation, or a new one (with a fresh id) if it is unknown or has expired."""
+        if conversation_id and _valid_id.match(conversation_id):
+            data = self.backend.get(self._key(conversation_id))
+            if data is not None:
+                return Conversation.from_json(conversation_id, data)
+        return Conversation(secrets.token_urlsafe(16))
+
+    def save(self, conversation):
+        self.backend.set(self._key(conversation.id), conversation.to_json(), self.options["IDLE_TTL"])
+
+    def record(self, conversation, question, answer):
+        conversation.record(question, answer, self.options)
+        self.save(conversation)
+
+    def clear(self):
+        self.backend.clear()
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_store():
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = ConversationStore(get_options())
+    return _store
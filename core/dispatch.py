@@ -0,0 +1,149 @@
+"""
+Batch route planning for a day's pickups.
+
+Cluster first, route second:
+
+1. If there are more stops than ``vehicles * capacity``, the ones nearest the
+   depot are planned and the rest are left for the next day.
+2. The stops are split in two across their wider side, with each half sized
+   for its share of the vehicles, and each half is split again until there
+   is one group per vehicle. This is balanced recursive bisection. The groups
+   are compact and hold equal numbers of stops, so each van works one
+   neighbourhood. A sweep by bearing from the depot would instead give each
+   van a long thin wedge once there are many vans.
+3. Each group is toured with nearest-neighbour from the depot, and then
+   improved with 2-opt until no segment reversal shortens it. 2-opt removes
+   the crossings that nearest-neighbour leaves behind.
+
+Distances are straight-line kilometres on a local equirectangular
+projection around the depot. Within a city this is accurate to well under
+1%, and it is far cheaper than haversine in the inner loop. Road distance
+is not modelled.
+"""
+
+import math
+from dataclasses import dataclass, field
+
+from django.conf import settings
+
+from .geo import EARTH_RADIUS_KM
+
+DEFAULTS = {
+    "DEPOT": (17.3850, 78.4867),
+    "VEHICLES": 4,
+    "CAPACITY": 30,
+    "RADIUS_KM": 25,
+    "MAX_2OPT_PASSES": 50,
+}
+
+
+def get_options():
+    return {**DEFAULTS, **getattr(settings, "DISPATCH", {})}
+
+
+@dataclass
+class Route:
+    vehicle: int
+    stops: list = field(default_factory=list)  # stop ids in visiting order
+    km: float = 0.0
+    nearest_neighbour_km: float = 0.0
+
+    def as_dict(self):
+        return {"vehicle": self.vehicle, "stops": self.stops, "km": round(self.km, 2),
+                "nearest_neighbour_km": round(self.nearest_neighbour_km, 2)}
+
+
+def project(depot, points):
+    """``(lat, lon)`` -> planar ``(x, y)`` km with the depot at the origin."""
+    lat0, lon0 = depot
+    kx = math.radians(1) * EARTH_RADIUS_KM * math.cos(math.radians(lat0))
+    ky = math.radians(1) * EARTH_RADIUS_KM
+    return [((lon - lon0) * kx, (lat - lat0) * ky) for lat, lon in points]
+
+
+def tour_length(tour, dist):
+    return sum(dist[a][b] for a, b in zip(tour, tour[1:]))
+
+
+def nearest_neighbour(dist):
+    """Closed tour over ``range(len(dist))`` from node 0 (the depot), greedy nearest next."""
+    n = len(dist)
+    unvisited = set(range(1, n))
+    tour = [0]
+    while unvisited:
+        row = dist[tour[-1]]
+        nearest = min(unvisited, key=row.__getitem__)
+        unvisited.remove(nearest)
+        tour.append(nearest)
+    tour.append(0)
+    return tour
+
+
+def two_opt(tour, dist, max_passes=50):
+    """Reverse ``tour[i:j+1]`` whenever that shortens the tour; endpoints stay fixed."""
+    tour = list(tour)
+    n = len(tour)
+    for _ in range(max_passes):
+        improved = False
+        for i in range(1, n - 2):
+            a, b = tour[i - 1], tour[i]
+            dist_a, dist_b = dist[a], dist[b]
+            ab = dist_a[b]
+            for j in range(i + 1, n - 1):
+                c, d = tour[j], tour[j + 1]
+                if dist_a[c] + dist_b[d] < ab + dist[c][d] - 1e-9:
+                    tour[i:j + 1] = tour[j:i - 1:-1]
+                    b = tour[i]
+                    dist_b = dist[b]
+                    ab = dist_a[b]
+                    improved = True
+        if not improved:
+            break
+    return tour
+
+
+def bisect(points, indices, groups):
+    """Split ``indices`` of planar ``points`` into ``groups`` compact groups of near-equal size."""
+    if groups <= 1:
+        return [indices] if indices else []
+    xs = [points[i][0] for i in indices]
+    ys = [points[i][1] for i in indices]
+    axis = 0 if max(xs) - min(xs) >= max(ys) - min(ys) else 1
+    indices = sorted(indices, key=lambda i: points[i][axis])
+    left = groups // 2
+    cut = round(len(indices) * left / groups)
+    return bisect(points, indices[:cut], left) + bisect(points, indices[cut:], groups - left)
+
+
+def route(depot_xy, points, max_passes=50):
+    """Order one vehicle's ``points``; returns ``(order, km, nearest_neighbour_km)`` over point indices."""
+    nodes = [depot_xy, *points]
+    dist = [[math.hypot(x1 - x2, y1 - y2) for x2, y2 in nodes] for x1, y1 in nodes]
+    greedy = nearest_neighbour(dist)
+    improved = two_opt(greedy, dist, max_passes)
+    return [node - 1 for node in improved[1:-1]], tour_length(improved, dist), tour_length(greedy, dist)
+
+
+def plan(stops, depot=None, vehicles=None, capacity=None, max_passes=None):
+    """
+    Plan routes for ``stops`` = ``[(id, lat, lon), ...]``.
+
+    Returns ``(routes, unassigned_ids)``. Each vehicle gets at most
+    ``capacity`` stops.
+    """
+    options = get_options()
+    depot = tuple(depot or options["DEPOT"])
+    vehicles = vehicles or options["VEHICLES"]
+    capacity = capacity or options["CAPACITY"]
+    max_passes = max_passes or options["MAX_2OPT_PASSES"]
+
+    points = project(depot, [(lat, lon) for _, lat, lon in stops])
+    ids = [stop_id for stop_id, _, _ in stops]
+    by_distance = sorted(range(len(points)), key=lambda i: math.hypot(*points[i]))
+    keep, rest = by_distance[:vehicles * capacity], by_distance[vehicles * capacity:]
+
+    routes = []
+    for vehicle, members in enumerate(bisect(points, keep, min(vehicles, len(keep))), 1):
+        order, km, greedy_km = route((0.0, 0.0), [points[i] for i in members], max_passes)
+        routes.append(Route(vehicle, [ids[members[i]] for i in order], km, greedy_km))
+    return routes, [ids[i] for i in rest]
@@ -0,0 +1,251 @@
+"""
+Append-only event log for detections and chatbot turns.
+
+:func:`record` appends ``(timestamp, kind, data)`` to a bounded
+``collections.deque``. The deque is a ring: ``append`` and ``popleft`` are
+atomic under the GIL, so request threads never take a lock or touch the
+database. When the ring is full the oldest event is overwritten, and the
+``dropped`` count goes up.
+
+A daemon thread drains the ring every ``FLUSH_INTERVAL`` seconds, or as
+soon as ``BATCH_SIZE`` events are waiting. It writes them in batches to
+one of two backends:
+
+* ``db``: one ``bulk_create`` into :class:`~core.models.Event` per batch;
+* ``ndjson``: one ``events-<pid>.ndjson`` file per worker process (so
+  processes never rotate each other's files), rolled over at
+  ``NDJSON_MAX_BYTES`` and keeping ``NDJSON_BACKUPS`` old files.
+
+A batch that fails to write is logged and dropped; the log must never
+back up into requests. Events still in the ring are written on normal
+exit, and lost if the worker is killed.
+
+``manage.py query_events`` reads either backend back (:meth:`read` on
+the sinks) and aggregates it.
+"""
+
+import atexit
+import json
+import logging
+import os
+import threading
+import time
+from collections import deque
+from datetime import datetime, timezone as dt_timezone
+from pathlib import Path
+
+from django.conf import settings
+from django.db import close_old_connections
+
+from . import metrics
+from .models import Event
+
+logger = logging.getLogger(__name__)
+
+DEFAULTS = {
+    "ENABLED": True,
+    "BACKEND": "db",
+    "CAPACITY": 10_000,
+    "BATCH_SIZE": 500,
+    "FLUSH_INTERVAL": 2.0,
+    "NDJSON_DIR": "logs/events",
+    "NDJSON_MAX_BYTES": 50 * 1024 * 1024,
+    "NDJSON_BACKUPS": 5,
+}
+
+
+def get_options():
+    return {**DEFAULTS, **getattr(settings, "EVENTS", {})}
+
+
+DETECTION = "detection"
+CHAT = "chat"
+
+
+def _as_datetime(ts):
+    return datetime.fromtimestamp(ts, dt_timezone.utc)
+
+
+# ============================================================
+# BACKENDS
+# ============================================================
+class DatabaseSink:
+
+    def write(self, batch):
+        Event.objects.bulk_create(
+            [Event(kind=kind, created_at=_as_datetime(ts), data=data) for ts, kind, data in batch],
+            batch_size=len(batch),
+        )
+
+    def read(self, kind, since):
+        rows = Event.objects.filter(kind=kind, created_at__gte=since).order_by()
+        for created_at, data in rows.values_list("created_at", "data").iterator(chunk_size=2000):
+            yield created_at, data
+
+
+class NdjsonSink:
+
+    def __init__(self, directory, max_bytes=50 * 1024 * 1024, backups=5):
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        self.backups = backups
+        self.path = self.directory / f"events-{os.getpid()}.ndjson"
+
+    def write(self, batch):
+        data = "".join(
+            json.dumps({"ts": _as_datetime(ts).isoformat(), "kind": kind, **payload}, separators=(",", ":")) + "\n"
+            for ts, kind, payload in batch
+        ).encode()
+        self.directory.mkdir(parents=True, exist_ok=True)
+        try:
+            size = self.path.stat().st_size
+        except FileNotFoundError:
+            size = 0
+        if size and size + len(data) > self.max_bytes:
+            self._rotate()
+        with open(self.path, "ab") as fh:
+            fh.write(data)
+
+    def _rotate(self):
+        for n in range(self.backups - 1, 0, -1):
+            older = self.path.with_name(f"{self.path.name}.{n}")
+            if older.exists():
+                os.replace(older, self.path.with_name(f"{self.path.name}.{n + 1}"))
+        if self.backups:
+            os.replace(self.path, self.path.with_name(f"{self.path.name}.1"))
+        else:
+            self.path.unlink()
+
+    def read(self, kind, since):
+        """Every worker's current and rotated files."""
+        for path in sorted(self.directory.glob("events-*.ndjson*")):
+            with open(path, encoding="utf-8") as fh:
+                for line in fh:
+                    try:
+                        event = json.loads(line)
+                    except ValueError:
+                        continue  # a line cut short by a killed worker
+                    if event.pop("kind", None) != kind:
+                        continue
+                    created_at = datetime.fromisoformat(event.pop("ts"))
+                    if created_at >= since:
+                        yield created_at, event
+
+
+def build_sink(options):
+    if options["BACKEND"] == "ndjson":
+        directory = Path(options["NDJSON_DIR"])
+        if not directory.is_absolute():
+            directory = Path(settings.BASE_DIR) / directory
+        return NdjsonSink(directory, options["NDJSON_MAX_BYTES"], options["NDJSON_BACKUPS"])
+    return DatabaseSink()
+
+
+# ============================================================
+# RING BUFFER + FLUSHER
+# ============================================================
+class EventLog:
+    """
+    Producers only ``append`` to the ring. ``flush`` drains it in batches of
+    ``batch_size``; the flusher thread runs it. Counters are plain ints and
+    may be off by a few under concurrency.
+    """
+
+    def __init__(self, sink, capacity=10_000, batch_size=500, flush_interval=2.0):
+        self.sink = sink
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._ring = deque(maxlen=capacity)
+        self._flush_lock = threading.Lock()
+        self._start_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread = None
+        self.recorded = self.written = self.dropped = self.failed = 0
+
+    def record(self, kind, data):
+        ring = self._ring
+        if len(ring) == ring.maxlen:
+            self.dropped += 1
+        ring.append((time.time(), kind, data))
+        self.recorded += 1
+        if len(ring) == self.batch_size:
+            self._wakeup.set()
+        if self._thread is None:
+            self._start()
+
+    def pending(self):
+        return len(self._ring)
+
+    def flush(self):
+        """Write everything in the ring; returns the number of events written."""
+        written = 0
+        with self._flush_lock:
+            while True:
+                batch = []
+                try:
+                    while len(batch) < self.batch_size:
+                        batch.append(self._ring.popleft())
+                except IndexError:
+                    pass
+                if not batch:
+                    return written
+                try:
+                    self.sink.write(batch)
+                except Exception:
+                    logger.exception("Writing %d events failed; dropping them", len(batch))
+                    self.failed += len(batch)
+                    return written
+                written += len(batch)
+                self.written += len(batch)
+
+    def _start(self):
+        with self._start_lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="event-flush", daemon=True)
+                self._thread.start()
+                atexit.register(self.flush)
+
+    def _run(self):
+        while True:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            try:
+                self.flush()
+            finally:
+                close_old_connections()
+
+    def stats(self):
+        return {"pending": self.pending(), "recorded": self.recorded, "written": self.written,
+                "dropped": self.dropped, "failed": self.failed}
+
+
+_log = None
+_log_lock = threading.Lock()
+
+
+def get_log():
+    global _log
+    if _log is None:
+        with _log_lock:
+            if _log is None:
+                options = get_options()
+                _log = EventLog(
+                    build_sink(options), options["CAPACITY"], options["BATCH_SIZE"], options["FLUSH_INTERVAL"],
+                )
+    return _log
+
+
+def record(kind, **data):
+    if get_options()["ENABLED"]:
+        get_log().record(kind, data)
+
+
+@metrics.REGISTRY.collector
+def _log_metrics():
+    if _log is None:
+        return []
+    events = metrics.Gauge("event_log_events", "Events recorded, written, dropped and pending.", ("state",))
+    for state, value in _log.stats().items():
+        events.set(value, state=state)
+    return [events]
+
@@ -0,0 +1,131 @@
+"""
+Streaming CSV/NDJSON export and chunked archive/delete.
+
+Rows are read with ``values_list().iterator(chunk_size=...)`` and written out
+a block at a time, so memory stays flat whether the export is a hundred rows
+or a few million. Used by the admin export actions and by the
+``export_rows`` / ``archive_old_rows`` management commands.
+"""
+
+import csv
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+
+from .models import ContactMessage, PickupRequest
+
+# name -> (model, exported columns, age column)
+EXPORTS = {
+    "pickups": (PickupRequest, ("id", "name", "email", "phone", "address", "created_at"), "created_at"),
+    "contacts": (
+        ContactMessage,
+        ("id", "name", "email", "subject", "message", "submitted_at", "read"),
+        "submitted_at",
+    ),
+}
+
+FORMATS = {
+    "csv": "text/csv",
+    "ndjson": "application/x-ndjson",
+}
+
+CHUNK_SIZE = 2000
+
+# Spreadsheets run cells starting with these as formulas; CSV exports prefix
+# them with a quote so a submitted "=HYPERLINK(...)" is shown as text.
+FORMULA_PREFIXES = ("=", "+", "-", "@", "\t", "\r")
+
+
+class _Echo:
+    """File-like object whose write() returns the line for csv.writer."""
+
+    def write(self, value):
+        return value
+
+
+def export_spec(model):
+    for name, (spec_model, fields, date_field) in EXPORTS.items():
+        if spec_model is model:
+            return name, fields, date_field
+    raise KeyError(model)
+
+
+def escape_formula(value):
+    if isinstance(value, str) and value.startswith(FORMULA_PREFIXES):
+        return "'" + value
+    return value
+
+
+def csv_chunks(rows, fields):
+    writer = csv.writer(_Echo())
+    yield writer.writerow(fields)
+    block = []
+    for row in rows:
+        block.append(writer.writerow([escape_formula(value) for value in row]))
+        if len(block) >= 500:
+            yield "".join(block)
+            block = []
+    if block:
+        yield "".join(block)
+
+
+def ndjson_chunks(rows, fields):
+    encoder = DjangoJSONEncoder(separators=(",", ":"))
+    block = []
+    for row in rows:
+        block.append(encoder.encode(dict(zip(fields, row))) + "\n")
+        if len(block) >= 500:
+            yield "".join(block)
+            block = []
+    if block:
+        yield "".join(block)
+
+
+def export_chunks(queryset, fields, format, chunk_size=CHUNK_SIZE):
+    rows = queryset.order_by("pk").values_list(*fields).iterator(chunk_size=chunk_size)
+    return (csv_chunks if format == "csv" else ndjson_chunks)(rows, fields)
+
+
+def streaming_export(queryset, format):
+    name, fields, _ = export_spec(queryset.model)
+    response = StreamingHttpResponse(
+        export_chunks(queryset, fields, format), content_type=FORMATS[format],
+    )
+    filename = f"{name}-{timezone.now():%Y%m%d-%H%M%S}.{format}"
+    response["Content-Disposition"] = f'attachment; filename="{filename}"'
+    return response
+
+
+def archive_and_delete(queryset, chunk_size=1000, archive=None, progress=None):
+    """
+    Delete ``queryset`` in primary-key chunks, one transaction per chunk.
+
+    Each chunk is written to ``archive`` (a text file, NDJSON) before it is
+    deleted, so an interrupted run loses nothing and can be restarted.
+    ``progress(done)`` is called after every chunk. Returns the rows deleted.
+    """
+    _, fields, _ = export_spec(queryset.model)
+    done = 0
+    last_pk = None
+    while True:
+        chunk = queryset.order_by("pk")
+        if last_pk is not None:
+            chunk = chunk.filter(pk__gt=last_pk)
+        rows = list(chunk.values_list(*fields)[:chunk_size])
+        if not rows:
+            return done
+
+        pks = [row[0] for row in rows]
+        if archive is not None:
+            archive.writelines(ndjson_chunks(rows, fields))
+            archive.flush()
+        with transaction.atomic():
+            queryset.model.objects.filter(pk__in=pks).delete()
+
+        done += len(rows)
+        last_pk = pks[-1]
+        if progress is not None:
+            progress(done)
@@ -0,0 +1,162 @@
+"""
+A stand-in for the Groq chat completions API, for offline load tests.
+
+Only ``POST /openai/v1/chat/completions`` is implemented, with and without
+``stream``. Point the app at it with ``GROQ_BASE_URL=http://127.0.0.1:<port>``.
+"""
+
+import json
+import sys
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+DEFAULT_REPLY = (
+    "Take old electronics to an authorised e-waste recycler. Remove batteries "
+    "first, wipe personal data, and never put devices in household trash."
+)
+
+
+def estimate_prompt_tokens(messages):
+    """About four characters per token plus a few per message; close enough to price a prompt."""
+    return sum((len(m.get("content") or "") + 3) // 4 + 4 for m in messages)
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # Headers and body go out in separate writes; without this, Nagle plus
+    # delayed ACKs add ~40 ms to every keep-alive response.
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+    def do_POST(self):
+        if not self.path.rstrip("/").endswith("/chat/completions"):
+            self._send_json(404, {"error": {"message": "not found"}})
+            return
+
+        length = int(self.headers.get("Content-Length") or 0)
+        try:
+            payload = json.loads(self.rfile.read(length) or b"{}")
+        except ValueError:
+            self._send_json(400, {"error": {"message": "invalid json"}})
+            return
+
+        self.server.record_request(payload)
+        if self.server.status != 200:
+            time.sleep(self.server.latency)
+            self._send_json(self.server.status, {"error": {"message": "fake failure"}})
+            return
+
+        model = payload.get("model", "fake-model")
+        prompt_tokens = estimate_prompt_tokens(payload.get("messages", []))
+        time.sleep(self.server.model_latency.get(model, self.server.latency)
+                   + prompt_tokens * self.server.prompt_token_delay)
+        if payload.get("stream"):
+            self._send_stream(model)
+        else:
+            self._send_json(200, self._completion(model, prompt_tokens))
+
+    def _completion(self, model, prompt_tokens):
+        reply = self.server.reply
+        return {
+            "id": f"chatcmpl-{uuid.uuid4().hex}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": model,
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": reply},
+                "finish_reason": "stop",
+            }],
+            "usage": {
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": len(reply.split()),
+                "total_tokens": prompt_tokens + len(reply.split()),
+            },
+        }
+
+    def _send_json(self, status, body):
+        data = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _send_stream(self, model):
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+
+        chunk_id = f"chatcmpl-{uuid.uuid4().hex}"
+        words = self.server.reply.split(" ")
+        for i, word in enumerate(words):
+            token = word if i == 0 else " " + word
+            self._write_event({
+                "id": chunk_id,
+                "object": "chat.completion.chunk",
+                "created": int(time.time()),
+                "model": model,
+                "choices": [{"index": 0, "delta": {"content": token}, "finish_reason": None}],
+            })
+            time.sleep(self.server.token_delay)
+        self._write_chunk(b"data: [DONE]\n\n")
+        self._write_chunk(b"")
+
+    def _write_event(self, body):
+        self._write_chunk(b"data: " + json.dumps(body).encode() + b"\n\n")
+
+    def _write_chunk(self, data):
+        self.wfile.write(b"%x\r\n%s\r\n" % (len(data), data))
+        self.wfile.flush()
+
+
+class FakeGroqServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, host="127.0.0.1", port=0, latency=0.0, token_delay=0.0,
+                 reply=DEFAULT_REPLY, status=200, verbose=False, model_latency=None,
+                 prompt_token_delay=0.0):
+        super().__init__((host, port), _Handler)
+        self.latency = latency
+        self.token_delay = token_delay
+        self.reply = reply
+        self.status = status
+        # model name -> latency, to make one model slower than the others.
+        self.model_latency = dict(model_latency or {})
+        # Extra seconds per prompt token before the first byte (prefill cost).
+        self.prompt_token_delay = prompt_token_delay
+        self.verbose = verbose
+        self.requests = []
+        self._lock = threading.Lock()
+        self._thread = None
+
+    @property
+    def base_url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def handle_error(self, request, client_address):
+        # Clients that hit their deadline or won a hedge hang up mid-reply.
+        if not isinstance(sys.exc_info()[1], ConnectionError):
+            super().handle_error(request, client_address)
+
+    def record_request(self, payload):
+        with self._lock:
+            self.requests.append(payload)
+
+    def start(self):
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+        if self._thread is not None:
+            self._thread.join()
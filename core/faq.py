@@ -0,0 +1,200 @@
+"""
+Curated e-waste FAQ answered without calling the LLM.
+
+The FAQ lives in ``core/data/faq.json``. At startup it is compiled into a
+word-level trie over the item vocabulary (so "laptop battery" resolves to
+*battery* before "laptop" is considered) and an inverted index from keyword
+to FAQ entries. A question is answered directly only when exactly one entry
+matches with full confidence; anything else goes to the LLM.
+"""
+
+import json
+import math
+import re
+from dataclasses import dataclass
+from pathlib import Path
+
+from .chat_cache import fold_plural, normalize
+
+FAQ_PATH = Path(__file__).resolve().parent / "data" / "faq.json"
+
+_ewaste_spelling = re.compile(r"\be ?waste\b")
+
+# Words too common in unrelated questions ("my old laptop is slow", "my phone
+# gets hot") to send a canned answer on their own. validate() rejects them in
+# entries that answer on a single keyword.
+GENERIC_KEYWORDS = frozenset({
+    "old", "new", "get", "got", "hot", "sell", "buy", "pay", "pick", "up", "take", "use", "need",
+    "want", "good", "best", "how", "can", "do", "my", "where",
+})
+
+
+def tokenize(text):
+    text = _ewaste_spelling.sub("ewaste", normalize(text))
+    return [fold_plural(word) for word in text.split()]
+
+
+@dataclass(frozen=True)
+class FaqEntry:
+    id: str
+    question: str
+    answer: str
+    items: frozenset
+    keywords: frozenset
+    min_keywords: int
+
+
+@dataclass(frozen=True)
+class FaqMatch:
+    entry: FaqEntry
+    confidence: float
+    items: frozenset
+    keywords: frozenset
+
+
+class ItemTrie:
+    """Word-level trie that finds the longest item phrase at each position."""
+
+    _TERMINAL = object()
+
+    def __init__(self):
+        self.root = {}
+        self.size = 0
+
+    def add(self, phrase, item):
+        node = self.root
+        for word in tokenize(phrase):
+            node = node.setdefault(word, {})
+        if self._TERMINAL not in node:
+            self.size += 1
+        node[self._TERMINAL] = item
+
+    def find(self, tokens):
+        found = set()
+        i = 0
+        while i < len(tokens):
+            node, match, match_end = self.root, None, i
+            for j in range(i, len(tokens)):
+                node = node.get(tokens[j])
+                if node is None:
+                    break
+                if self._TERMINAL in node:
+                    match, match_end = node[self._TERMINAL], j + 1
+            if match is not None:
+                found.add(match)
+                i = match_end
+            else:
+                i += 1
+        return frozenset(found)
+
+
+class FaqIndex:
+
+    def __init__(self, entries, items, synonyms, version=None):
+        self.version = version
+        self.entries = list(entries)
+        self.trie = ItemTrie()
+        for item, label in items.items():
+            self.trie.add(item, item)
+            self.trie.add(label, item)
+        for item, phrases in synonyms.items():
+            for phrase in phrases:
+                self.trie.add(phrase, item)
+
+        self.postings = {}
+        for entry in self.entries:
+            for keyword in entry.keywords:
+                self.postings.setdefault(keyword, []).append(entry)
+        # Rarer keywords say more about which entry was meant.
+        self.weights = {
+            keyword: math.log(1 + len(self.entries) / len(matches))
+            for keyword, matches in self.postings.items()
+        }
+
+    @classmethod
+    def from_file(cls, items, path=FAQ_PATH):
+        with open(path, encoding="utf-8") as fh:
+            data = json.load(fh)
+
+        entries = [
+            FaqEntry(
+                id=raw["id"],
+                question=raw["question"],
+                answer=raw["answer"],
+                items=frozenset(raw.get("items", ())),
+                keywords=frozenset(fold_plural(k) for k in raw["keywords"]),
+                min_keywords=raw.get("min_keywords", 1),
+            )
+            for raw in data["entries"]
+        ]
+        return cls(entries, items, data.get("synonyms", {}), version=data.get("version"))
+
+    def _rank(self, tokens):
+        items = self.trie.find(tokens)
+        words = set(tokens)
+
+        scores = {}
+        for word in words:
+            for entry in self.postings.get(word, ()):
+                scores.setdefault(entry.id, [entry, set()])[1].add(word)
+
+        ranked = []
+        for entry, keywords in scores.values():
+            if entry.items and not entry.items & items:
+                continue
+            confidence = min(1.0, len(keywords) / entry.min_keywords)
+            weight = sum(self.weights[k] for k in keywords)
+            coverage = len(keywords) / len(entry.keywords)
+            match = FaqMatch(entry, confidence, entry.items & items, frozenset(keywords))
+            ranked.append(((confidence, len(match.items), weight, coverage), match))
+
+        ranked.sort(key=lambda pair: pair[0], reverse=True)
+        return ranked
+
+    def match(self, text, min_confidence=1.0, max_words=20):
+        """Return the single best :class:`FaqMatch` or ``None`` if unsure."""
+        tokens = tokenize(text)
+        # Long messages usually carry detail a canned answer would ignore.
+        if len(tokens) > max_words:
+            return None
+        ranked = self._rank(tokens)
+        if not ranked:
+            return None
+        best_rank, best = ranked[0]
+        if best.confidence < min_confidence:
+            return None
+        if len(ranked) > 1 and ranked[1][0] == best_rank:
+            return None
+        return best
+
+    def answer(self, text, min_confidence=1.0, max_words=20):
+        match = self.match(text, min_confidence, max_words)
+        return match.entry.answer if match else None
+
+    def validate(self, items):
+        """Problems with the FAQ data, as messages; empty when it is usable."""
+        problems = []
+        seen = set()
+        for entry in self.entries:
+            if entry.id in seen:
+                problems.append(f"{entry.id}: duplicate id")
+            seen.add(entry.id)
+            unknown = entry.items - set(items)
+            if unknown:
+                problems.append(f"{entry.id}: unknown item(s) {', '.join(sorted(unknown))}")
+            if entry.min_keywords > len(entry.keywords):
+                problems.append(f"{entry.id}: min_keywords {entry.min_keywords} > {len(entry.keywords)} keywords")
+            generic = entry.keywords & GENERIC_KEYWORDS
+            if entry.min_keywords < 2 and generic:
+                problems.append(
+                    f"{entry.id}: answers on one keyword but has generic keyword(s) {', '.join(sorted(generic))}"
+                )
+        return problems
+
+    def stats(self):
+        return {
+            "version": self.version,
+            "entries": len(self.entries),
+            "keywords": len(self.postings),
+            "item_phrases": self.trie.size,
+        }
@@ -0,0 +1,157 @@
+"""
+Offline geocoding and a geohash index for pickup requests.
+
+Coordinates come from the PIN code in the free-form address, looked up in
+``data/pincodes.json`` (post-office centroids; load the full India Post
+directory with ``manage.py import_pincodes``). No geocoding API is called.
+
+Each geohash stored on a row is 9 characters long. A geohash prefix is a
+rectangular cell, and every point in the cell sorts in ``[cell, next cell)``,
+where the next cell is the following prefix in the base32 alphabet (see
+:func:`prefix_range`). Both bounds are base32, so any collation that orders
+that alphabet works. :func:`nearby` turns "within X km" into a few B-tree
+range scans over the cells covering the circle, then checks the exact
+great-circle distance only on those candidates.
+"""
+
+import json
+import math
+import re
+from pathlib import Path
+
+PINCODES_PATH = Path(__file__).resolve().parent / "data" / "pincodes.json"
+
+EARTH_RADIUS_KM = 6371.0088
+GEOHASH_PRECISION = 9  # ~5 m cells
+
+_BASE32 = "0123456789bcdefghjkmnpqrstuvwxyz"
+# Indian PIN codes are six digits and never start with 0.
+_pin = re.compile(r"(?<!\d)([1-9]\d{2})\s?(\d{3})(?!\d)")
+
+
+def haversine_km(lat1, lon1, lat2, lon2):
+    dlat = math.radians(lat2 - lat1)
+    dlon = math.radians(lon2 - lon1)
+    a = math.sin(dlat / 2) ** 2 + math.cos(math.radians(lat1)) * math.cos(math.radians(lat2)) * math.sin(dlon / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(a))
+
+
+# ============================================================
+# PIN CODE TABLE
+# ============================================================
+def load_pincodes(path=PINCODES_PATH):
+    with open(path, encoding="utf-8") as fh:
+        return {pin: tuple(latlon) for pin, latlon in json.load(fh)["pincodes"].items()}
+
+
+PINCODES = load_pincodes()
+
+
+def find_pincode(address):
+    """The last six-digit PIN in ``address`` ("500 081" counts), or None."""
+    matches = _pin.findall(address or "")
+    return "".join(matches[-1]) if matches else None
+
+
+def locate(address, table=None):
+    """``(pincode, lat, lon)`` for an address; lat/lon are None if the PIN is unknown."""
+    table = PINCODES if table is None else table
+    pincode = find_pincode(address)
+    lat, lon = table.get(pincode, (None, None))
+    return pincode, lat, lon
+
+
+def geocode(pickup):
+    """Fill ``pincode``, ``latitude``, ``longitude`` and ``geohash`` from the address."""
+    pincode, lat, lon = locate(pickup.address)
+    pickup.pincode = pincode or ""
+    pickup.latitude, pickup.longitude = lat, lon
+    pickup.geohash = encode(lat, lon) if lat is not None else ""
+    return lat is not None
+
+
+# ============================================================
+# GEOHASH
+# ============================================================
+def encode(lat, lon, precision=GEOHASH_PRECISION):
+    lat_range, lon_range = [-90.0, 90.0], [-180.0, 180.0]
+    chars, bits, value, even = [], 0, 0, True
+    while len(chars) < precision:
+        rng, coord = (lon_range, lon) if even else (lat_range, lat)
+        mid = (rng[0] + rng[1]) / 2
+        value <<= 1
+        if coord >= mid:
+            value |= 1
+            rng[0] = mid
+        else:
+            rng[1] = mid
+        even = not even
+        bits += 1
+        if bits == 5:
+            chars.append(_BASE32[value])
+            bits, value = 0, 0
+    return "".join(chars)
+
+
+def cell_size_deg(precision):
+    """``(lat_degrees, lon_degrees)`` spanned by one cell."""
+    lon_bits = (5 * precision + 1) // 2
+    lat_bits = 5 * precision // 2
+    return 180.0 / 2 ** lat_bits, 360.0 / 2 ** lon_bits
+
+
+def covering_cells(lat, lon, radius_km, max_cells=96):
+    """
+    Geohash prefixes whose cells together cover the circle's bounding box:
+    the finest precision that needs at most ``max_cells`` of them.
+    """
+    dlat_r = math.degrees(radius_km / EARTH_RADIUS_KM)
+    dlon_r = dlat_r / max(math.cos(math.radians(lat)), 1e-6)
+    south, north = max(-90.0, lat - dlat_r), min(90.0, lat + dlat_r)
+    west, east = lon - dlon_r, lon + dlon_r
+    for precision in range(GEOHASH_PRECISION, 0, -1):
+        dlat, dlon = cell_size_deg(precision)
+        rows = math.ceil((north - south) / dlat) + 1
+        cols = math.ceil((east - west) / dlon) + 1
+        if rows * cols <= max_cells:
+            return sorted({
+                encode(min(north, south + i * dlat), (min(east, west + j * dlon) + 180) % 360 - 180, precision)
+                for i in range(rows) for j in range(cols)
+            })
+    return [""]
+
+
+def prefix_range(cell):
+    """
+    ``(low, high)`` such that a geohash starts with ``cell`` exactly when
+    ``low <= geohash < high`` (``high`` is None after the last cell). Both
+    bounds are made of base32 characters only. Any collation that orders
+    the alphabet, such as C, en_US or ICU, therefore agrees; a sentinel
+    like "{" does not.
+    """
+    stem = cell.rstrip(_BASE32[-1])
+    if not stem:
+        return cell, None
+    return cell, stem[:-1] + _BASE32[_BASE32.index(stem[-1]) + 1]
+
+
+def nearby(queryset, lat, lon, radius_km):
+    """Rows of ``queryset`` within ``radius_km`` of the point, nearest first, as ``(km, row)``."""
+    queryset = queryset.exclude(latitude=None)
+    cells = covering_cells(lat, lon, radius_km)
+    if cells != [""]:
+        # One range per cell, UNION ALL-ed (cells never overlap): an OR of
+        # ranges is evaluated row by row instead of as separate index seeks.
+        ranges = []
+        for cell in cells:
+            low, high = prefix_range(cell)
+            cell_rows = queryset.filter(geohash__gte=low)
+            ranges.append(cell_rows.filter(geohash__lt=high) if high else cell_rows)
+        queryset = ranges[0].union(*ranges[1:], all=True) if len(ranges) > 1 else ranges[0]
+    found = []
+    for row in queryset:
+        km = haversine_km(lat, lon, row.latitude, row.longitude)
+        if km <= radius_km:
+            found.append((km, row))
+    found.sort(key=lambda item: item[0])
+    return found
@@ -0,0 +1,246 @@
+"""
+Bounded image ingestion for the camera API.
+
+Uploads arrive one of three ways:
+
+* raw body with ``Content-Type: image/jpeg`` or ``image/png``
+* multipart form with the file in the ``image`` field
+* the legacy ``image`` data-URL form field
+
+The first two are read into a single buffer exposed as a ``memoryview``; the
+size limit is enforced from ``Content-Length`` before any bytes are read.
+Headers and dimensions are checked with Pillow without decoding pixel data.
+"""
+
+import base64
+import binascii
+import io
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+
+from django.conf import settings
+from django.core.exceptions import RequestDataTooBig
+
+MIN_IMAGE_BYTES = 4000
+READ_CHUNK = 64 * 1024
+
+JPEG_MAGIC = b"\xff\xd8\xff"
+PNG_MAGIC = b"\x89PNG\r\n\x1a\n"
+RAW_CONTENT_TYPES = ("image/jpeg", "image/png")
+
+
+class ImageRejected(Exception):
+
+    def __init__(self, code, status=400):
+        super().__init__(code)
+        self.code = code
+        self.status = status
+
+
+@dataclass(frozen=True)
+class ImageInfo:
+    format: str
+    width: int
+    height: int
+    nbytes: int
+
+
+class BufferReader(io.RawIOBase):
+    """Seekable file object over a buffer, so Pillow reads without a copy."""
+
+    def __init__(self, buffer):
+        self._view = memoryview(buffer).cast("B")
+        self._pos = 0
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def readinto(self, b):
+        n = min(len(b), len(self._view) - self._pos)
+        b[:n] = self._view[self._pos:self._pos + n]
+        self._pos += n
+        return n
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        if whence == io.SEEK_CUR:
+            offset += self._pos
+        elif whence == io.SEEK_END:
+            offset += len(self._view)
+        self._pos = max(0, offset)
+        return self._pos
+
+    def tell(self):
+        return self._pos
+
+
+def max_upload_bytes():
+    return settings.CAMERA_MAX_UPLOAD_BYTES
+
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_executor():
+    """Shared, bounded pool for batch uploads; Pillow releases the GIL while decoding."""
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=settings.CAMERA_BATCH_WORKERS,
+                    thread_name_prefix="camera-batch",
+                )
+    return _executor
+
+
+def declared_length(request):
+    try:
+        return int(request.META.get("CONTENT_LENGTH") or 0)
+    except ValueError:
+        raise ImageRejected("bad-content-length")
+
+
+def _read_raw_body(request, limit):
+    length = declared_length(request)
+    if length <= 0:
+        raise ImageRejected("invalid-image")
+    if length > limit:
+        raise ImageRejected("too-large-image", status=413)
+
+    buffer = bytearray(length)
+    view = memoryview(buffer)
+    received = 0
+    while received < length:
+        chunk = request.read(min(READ_CHUNK, length - received))
+        if not chunk:
+            break
+        view[received:received + len(chunk)] = chunk
+        received += len(chunk)
+    return view[:received]
+
+
+def read_uploaded_file(upload, limit=None):
+    limit = max_upload_bytes() if limit is None else limit
+    if upload.size > limit:
+        raise ImageRejected("too-large-image", status=413)
+
+    fileobj = upload.file
+    if isinstance(fileobj, io.BytesIO):
+        # In-memory uploads already hold the bytes; share them.
+        return fileobj.getbuffer()
+
+    buffer = bytearray(upload.size)
+    fileobj.seek(0)
+    received = fileobj.readinto(buffer)
+    return memoryview(buffer)[:received]
+
+
+def _read_data_url(image_data, limit):
+    if not image_data or "," not in image_data:
+        raise ImageRejected("invalid-image")
+
+    header, base64_data = image_data.split(",", 1)
+    if not (
+        header.startswith("data:image/jpeg")
+        or header.startswith("data:image/png")
+    ):
+        raise ImageRejected("unsupported-format")
+    # base64 is 4 chars per 3 bytes; reject before decoding.
+    if len(base64_data) * 3 // 4 > limit:
+        raise ImageRejected("too-large-image", status=413)
+
+    try:
+        return memoryview(base64.b64decode(base64_data, validate=True))
+    except (binascii.Error, ValueError):
+        raise ImageRejected("bad-image-data")
+
+
+def read_upload(request, limit=None):
+    """Return the uploaded image bytes as a ``memoryview``."""
+    limit = max_upload_bytes() if limit is None else limit
+
+    if request.content_type in RAW_CONTENT_TYPES:
+        return _read_raw_body(request, limit)
+
+    if declared_length(request) > limit * 2:
+        # Multipart/urlencoded envelopes carry some overhead (and base64 4/3),
+        # but nothing legitimate is twice the image limit.
+        raise ImageRejected("too-large-image", status=413)
+
+    try:
+        upload = request.FILES.get("image")
+        image_data = request.POST.get("image")
+    except RequestDataTooBig:
+        raise ImageRejected("too-large-image", status=413)
+
+    if upload is not None:
+        return read_uploaded_file(upload, limit)
+    return _read_data_url(image_data, limit)
+
+
+def inspect_image(buffer):
+    """Validate the header and dimensions of an encoded image without decoding it."""
+    if len(buffer) < MIN_IMAGE_BYTES:
+        raise ImageRejected("too-small-image")
+
+    head = bytes(buffer[:8])
+    if not (head.startswith(JPEG_MAGIC) or head.startswith(PNG_MAGIC)):
+        raise ImageRejected("unsupported-format")
+
+    from PIL import Image
+
+    try:
+        with Image.open(BufferReader(buffer)) as img:
+            if img.format not in ("JPEG", "PNG"):
+                raise ImageRejected("unsupported-format")
+            width, height = img.size
+            img.verify()
+    except ImageRejected:
+        raise
+    except Exception:
+        raise ImageRejected("bad-image-data")
+
+    if width * height > settings.CAMERA_MAX_PIXELS:
+        raise ImageRejected("too-large-image", status=413)
+
+    return ImageInfo(format=img.format, width=width, height=height, nbytes=len(buffer))
+
+
+def read_batch_uploads(request, max_images=None):
+    """Return ``(uploads, items)`` from a multipart batch, items padded with ``None``."""
+    max_images = settings.CAMERA_BATCH_MAX_IMAGES if max_images is None else max_images
+    if declared_length(request) > max_images * max_upload_bytes() * 2:
+        raise ImageRejected("too-large-batch", status=413)
+
+    try:
+        uploads = request.FILES.getlist("images")
+        items = request.POST.getlist("items")
+    except RequestDataTooBig:
+        raise ImageRejected("too-large-batch", status=413)
+
+    if not uploads:
+        raise ImageRejected("no-images")
+    if len(uploads) > max_images:
+        raise ImageRejected("too-many-images")
+    return uploads, items + [None] * (len(uploads) - len(items))
+
+
+def decode_resized(buffer, size):
+    """
+    Decode to an RGB image of exactly ``size``. For JPEG, ``draft`` lets the
+    decoder scale down by up to 8x in the DCT domain, so a 12 MP frame is
+    never materialised at full resolution.
+    """
+    from PIL import Image
+
+    try:
+        with Image.open(BufferReader(buffer)) as img:
+            img.draft("RGB", size)
+            return img.convert("RGB").resize(size, Image.BILINEAR)
+    except Exception:
+        raise ImageRejected("bad-image-data")
@@ -0,0 +1,343 @@
+"""
+Groq chat completions behind deadlines, retries, circuit breakers and hedging.
+
+``settings.LLM`` (see DEFAULTS) sets the budget: every call gets one
+``DEADLINE`` shared by all of its attempts; retryable errors (timeouts, 429,
+5xx) are retried up to ``RETRIES`` times with jittered backoff; each model
+has its own :class:`~core.resilience.CircuitBreaker`. If ``HEDGE_MODEL`` is
+set and ``CHAT_MODEL`` has not answered within ``HEDGE_DELAY`` seconds (or
+has already failed), the same question goes to the hedge model and the first
+answer wins. When both breakers are open, :class:`CircuitOpenError` is raised
+straight away so the view can fall back without waiting on Groq.
+
+The Groq SDK (with httpx and pydantic) is imported when the first client is
+built, not when this module is, so worker boot does not pay for it.
+"""
+
+import asyncio
+import threading
+import time
+import weakref
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from django.conf import settings
+
+from . import metrics, providers
+from .resilience import CircuitBreaker, CircuitOpenError, Deadline, DeadlineExceeded, backoff, is_retryable
+
+DEFAULTS = {
+    "DEADLINE": 8.0,
+    "RETRIES": 2,
+    "BACKOFF_BASE": 0.25,
+    "BACKOFF_MAX": 2.0,
+    "BREAKER_THRESHOLD": 5,
+    "BREAKER_RESET": 30.0,
+    # Off by default; set a second model to hedge slow calls.
+    "HEDGE_MODEL": None,
+    "HEDGE_DELAY": 2.0,
+    # How close a cached answer must be to stand in for a failed call.
+    "FALLBACK_SIMILARITY": 0.5,
+}
+
+
+def get_options():
+    return {**DEFAULTS, **getattr(settings, "LLM", {})}
+
+# ============================================================
+# PROMPT
+# ============================================================
+CHAT_MODEL = "llama-3.1-8b-instant"
+
+SYSTEM_PROMPT = (
+    "You are an e-waste guide assistant. Answer briefly and helpfully about "
+    "electronic waste recycling, proper disposal, environmental impact, and best practices. "
+    "Keep responses under 100 words."
+)
+
+COMPLETION_OPTIONS = {
+    "temperature": 0.4,
+    "max_tokens": 256,
+}
+
+
+FALLBACK_REPLY = (
+    "Our assistant is unavailable right now. Meanwhile: take old electronics to an "
+    "authorised e-waste recycler, remove batteries first, and wipe your personal data. "
+    "Please try again in a minute."
+)
+
+
+# Built once and sent first on every call, so each prompt begins with the
+# same bytes whatever conversation history follows.
+SYSTEM_MESSAGE = {"role": "system", "content": SYSTEM_PROMPT}
+
+
+def build_messages(user_message, context=()):
+    """System prompt, then ``context`` (earlier turns; see core.conversations), then the question."""
+    return [SYSTEM_MESSAGE, *context, {"role": "user", "content": user_message}]
+
+
+# ============================================================
+# CLIENTS
+# ============================================================
+def _timeout():
+    import httpx
+
+    return httpx.Timeout(settings.GROQ_TIMEOUT, connect=settings.GROQ_CONNECT_TIMEOUT)
+
+
+def _limits():
+    import httpx
+
+    return httpx.Limits(
+        max_connections=settings.GROQ_MAX_CONNECTIONS,
+        max_keepalive_connections=settings.GROQ_MAX_CONNECTIONS,
+    )
+
+
+def _client_options():
+    return {
+        "api_key": settings.GROQ_API_KEY,
+        "base_url": settings.GROQ_BASE_URL or None,
+        "timeout": _timeout(),
+        "max_retries": 0,
+    }
+
+
+def build_client():
+    import httpx
+    from groq import Groq
+
+    return Groq(
+        http_client=httpx.Client(limits=_limits(), timeout=_timeout()),
+        **_client_options(),
+    )
+
+
+providers.register("groq", build_client)
+
+
+def get_client():
+    """The worker's shared sync Groq client, built on first use."""
+    return providers.get("groq")
+
+# httpx.AsyncClient is bound to the event loop it first ran on. Under ASGI
+# there is one loop per worker, so in practice this holds a single pool;
+# async views served from WSGI get a fresh loop per request and their own.
+_async_clients = weakref.WeakKeyDictionary()
+
+
+def get_async_client():
+    loop = asyncio.get_running_loop()
+    client = _async_clients.get(loop)
+    if client is None:
+        import httpx
+        from groq import AsyncGroq
+
+        client = AsyncGroq(
+            http_client=httpx.AsyncClient(limits=_limits(), timeout=_timeout()),
+            **_client_options(),
+        )
+        _async_clients[loop] = client
+    return client
+
+
+# ============================================================
+# BREAKERS
+# ============================================================
+_breakers = {}
+_breakers_lock = threading.Lock()
+
+
+def get_breaker(model):
+    breaker = _breakers.get(model)
+    if breaker is None:
+        with _breakers_lock:
+            breaker = _breakers.get(model)
+            if breaker is None:
+                options = get_options()
+                breaker = CircuitBreaker(model, options["BREAKER_THRESHOLD"], options["BREAKER_RESET"])
+                _breakers[model] = breaker
+    return breaker
+
+
+def breaker_stats():
+    return [breaker.stats() for breaker in list(_breakers.values())]
+
+
+LLM_CALLS = metrics.REGISTRY.register(metrics.Counter(
+    "llm_calls_total", "Groq completion attempts by model and outcome.", ("model", "outcome"),
+))
+
+
+@metrics.REGISTRY.collector
+def _breaker_metrics():
+    state = metrics.Gauge("llm_circuit_state", "0 closed, 1 half-open, 2 open.", ("model",))
+    rejected = metrics.Gauge("llm_circuit_rejected", "Calls refused by an open breaker.", ("model",))
+    codes = {CircuitBreaker.CLOSED: 0, CircuitBreaker.HALF_OPEN: 1, CircuitBreaker.OPEN: 2}
+    for stats in breaker_stats():
+        state.set(codes[stats["state"]], model=stats["name"])
+        rejected.set(stats["rejected"], model=stats["name"])
+    return [state, rejected]
+
+
+def _record_error(breaker, exc):
+    """
+    Settle the breaker for a call that gave up on ``exc``; once per call, not
+    per attempt. Only timeouts, dropped connections, 429 and 5xx count as
+    failures. Any other error is still an answer from Groq (a bad request,
+    say), so it closes the breaker like a success.
+    """
+    if is_retryable(exc):
+        breaker.record_failure()
+    else:
+        breaker.record_success()
+
+
+def _retry_delay(exc, attempt, breaker, deadline, options):
+    """Seconds to sleep before the next attempt, or None to give up and re-raise."""
+    LLM_CALLS.inc(model=breaker.name, outcome=type(exc).__name__)
+    if not is_retryable(exc) or attempt > options["RETRIES"]:
+        return None
+    delay = backoff(attempt, options["BACKOFF_BASE"], options["BACKOFF_MAX"])
+    if delay >= deadline.remaining() or not breaker.allow():
+        return None
+    return delay
+
+
+# ============================================================
+# COMPLETIONS
+# ============================================================
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor():
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=settings.GROQ_MAX_CONNECTIONS, thread_name_prefix="llm-hedge",
+                )
+    return _executor
+
+
+def _complete_with(model, user_message, context, deadline, options):
+    """One model, retried within ``deadline``. The caller has already passed ``breaker.allow()``."""
+    breaker = get_breaker(model)
+    attempt = 0
+    while True:
+        attempt += 1
+        if deadline.expired:
+            breaker.record_failure()
+            raise DeadlineExceeded(f"{model}: no answer within the deadline")
+        try:
+            completion = get_client().chat.completions.create(
+                model=model,
+                messages=build_messages(user_message, context),
+                timeout=deadline.remaining(),
+                **COMPLETION_OPTIONS,
+            )
+        except Exception as exc:
+            delay = _retry_delay(exc, attempt, breaker, deadline, options)
+            if delay is None:
+                _record_error(breaker, exc)
+                raise
+            time.sleep(delay)
+            continue
+        breaker.record_success()
+        LLM_CALLS.inc(model=model, outcome="ok")
+        return completion.choices[0].message.content
+
+
+def _hedged(primary, hedge, user_message, context, deadline, options):
+    executor = _get_executor()
+    pending = {executor.submit(_complete_with, primary, user_message, context, deadline, options)}
+    done, pending = wait(pending, timeout=min(options["HEDGE_DELAY"], deadline.remaining()))
+    error = None
+    for future in done:
+        if future.exception() is None:
+            return future.result()
+        error = future.exception()
+
+    # The primary is slow or has failed: ask the hedge model too.
+    if get_breaker(hedge).allow():
+        pending.add(executor.submit(_complete_with, hedge, user_message, context, deadline, options))
+    while pending:
+        done, pending = wait(pending, timeout=deadline.remaining(), return_when=FIRST_COMPLETED)
+        if not done:
+            raise DeadlineExceeded("no model answered within the deadline")
+        for future in done:
+            if future.exception() is None:
+                return future.result()
+            error = future.exception()
+    raise error
+
+
+def complete(user_message, context=()):
+    options = get_options()
+    deadline = Deadline(options["DEADLINE"])
+    hedge = options["HEDGE_MODEL"]
+
+    if get_breaker(CHAT_MODEL).allow():
+        if not hedge or options["HEDGE_DELAY"] is None:
+            return _complete_with(CHAT_MODEL, user_message, context, deadline, options)
+        return _hedged(CHAT_MODEL, hedge, user_message, context, deadline, options)
+    # CHAT_MODEL's breaker is open: go straight to the hedge model.
+    if hedge and get_breaker(hedge).allow():
+        return _complete_with(hedge, user_message, context, deadline, options)
+    raise CircuitOpenError("all chat models are unavailable")
+
+
+async def _open_stream(model, user_message, context, options):
+    breaker = get_breaker(model)
+    deadline = Deadline(options["DEADLINE"])
+    attempt = 0
+    while True:
+        attempt += 1
+        try:
+            stream = await get_async_client().chat.completions.create(
+                model=model,
+                messages=build_messages(user_message, context),
+                stream=True,
+                timeout=deadline.remaining(),
+                **COMPLETION_OPTIONS,
+            )
+        except Exception as exc:
+            delay = _retry_delay(exc, attempt, breaker, deadline, options)
+            if delay is None:
+                _record_error(breaker, exc)
+                raise
+            await asyncio.sleep(delay)
+            continue
+        breaker.record_success()
+        LLM_CALLS.inc(model=model, outcome="ok")
+        return stream
+
+
+async def stream_completion(user_message, context=()):
+    """Yield the reply to ``user_message`` piece by piece as Groq produces it."""
+    options = get_options()
+    hedge = options["HEDGE_MODEL"]
+    if get_breaker(CHAT_MODEL).allow():
+        model = CHAT_MODEL
+    elif hedge and get_breaker(hedge).allow():
+        model = hedge
+    else:
+        raise CircuitOpenError("all chat models are unavailable")
+
+    # Tokens go to the client as they arrive, so a stream is never hedged;
+    # retries only happen before the first token.
+    stream = await _open_stream(model, user_message, context, options)
+    try:
+        async for chunk in stream:
+            if not chunk.choices:
+                continue
+            token = chunk.choices[0].delta.content
+            if token:
+                yield token
+    except Exception as exc:
+        if is_retryable(exc):
+            get_breaker(model).record_failure()
+        raise
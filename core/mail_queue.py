@@ -0,0 +1,206 @@
+"""
+Database-backed outgoing mail queue.
+
+Views call :func:`enqueue` inside their transaction, so an email exists if and
+only if the row that triggered it was committed, and the response never waits
+on SMTP. :func:`process_queue` claims due rows, sends them over one SMTP
+connection and reschedules failures with jittered exponential backoff.
+
+Rows are sent either by a daemon thread in the web worker
+(``EMAIL_QUEUE["WORKER"] = "thread"``) or by ``manage.py process_email_queue
+--loop`` running as its own process (``"command"``). The thread starts with
+the first request each web worker handles, so rows left pending, backing off
+or mid-lease by a restart are picked up without waiting for a new email.
+"""
+
+import logging
+import random
+import threading
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.core.signals import request_started
+from django.db import close_old_connections, connection, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import QueuedEmail
+
+logger = logging.getLogger(__name__)
+
+DEFAULTS = {
+    "WORKER": "thread",
+    "BATCH_SIZE": 50,
+    "MAX_ATTEMPTS": 6,
+    "BACKOFF_BASE": 30,
+    "BACKOFF_MAX": 60 * 60,
+    "LEASE": 5 * 60,
+    "POLL_INTERVAL": 30,
+}
+
+
+def get_options():
+    return {**DEFAULTS, **getattr(settings, "EMAIL_QUEUE", {})}
+
+
+def enqueue(messages):
+    """Queue ``(to, subject, body)`` tuples with one INSERT; sent after commit."""
+    now = timezone.now()
+    rows = QueuedEmail.objects.bulk_create([
+        QueuedEmail(to=to, subject=subject, body=body, available_at=now)
+        for to, subject, body in messages
+    ])
+    transaction.on_commit(kick)
+    return rows
+
+
+def backoff(attempts, options=None):
+    """Delay before retry ``attempts``: a capped exponential with equal jitter."""
+    options = options or get_options()
+    ceiling = min(options["BACKOFF_MAX"], options["BACKOFF_BASE"] * 2 ** (attempts - 1))
+    return timedelta(seconds=random.uniform(ceiling / 2, ceiling))
+
+
+# ============================================================
+# SENDING
+# ============================================================
+def _candidates(due, batch_size):
+    """Primary keys of the oldest ``batch_size`` due rows, skipping rows locked by other workers."""
+    due = due.order_by("available_at")
+    if connection.features.has_select_for_update_skip_locked:
+        due = due.select_for_update(skip_locked=True)
+    return list(due.values_list("pk", flat=True)[:batch_size])
+
+
+def claim(batch_size, lease):
+    """
+    Mark up to ``batch_size`` due rows as sending, leased for ``lease`` seconds.
+
+    The UPDATE repeats the due condition (compare-and-set), so a row another
+    worker claimed after we selected it is left alone, with or without
+    row locks. Only the rows this call updated are returned: the ones now
+    carrying its lease expiry.
+    """
+    now = timezone.now()
+    leased_until = now + timedelta(seconds=lease)
+    due = QueuedEmail.objects.filter(
+        Q(status=QueuedEmail.PENDING) | Q(status=QueuedEmail.SENDING), available_at__lte=now,
+    )
+    with transaction.atomic():
+        pks = _candidates(due, batch_size)
+        if not pks or not due.filter(pk__in=pks).update(status=QueuedEmail.SENDING, available_at=leased_until):
+            return []
+        return list(QueuedEmail.objects.filter(
+            pk__in=pks, status=QueuedEmail.SENDING, available_at=leased_until,
+        ).order_by("pk"))
+
+
+def _fail(row, error, options):
+    row.attempts += 1
+    row.last_error = str(error)[:1000]
+    if row.attempts >= options["MAX_ATTEMPTS"]:
+        row.status = QueuedEmail.FAILED
+        logger.error("Giving up on email %s to %s: %s", row.pk, row.to, error)
+    else:
+        row.status = QueuedEmail.PENDING
+        row.available_at = timezone.now() + backoff(row.attempts, options)
+
+
+def send_batch(rows, options=None):
+    """Send ``rows`` over a single connection; returns the number sent."""
+    options = options or get_options()
+    messages = [
+        EmailMessage(row.subject, row.body, settings.DEFAULT_FROM_EMAIL, row.to.split(","))
+        for row in rows
+    ]
+    sent = 0
+    smtp = get_connection(fail_silently=False)
+    try:
+        smtp.open()
+    except Exception as e:
+        # Could not reach the server at all: every row waits for the next attempt.
+        for row in rows:
+            _fail(row, e, options)
+    else:
+        try:
+            for row, message in zip(rows, messages):
+                try:
+                    smtp.send_messages([message])
+                except Exception as e:
+                    _fail(row, e, options)
+                else:
+                    row.status = QueuedEmail.SENT
+                    row.sent_at = timezone.now()
+                    sent += 1
+        finally:
+            smtp.close()
+
+    QueuedEmail.objects.bulk_update(
+        rows, ["status", "attempts", "available_at", "last_error", "sent_at"],
+    )
+    return sent
+
+
+def process_queue(options=None):
+    """Drain everything currently due; returns the number of emails sent."""
+    options = options or get_options()
+    sent = 0
+    while True:
+        rows = claim(options["BATCH_SIZE"], options["LEASE"])
+        if not rows:
+            return sent
+        sent += send_batch(rows, options)
+
+
+# ============================================================
+# IN-PROCESS WORKER
+# ============================================================
+_wakeup = threading.Event()
+_worker = None
+_worker_lock = threading.Lock()
+
+
+def _run_worker(poll_interval):
+    while True:
+        _wakeup.wait(poll_interval)
+        _wakeup.clear()
+        try:
+            process_queue()
+        except Exception:
+            logger.exception("Email queue worker failed")
+        finally:
+            close_old_connections()
+
+
+def kick():
+    """Wake the in-process worker, starting it on first use."""
+    global _worker
+    options = get_options()
+    if options["WORKER"] != "thread":
+        return
+    if _worker is None:
+        with _worker_lock:
+            if _worker is None:
+                _worker = threading.Thread(
+                    target=_run_worker, args=(options["POLL_INTERVAL"],),
+                    name="email-queue", daemon=True,
+                )
+                _worker.start()
+    _wakeup.set()
+
+
+def _start_on_first_request(**kwargs):
+    request_started.disconnect(dispatch_uid="mail_queue.start")
+    kick()
+
+
+def connect():
+    """
+    Start the worker with the web worker's first request (from
+    ``CoreConfig.ready``). Not from ``ready()`` itself: that also runs for
+    ``migrate`` and other commands, and under ``gunicorn --preload`` only in
+    the master process.
+    """
+    if get_options()["WORKER"] == "thread":
+        request_started.connect(_start_on_first_request, dispatch_uid="mail_queue.start")
@@ -0,0 +1,46 @@
+import gzip
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from core import exports
+
+
+class Command(BaseCommand):
+    help = "Archive (optional, NDJSON) and delete old rows in bounded chunks."
+
+    def add_arguments(self, parser):
+        parser.add_argument("table", choices=sorted(exports.EXPORTS))
+        parser.add_argument("--older-than-days", type=int, required=True)
+        parser.add_argument("--archive", help="Append deleted rows to this .ndjson or .ndjson.gz file first.")
+        parser.add_argument("--chunk-size", type=int, default=1000)
+        parser.add_argument("--only-read", action="store_true",
+                            help="Contact messages only: skip unread messages.")
+        parser.add_argument("--dry-run", action="store_true", help="Only report how many rows match.")
+
+    def handle(self, *args, **options):
+        model, _, date_field = exports.EXPORTS[options["table"]]
+        cutoff = timezone.now() - timedelta(days=options["older_than_days"])
+        queryset = model.objects.filter(**{f"{date_field}__lt": cutoff})
+        if options["only_read"] and options["table"] == "contacts":
+            queryset = queryset.filter(read=True)
+
+        total = queryset.count()
+        self.stdout.write(f"{total} {options['table']} older than {cutoff:%Y-%m-%d}")
+        if options["dry_run"] or not total:
+            return
+
+        def progress(done):
+            self.stdout.write(f"  deleted {done}/{total} ({done * 100 // total}%)")
+
+        archive = None
+        if options["archive"]:
+            opener = gzip.open if options["archive"].endswith(".gz") else open
+            archive = opener(options["archive"], "at", encoding="utf-8")
+        try:
+            deleted = exports.archive_and_delete(queryset, options["chunk_size"], archive, progress)
+        finally:
+            if archive is not None:
+                archive.close()
+        self.stdout.write(self.style.SUCCESS(f"Deleted {deleted} {options['table']}"))
@@ -0,0 +1,96 @@
+import base64
+import io
+import json
+
+from PIL import Image
+
+from django.core.management.base import BaseCommand
+from django.test import RequestFactory, override_settings
+
+from core import views
+from core.bench import make_image, peak_memory, peak_rss_growth, summarize, timed
+
+SIZES = {
+    "vga": (640, 480),
+    "hd": (1280, 720),
+    "fullhd": (1920, 1080),
+    "12mp": (4000, 3000),
+}
+
+
+def legacy_data_url_decode(request):
+    """The pre-streaming camera_ai_api image path, kept for comparison."""
+    image_data = request.POST.get("image")
+    header, base64_data = image_data.split(",", 1)
+    image_bytes = base64.b64decode(base64_data, validate=True)
+    Image.open(io.BytesIO(image_bytes)).convert("RGB")
+
+
+class Command(BaseCommand):
+    help = "Compare memory and latency of the camera upload paths."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--sizes", default="vga,fullhd,12mp",
+                            help=f"Comma-separated from: {', '.join(SIZES)}")
+        parser.add_argument("--iterations", type=int, default=20)
+        parser.add_argument("--json", action="store_true", help="Print results as JSON.")
+
+    def handle(self, *args, **options):
+        # Lift Django's form-body cap so the data-URL paths can be measured
+        # at every size; the camera API enforces its own limit.
+        with override_settings(DATA_UPLOAD_MAX_MEMORY_SIZE=None):
+            results = [
+                row
+                for name in options["sizes"].split(",")
+                for row in self._measure(name, options["iterations"])
+            ]
+
+        if options["json"]:
+            self.stdout.write(json.dumps(results, indent=2))
+            return
+
+        self.stdout.write(
+            f"{'size':<8}{'path':<18}{'image KB':>10}{'p50 ms':>10}{'p99 ms':>10}"
+            f"{'py peak KB':>12}{'rss +KB':>10}"
+        )
+        for row in results:
+            self.stdout.write(
+                f"{row['size']:<8}{row['path']:<18}{row['image_bytes'] // 1024:>10}"
+                f"{row['p50_ms']:>10.2f}{row['p99_ms']:>10.2f}"
+                f"{row['python_peak_bytes'] // 1024:>12}{row['rss_growth_bytes'] // 1024:>10}"
+            )
+
+    def _measure(self, name, iterations):
+        factory = RequestFactory()
+        width, height = SIZES[name]
+        jpeg = make_image(width, height)
+        data_url = "data:image/jpeg;base64," + base64.b64encode(jpeg).decode()
+
+        paths = {
+            "legacy-data-url": (
+                legacy_data_url_decode,
+                lambda: factory.post("/api/camera-detect/", {"image": data_url, "item": "phone"}),
+            ),
+            "data-url": (
+                views.camera_ai_api,
+                lambda: factory.post("/api/camera-detect/", {"image": data_url, "item": "phone"}),
+            ),
+            "multipart": (
+                views.camera_ai_api,
+                lambda: factory.post("/api/camera-detect/", {"image": io.BytesIO(jpeg), "item": "phone"}),
+            ),
+            "raw-body": (
+                views.camera_ai_api,
+                lambda: factory.post("/api/camera-detect/?item=phone", jpeg, content_type="image/jpeg"),
+            ),
+        }
+
+        for path, (fn, setup) in paths.items():
+            yield {
+                "size": name,
+                "image_bytes": len(jpeg),
+                "path": path,
+                **summarize(timed(fn, iterations, setup)),
+                "python_peak_bytes": peak_memory(fn, setup),
+                "rss_growth_bytes": peak_rss_growth(fn, setup),
+            }
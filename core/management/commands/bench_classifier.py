@@ -0,0 +1,99 @@
+import json
+import random
+import time
+
+from django.core.management.base import BaseCommand
+
+from core import classifier
+from core.views import EWASTE_ITEMS
+
+LEGACY_EXTRA_KEYWORDS = [
+    "mobile", "smartphone", "wire", "usb", "airpods",
+    "gadget", "device", "electronic", "tech",
+]
+
+# Includes words that only contain a keyword: technique, remotely, phonetic, cablecar.
+FILLER = (
+    "a photo of an old broken on the wooden table near window with "
+    "blanket kitchen sofa plant shoe bottle book lamp "
+    "technique remotely phonetic cablecar"
+).split()
+
+
+def legacy_is_ewaste(caption):
+    """The original per-request keyword rebuild and substring scan."""
+    ewaste_keywords = list(EWASTE_ITEMS.keys()) + LEGACY_EXTRA_KEYWORDS
+    return any(k in caption for k in ewaste_keywords)
+
+
+def legacy_scan_factory():
+    """The legacy substring scan extended to every synonym in the category table."""
+    keywords = [
+        synonym.lower()
+        for spec in classifier.CLASSIFIER.categories.values()
+        for synonym in spec["synonyms"]
+    ]
+    return lambda caption: any(k in caption for k in keywords)
+
+
+def make_captions(n, seed=0):
+    rng = random.Random(seed)
+    vocabulary = [
+        synonym
+        for spec in classifier.CLASSIFIER.categories.values()
+        for synonym in spec["synonyms"]
+    ]
+    captions = []
+    for _ in range(n):
+        words = rng.choices(FILLER, k=rng.randint(4, 12))
+        if rng.random() < 0.5:
+            words.insert(rng.randrange(len(words) + 1), rng.choice(vocabulary))
+        captions.append(" ".join(words))
+    return captions
+
+
+class Command(BaseCommand):
+    help = "Microbenchmark the compiled keyword classifier against the legacy substring scan."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--captions", type=int, default=100_000)
+        parser.add_argument("--json", action="store_true", help="Print results as JSON.")
+
+    def handle(self, *args, **options):
+        captions = make_captions(options["captions"])
+
+        start = time.perf_counter()
+        legacy = [legacy_is_ewaste(c) for c in captions]
+        legacy_s = time.perf_counter() - start
+
+        legacy_full_table = legacy_scan_factory()
+        start = time.perf_counter()
+        for c in captions:
+            legacy_full_table(c)
+        legacy_full_s = time.perf_counter() - start
+
+        start = time.perf_counter()
+        compiled = classifier.classify_many(captions)
+        compiled_s = time.perf_counter() - start
+
+        # Mostly substring hits the word-bounded classifier rejects, e.g. "tech" in "technique".
+        disagreements = sum(1 for old, new in zip(legacy, compiled) if old != (new is not None))
+
+        n = len(captions)
+        results = {
+            "captions": n,
+            "table_version": classifier.CLASSIFIER.version,
+            "legacy_us_per_caption": round(legacy_s / n * 1e6, 3),
+            "legacy_full_table_us_per_caption": round(legacy_full_s / n * 1e6, 3),
+            "compiled_us_per_caption": round(compiled_s / n * 1e6, 3),
+            "speedup_vs_full_table_scan": round(legacy_full_s / compiled_s, 2) if compiled_s else None,
+            "legacy_positive": sum(legacy),
+            "compiled_positive": sum(1 for c in compiled if c is not None),
+            "disagreements": disagreements,
+        }
+
+        if options["json"]:
+            self.stdout.write(json.dumps(results, indent=2))
+            return
+        for key, value in results.items():
+            self.stdout.write(f"{key:>32}: {value}")
@@ -0,0 +1,93 @@
+import json
+
+from django.core.management.base import BaseCommand
+from django.test.utils import override_settings
+from groq import Groq
+
+from core import conversations, llm, providers
+from core.bench import summarize, timed
+from core.fake_groq import FakeGroqServer, estimate_prompt_tokens
+
+REPLY = (
+    "Most local recyclers accept that. Remove the battery first and tape its terminals, "
+    "then wipe any personal data and bring the device with its charger and cables. "
+    "Large appliances can be collected from your door if you book a pickup; smaller "
+    "items can go in the drop-off bins at any of our partner stores. Ask for a "
+    "recycling certificate if you need one for your records."
+)
+
+QUESTIONS = (
+    "How do I recycle an old laptop?",
+    "What about the battery inside it?",
+    "Do I need to wipe the hard drive first?",
+    "Can you collect a fridge from my flat?",
+    "Is there a fee for the pickup?",
+    "What happens to the metals you recover?",
+    "Do you take broken phone chargers?",
+    "And CRT televisions?",
+    "How long does a pickup usually take to schedule?",
+    "Can I get a certificate for my company?",
+    "What counts as e-waste exactly?",
+    "Where is the nearest drop-off bin?",
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Run a scripted multi-turn chatbot conversation against an in-process fake Groq API "
+        "and compare prompt tokens and latency per turn with and without compaction."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--turns", type=int, default=24)
+        parser.add_argument("--prompt-token-delay", type=float, default=0.0002,
+                            help="Simulated prefill seconds per prompt token.")
+        parser.add_argument("--latency", type=float, default=0.02, help="Fake API base latency.")
+        parser.add_argument("--json", action="store_true", help="Print results as JSON.")
+
+    def handle(self, *args, **options):
+        server = FakeGroqServer(
+            reply=REPLY, latency=options["latency"], prompt_token_delay=options["prompt_token_delay"],
+        ).start()
+        client = Groq(api_key="bench", base_url=server.base_url, max_retries=0)
+        results = {}
+        try:
+            with providers.override("groq", client), override_settings(
+                GROQ_API_KEY="bench", GROQ_BASE_URL=server.base_url,
+            ):
+                for label, compact in (("verbatim", False), ("compacted", True)):
+                    results[label] = self._run(server, options["turns"], compact)
+        finally:
+            server.stop()
+
+        if options["json"]:
+            self.stdout.write(json.dumps(results, indent=2))
+            return
+        self.stdout.write(f"{options['turns']} turns, {options['prompt_token_delay'] * 1000:.2f} ms per prompt token")
+        self.stdout.write(f"{'':>10}{'total tokens':>14}{'last turn':>11}{'max turn':>10}{'p50 ms':>9}{'p99 ms':>9}")
+        for label, r in results.items():
+            self.stdout.write(
+                f"{label:>10}{r['prompt_tokens_total']:>14}{r['prompt_tokens_last']:>11}"
+                f"{r['prompt_tokens_max']:>10}{r['latency']['p50_ms']:>9.1f}{r['latency']['p99_ms']:>9.1f}"
+            )
+
+    def _run(self, server, turns, compact):
+        store = conversations.ConversationStore({**conversations.get_options(), "BACKEND": "locmem", "COMPACT": compact})
+        conversation = store.load(None)
+        sent_from = len(server.requests)
+        latencies = []
+        for turn in range(turns):
+            question = QUESTIONS[turn % len(QUESTIONS)]
+            context = conversation.context()
+            latencies += timed(lambda: llm.complete(question, context), 1)
+            store.record(conversation, question, REPLY)
+        sent = [estimate_prompt_tokens(p["messages"]) for p in server.requests[sent_from:]]
+        return {
+            "compact": compact,
+            "prompt_tokens_total": sum(sent),
+            "prompt_tokens_last": sent[-1],
+            "prompt_tokens_max": max(sent),
+            "summary_lines": len(conversation.summary),
+            "verbatim_turns": len(conversation.turns),
+            "latency": summarize(latencies),
+        }
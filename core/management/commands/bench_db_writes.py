@@ -0,0 +1,139 @@
+import json
+import shutil
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.db import DEFAULT_DB_ALIAS, OperationalError, connections, transaction
+
+from core.bench import summarize
+from core.models import ContactMessage, PickupRequest, QueuedEmail
+from ewaste_backend.database import database_config
+
+ALIAS = "bench"
+
+
+def register(config):
+    connections.settings[ALIAS] = connections.configure_settings({DEFAULT_DB_ALIAS: config})[DEFAULT_DB_ALIAS]
+
+
+def write_pickup(i):
+    # Same shape as the reqs view: one pickup and its queued emails in a transaction.
+    with transaction.atomic(using=ALIAS):
+        pickup = PickupRequest.objects.using(ALIAS).create(
+            name=f"Customer {i}", email=f"c{i}@example.com", phone="9876543210", address="12 MG Road",
+        )
+        QueuedEmail.objects.using(ALIAS).bulk_create([
+            QueuedEmail(to=pickup.email, subject="Pickup", body="Thanks", available_at=pickup.created_at),
+            QueuedEmail(to="admin@example.com", subject="Pickup", body="New", available_at=pickup.created_at),
+        ])
+
+
+def write_contact(i):
+    ContactMessage.objects.using(ALIAS).create(
+        name=f"Visitor {i}", email=f"v{i}@example.com", subject="Hello", message="Do you take CRTs?",
+    )
+
+
+class Command(BaseCommand):
+    help = "Concurrent pickup/contact writes against SQLite (rollback journal vs WAL) or DATABASE_URL."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--threads", type=int, default=16)
+        parser.add_argument("--writes", type=int, default=100, help="Writes per thread.")
+        parser.add_argument("--readers", type=int, default=2, help="Threads listing pickups meanwhile.")
+        parser.add_argument("--url", help="Benchmark this database URL instead of temporary SQLite files.")
+        parser.add_argument("--json", action="store_true", help="Print results as JSON.")
+
+    def handle(self, *args, **options):
+        if options["url"]:
+            configs = {"url": database_config(options["url"])}
+        else:
+            self.tmpdir = Path(tempfile.mkdtemp())
+            legacy = database_config(f"sqlite:///{self.tmpdir / 'legacy.sqlite3'}")
+            legacy["OPTIONS"] = {}  # Django defaults: rollback journal, deferred transactions
+            configs = {
+                "sqlite-legacy": legacy,
+                "sqlite-wal": database_config(f"sqlite:///{self.tmpdir / 'wal.sqlite3'}"),
+            }
+
+        try:
+            results = [self._run(name, config, options) for name, config in configs.items()]
+        finally:
+            if not options["url"]:
+                shutil.rmtree(self.tmpdir, ignore_errors=True)
+
+        if options["json"]:
+            self.stdout.write(json.dumps(results, indent=2))
+            return
+        self.stdout.write(
+            f"{'database':<16}{'writes/s':>10}{'errors':>8}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'reads/s':>10}"
+        )
+        for row in results:
+            self.stdout.write(
+                f"{row['database']:<16}{row['writes_per_s']:>10.0f}{row['errors']:>8}"
+                f"{row['p50_ms']:>10.1f}{row['p95_ms']:>10.1f}{row['p99_ms']:>10.1f}{row['reads_per_s']:>10.0f}"
+            )
+
+    def _run(self, name, config, options):
+        register(config)
+        call_command("migrate", database=ALIAS, verbosity=0)
+
+        latencies, errors, reads = [], [0], [0]
+        lock = threading.Lock()
+        stop = threading.Event()
+
+        def writer(offset):
+            local = []
+            try:
+                for i in range(offset, offset + options["writes"]):
+                    start = time.perf_counter()
+                    try:
+                        (write_pickup if i % 2 else write_contact)(i)
+                    except OperationalError:
+                        with lock:
+                            errors[0] += 1
+                        continue
+                    local.append(time.perf_counter() - start)
+            finally:
+                connections[ALIAS].close()
+            with lock:
+                latencies.extend(local)
+
+        def reader():
+            count = 0
+            try:
+                while not stop.is_set():
+                    list(PickupRequest.objects.using(ALIAS).order_by("-created_at", "-id")[:50])
+                    count += 1
+            finally:
+                connections[ALIAS].close()
+            with lock:
+                reads[0] += count
+
+        writers = [threading.Thread(target=writer, args=(t * options["writes"],)) for t in range(options["threads"])]
+        readers = [threading.Thread(target=reader) for _ in range(options["readers"])]
+        start = time.perf_counter()
+        for thread in readers + writers:
+            thread.start()
+        for thread in writers:
+            thread.join()
+        elapsed = time.perf_counter() - start
+        stop.set()
+        for thread in readers:
+            thread.join()
+
+        connections[ALIAS].close()
+        # Drop the alias so the next database gets a fresh connection wrapper.
+        del connections[ALIAS]
+        del connections.settings[ALIAS]
+        return {
+            "database": name,
+            "writes_per_s": len(latencies) / elapsed,
+            "errors": errors[0],
+            "reads_per_s": reads[0] / elapsed,
+            **summarize(latencies),
+        }
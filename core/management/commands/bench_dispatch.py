@@ -0,0 +1,143 @@
+import json
+import math
+import random
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.utils import timezone
+
+from core import dispatch, geo
+from core.bench import summarize, timed
+from core.management.commands.bench_search import AREAS, FIRST, LAST, STREETS
+from core.models import PickupRequest
+
+RADII_KM = (1, 3, 10)
+
+
+def seed(rows, batch=20_000, seed=0, spread_km=1.5):
+    """
+    Insert ``rows`` pending pickups with a PIN code in each address, placed
+    around the PIN's centroid (a street-level geocoder's spread, so stops in
+    one PIN are not all on the same point).
+    """
+    rng = random.Random(seed)
+    pins = sorted(geo.PINCODES.items())
+    spread = math.degrees(spread_km / geo.EARTH_RADIUS_KM)
+    table = PickupRequest._meta.db_table
+    sql = (
+        f"INSERT INTO {table} (name, email, phone, address, created_at, status, pincode, latitude, longitude, geohash) "
+        "VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s)"
+    )
+    start = timezone.now() - timedelta(seconds=rows)
+    with connection.cursor() as cursor:
+        for offset in range(0, rows, batch):
+            params = []
+            for i in range(offset, min(offset + batch, rows)):
+                first, last = rng.choice(FIRST), rng.choice(LAST)
+                pin, (lat, lon) = rng.choice(pins)
+                lat += rng.gauss(0, spread)
+                lon += rng.gauss(0, spread)
+                params.append((
+                    f"{first.title()} {last.title()}",
+                    f"{first}.{last}{rng.randrange(1000)}@example.com",
+                    f"9{rng.randrange(10 ** 9):09d}",
+                    f"{rng.randrange(1, 400)} {rng.choice(STREETS).title()}, "
+                    f"{rng.choice(AREAS).title()}, Hyderabad {pin}",
+                    start + timedelta(seconds=i),
+                    PickupRequest.PENDING, pin, lat, lon, geo.encode(lat, lon),
+                ))
+            cursor.executemany(sql, params)
+
+
+def full_scan(lat, lon, radius_km):
+    """What "within X km" costs without the index: every pending row, distance in Python."""
+    rows = PickupRequest.objects.filter(status=PickupRequest.PENDING).only("id", "latitude", "longitude")
+    found = [(geo.haversine_km(lat, lon, r.latitude, r.longitude), r) for r in rows.exclude(latitude=None)]
+    return sorted((item for item in found if item[0] <= radius_km), key=lambda item: item[0])
+
+
+class Command(BaseCommand):
+    help = (
+        "Seed a throwaway test database with synthetic pickups and measure PIN geocoding, "
+        "radius queries (geohash index vs full scan) and route planning for every row."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=100_000)
+        parser.add_argument("--capacity", type=int, default=40, help="Stops per vehicle when planning all rows.")
+        parser.add_argument("--iterations", type=int, default=5)
+        parser.add_argument("--json", action="store_true", help="Print results as JSON.")
+
+    def handle(self, *args, **options):
+        depot = tuple(dispatch.get_options()["DEPOT"])
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        try:
+            start = time.perf_counter()
+            seed(options["rows"])
+            seed_s = time.perf_counter() - start
+
+            addresses = list(PickupRequest.objects.values_list("address", flat=True))
+            start = time.perf_counter()
+            located = sum(geo.locate(address)[1] is not None for address in addresses)
+            geocode_s = time.perf_counter() - start
+
+            pending = PickupRequest.objects.filter(status=PickupRequest.PENDING).only(
+                "id", "latitude", "longitude", "geohash",
+            )
+            queries = []
+            for radius in RADII_KM:
+                matches = len(geo.nearby(pending, *depot, radius))
+                assert matches == len(full_scan(*depot, radius))
+                queries.append({
+                    "radius_km": radius,
+                    "matches": matches,
+                    "cells": len(geo.covering_cells(*depot, radius)),
+                    "geohash": summarize(timed(lambda: geo.nearby(pending, *depot, radius), options["iterations"])),
+                    "full_scan": summarize(timed(lambda: full_scan(*depot, radius), options["iterations"])),
+                })
+
+            stops = list(pending.values_list("id", "latitude", "longitude"))
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+
+        vehicles = math.ceil(len(stops) / options["capacity"])
+        start = time.perf_counter()
+        routes, unassigned = dispatch.plan(stops, depot, vehicles, options["capacity"])
+        plan_s = time.perf_counter() - start
+        km = sum(r.km for r in routes)
+        greedy_km = sum(r.nearest_neighbour_km for r in routes)
+        results = {
+            "rows": options["rows"],
+            "seed_s": round(seed_s, 2),
+            "geocode": {"addresses": len(addresses), "located": located,
+                        "per_second": round(len(addresses) / geocode_s)},
+            "radius_queries": queries,
+            "plan": {
+                "stops": len(stops), "vehicles": len(routes), "capacity": options["capacity"],
+                "unassigned": len(unassigned), "seconds": round(plan_s, 2),
+                "nearest_neighbour_km": round(greedy_km, 1), "two_opt_km": round(km, 1),
+                "saved_pct": round((greedy_km - km) / greedy_km * 100, 1) if greedy_km else 0.0,
+            },
+        }
+
+        if options["json"]:
+            self.stdout.write(json.dumps(results, indent=2))
+            return
+        geocode = results["geocode"]
+        self.stdout.write(f"seeded {options['rows']} pickups in {seed_s:.1f}s")
+        self.stdout.write(f"PIN geocoding: {geocode['located']}/{geocode['addresses']} located, "
+                          f"{geocode['per_second']} addresses/s")
+        self.stdout.write(f"\n{'radius km':>10}{'matches':>9}{'cells':>7}{'geohash p50':>13}{'full scan p50':>15}")
+        for q in queries:
+            self.stdout.write(
+                f"{q['radius_km']:>10}{q['matches']:>9}{q['cells']:>7}"
+                f"{q['geohash']['p50_ms']:>13.2f}{q['full_scan']['p50_ms']:>15.2f}"
+            )
+        p = results["plan"]
+        self.stdout.write(
+            f"\nplanned {p['stops']} stops on {p['vehicles']} vehicles (<= {p['capacity']} each) in {p['seconds']}s: "
+            f"{p['nearest_neighbour_km']} km nearest-neighbour -> {p['two_opt_km']} km with 2-opt "
+            f"({p['saved_pct']}% shorter)"
+        )
@@ -0,0 +1,55 @@
+import json
+import time
+
+from django.core.management.base import BaseCommand
+from django.test import Client, override_settings
+from django.urls import reverse
+
+from core import pages
+
+URLS = ["homepage", "services", "about", "team", "data_destruction", "refurbishment"]
+
+
+class Command(BaseCommand):
+    help = "Requests/sec for static pages: per-request render vs page cache vs 304."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=2000)
+        parser.add_argument("--json", action="store_true", help="Print results as JSON.")
+
+    @override_settings(ALLOWED_HOSTS=["testserver"])
+    def handle(self, *args, **options):
+        client = Client()
+        paths = [reverse(name) for name in URLS]
+        n = options["requests"]
+
+        with override_settings(PAGE_CACHE={"ENABLED": False}):
+            render_rps = self._rps(client, paths, n)
+
+        pages.get_cache().clear()
+        cached_rps = self._rps(client, paths, n)
+
+        etags = {path: client.get(path, secure=True)["ETag"] for path in paths}
+        not_modified_rps = self._rps(client, paths, n, etags)
+
+        results = {
+            "requests": n,
+            "render_rps": round(render_rps, 1),
+            "cached_rps": round(cached_rps, 1),
+            "not_modified_rps": round(not_modified_rps, 1),
+            "cached_speedup": round(cached_rps / render_rps, 2),
+        }
+        if options["json"]:
+            self.stdout.write(json.dumps(results, indent=2))
+            return
+        for key, value in results.items():
+            self.stdout.write(f"{key:<18}{value:>10}")
+
+    def _rps(self, client, paths, n, etags=None):
+        start = time.perf_counter()
+        for i in range(n):
+            path = paths[i % len(paths)]
+            headers = {"HTTP_IF_NONE_MATCH": etags[path]} if etags else {}
+            response = client.get(path, secure=True, **headers)
+            assert response.status_code in (200, 304), response.status_code
+        return n / (time.perf_counter() - start)
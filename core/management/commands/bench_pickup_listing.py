@@ -0,0 +1,108 @@
+import json
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.db.models import Q
+from django.utils import timezone
+
+from core.bench import summarize, timed
+from core.models import PickupRequest
+from core.views import PICKUP_LIST_FIELDS
+
+PAGE_SIZE = 50
+
+
+def seed(rows, batch=20_000):
+    """Insert ``rows`` pickup requests, one per second going back in time."""
+    table = PickupRequest._meta.db_table
+    sql = (
+        f"INSERT INTO {table} (name, email, phone, address, created_at) "
+        "VALUES (%s, %s, %s, %s, %s)"
+    )
+    start = timezone.now() - timedelta(seconds=rows)
+    with connection.cursor() as cursor:
+        for offset in range(0, rows, batch):
+            cursor.executemany(sql, [
+                (
+                    f"Customer {i}", f"customer{i}@example.com", f"98{i:08d}",
+                    f"{i} Main Road, Hyderabad", start + timedelta(seconds=i // 2),
+                )
+                for i in range(offset, min(offset + batch, rows))
+            ])
+
+
+def keyset_filter(qs, created_at, pk):
+    # Same predicate as KeysetPagination.paginate_queryset.
+    return qs.filter(created_at__lte=created_at).filter(Q(created_at__lt=created_at) | Q(pk__lt=pk))
+
+
+def offset_page(depth):
+    qs = PickupRequest.objects.order_by("-created_at", "-id")
+    return list(qs[depth:depth + PAGE_SIZE])
+
+
+def keyset_page(created_at, pk):
+    qs = PickupRequest.objects.only(*PICKUP_LIST_FIELDS).order_by("-created_at", "-id")
+    return list(keyset_filter(qs, created_at, pk)[:PAGE_SIZE])
+
+
+class Command(BaseCommand):
+    help = "Seed a throwaway test database and compare offset vs keyset pickup listing."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=1_000_000)
+        parser.add_argument("--iterations", type=int, default=20)
+        parser.add_argument("--json", action="store_true", help="Print results as JSON.")
+
+    def handle(self, *args, **options):
+        # Never touch the real database: build a fresh test DB with migrations applied.
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        try:
+            results = self._run(options["rows"], options["iterations"])
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+
+        if options["json"]:
+            self.stdout.write(json.dumps(results, indent=2))
+            return
+        self.stdout.write(f"seeded {results['rows']} rows in {results['seed_s']:.1f}s")
+        self.stdout.write(f"legacy full load: {results['legacy_full_load_ms']:.0f} ms")
+        self.stdout.write(f"{'depth':>10}{'offset p50':>12}{'keyset p50':>12}{'offset p99':>12}{'keyset p99':>12}")
+        for row in results["depths"]:
+            self.stdout.write(
+                f"{row['depth']:>10}{row['offset']['p50_ms']:>12.2f}{row['keyset']['p50_ms']:>12.2f}"
+                f"{row['offset']['p99_ms']:>12.2f}{row['keyset']['p99_ms']:>12.2f}"
+            )
+        self.stdout.write("keyset plan:\n  " + "\n  ".join(results["keyset_plan"]))
+
+    def _run(self, rows, iterations):
+        start = time.perf_counter()
+        seed(rows)
+        seed_s = time.perf_counter() - start
+
+        # What the listing page did before: every row, every column.
+        start = time.perf_counter()
+        list(PickupRequest.objects.all())
+        legacy_ms = (time.perf_counter() - start) * 1000
+
+        depths = []
+        for depth in sorted({0, rows // 100, rows // 2, rows - PAGE_SIZE}):
+            anchor = PickupRequest.objects.order_by("-created_at", "-id").values_list("created_at", "id")[depth]
+            depths.append({
+                "depth": depth,
+                "offset": summarize(timed(lambda: offset_page(depth), iterations)),
+                "keyset": summarize(timed(lambda: keyset_page(*anchor), iterations)),
+            })
+
+        created_at, pk = PickupRequest.objects.values_list("created_at", "id").first()
+        qs = PickupRequest.objects.only(*PICKUP_LIST_FIELDS).order_by("-created_at", "-id")
+        qs = keyset_filter(qs, created_at, pk)[:PAGE_SIZE]
+        return {
+            "rows": rows,
+            "seed_s": seed_s,
+            "legacy_full_load_ms": legacy_ms,
+            "depths": depths,
+            "keyset_plan": qs.explain().splitlines(),
+        }
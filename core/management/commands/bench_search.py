@@ -0,0 +1,103 @@
+import json
+import random
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.db.models import Q
+from django.utils import timezone
+
+from core import search
+from core.bench import summarize, timed
+from core.models import PickupRequest
+
+FIRST = ["asha", "ravi", "priya", "arjun", "meera", "vikram", "sneha", "kiran", "divya", "rahul",
+         "anita", "suresh", "lakshmi", "manoj", "pooja", "arun", "neha", "sanjay", "kavya", "deepak"]
+LAST = ["rao", "reddy", "sharma", "iyer", "naidu", "patel", "gupta", "menon", "das", "verma",
+        "kumar", "singh", "joshi", "pillai", "shetty", "bhat", "nair", "mehta", "varma", "chowdary"]
+AREAS = ["madhapur", "gachibowli", "kondapur", "banjara hills", "jubilee hills", "ameerpet",
+         "kukatpally", "secunderabad", "begumpet", "miyapur", "uppal", "tarnaka", "dilsukhnagar"]
+STREETS = ["main road", "cross road", "street", "colony", "nagar", "layout", "enclave"]
+
+# Rare, selective, very common and multi-word prefix queries.
+QUERIES = ["meera iyer", "kavya@exa", "98765", "hyderabad", "road", "gachi 12"]
+
+
+def seed(rows, batch=20_000, seed=0):
+    """Insert ``rows`` pickup requests with varied names and addresses."""
+    rng = random.Random(seed)
+    table = PickupRequest._meta.db_table
+    sql = (
+        f"INSERT INTO {table} (name, email, phone, address, created_at, status, pincode, geohash) "
+        "VALUES (%s, %s, %s, %s, %s, 'pending', '', '')"
+    )
+    start = timezone.now() - timedelta(seconds=rows)
+    with connection.cursor() as cursor:
+        for offset in range(0, rows, batch):
+            params = []
+            for i in range(offset, min(offset + batch, rows)):
+                first, last = rng.choice(FIRST), rng.choice(LAST)
+                params.append((
+                    f"{first.title()} {last.title()}",
+                    f"{first}.{last}{rng.randrange(1000)}@example.com",
+                    f"9{rng.randrange(10 ** 9):09d}",
+                    f"{rng.randrange(1, 400)} {rng.choice(STREETS).title()}, "
+                    f"{rng.choice(AREAS).title()}, Hyderabad {500000 + rng.randrange(100)}",
+                    start + timedelta(seconds=i),
+                ))
+            cursor.executemany(sql, params)
+
+
+def icontains(term):
+    """What the admin's search_fields did before: an icontains OR-chain per word."""
+    qs = PickupRequest.objects.all()
+    for word in term.split():
+        qs = qs.filter(
+            Q(name__icontains=word) | Q(email__icontains=word)
+            | Q(phone__icontains=word) | Q(address__icontains=word)
+        )
+    return list(qs.order_by("-created_at")[:100])
+
+
+def fulltext(term):
+    """What the admin does now: the newest 100 matches, ranked."""
+    return search.rank_page(search.search(PickupRequest.objects.all(), term).order_by("-created_at")[:100], term)
+
+
+class Command(BaseCommand):
+    help = "Seed a throwaway test database and compare icontains vs full-text admin search."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=1_000_000)
+        parser.add_argument("--iterations", type=int, default=10)
+        parser.add_argument("--json", action="store_true", help="Print results as JSON.")
+
+    def handle(self, *args, **options):
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        try:
+            start = time.perf_counter()
+            seed(options["rows"])
+            seed_s = time.perf_counter() - start
+            results = [
+                {
+                    "query": term,
+                    "matches": len(fulltext(term)),
+                    "icontains": summarize(timed(lambda: icontains(term), options["iterations"])),
+                    "fulltext": summarize(timed(lambda: fulltext(term), options["iterations"])),
+                }
+                for term in QUERIES
+            ]
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+
+        if options["json"]:
+            self.stdout.write(json.dumps({"rows": options["rows"], "results": results}, indent=2))
+            return
+        self.stdout.write(f"seeded {options['rows']} rows (with index triggers) in {seed_s:.1f}s")
+        self.stdout.write(f"{'query':<16}{'matches':>8}{'icontains p50':>15}{'fulltext p50':>14}{'fulltext p99':>14}")
+        for row in results:
+            self.stdout.write(
+                f"{row['query']:<16}{row['matches']:>8}{row['icontains']['p50_ms']:>15.2f}"
+                f"{row['fulltext']['p50_ms']:>14.2f}{row['fulltext']['p99_ms']:>14.2f}"
+            )
@@ -0,0 +1,299 @@
+import asyncio
+import json
+import platform
+import re
+import subprocess
+import time
+from urllib.parse import urlencode
+
+import httpx
+from groq import Groq
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client, override_settings
+
+from core import providers
+from core.bench import make_image, summarize
+from core.fake_groq import FakeGroqServer
+from core.management.commands.bench_search import QUERIES
+from core.management.commands.bench_search import seed as seed_pickups
+
+SCENARIOS = ("pages", "camera", "chatbot", "pickup", "admin_search")
+
+PAGES = ("/", "/about/", "/services/", "/team/", "/contact/")
+
+# name -> (format, width, height)
+CAMERA_PAYLOADS = {
+    "jpeg-320x240": ("JPEG", 320, 240),
+    "jpeg-1280x720": ("JPEG", 1280, 720),
+    "jpeg-3264x2448": ("JPEG", 3264, 2448),
+    "png-640x480": ("PNG", 640, 480),
+}
+
+FORM = "application/x-www-form-urlencoded"
+CSRF_INPUT = re.compile(r'name="csrfmiddlewaretoken" value="([^"]+)"')
+
+
+class Case:
+    """One benchmarked endpoint: ``request(i)`` -> (method, path, body, content type)."""
+
+    def __init__(self, name, request, expect=200, login=False, csrf_page=None):
+        self.name = name
+        self.request = request
+        self.expect = expect
+        self.login = login
+        self.csrf_page = csrf_page
+
+
+def _get(path):
+    return lambda i: ("GET", path, b"", None)
+
+
+def _form(path, fields):
+    return lambda i: ("POST", path, urlencode(fields(i)).encode(), FORM)
+
+
+def build_cases(scenarios):
+    cases = []
+    if "pages" in scenarios:
+        cases += [Case(f"pages:{path}", _get(path)) for path in PAGES]
+    if "camera" in scenarios:
+        for name, (format, width, height) in CAMERA_PAYLOADS.items():
+            body = make_image(width, height, format)
+            content_type = f"image/{format.lower()}"
+            cases.append(Case(
+                f"camera:{name}",
+                lambda i, body=body, content_type=content_type: (
+                    "POST", "/api/camera-detect/?item=laptop", body, content_type,
+                ),
+            ))
+    if "chatbot" in scenarios:
+        # Unique questions so the FAQ and the response cache can't answer them.
+        cases.append(Case("chatbot", _form(
+            "/api/chatbot/", lambda i: {"message": f"Is gadget {i} compatible with firmware {i * 7919}?"},
+        )))
+        cases.append(Case("chatbot:cached", _form(
+            "/api/chatbot/", lambda i: {"message": "Is gadget 0 compatible with firmware 0?"},
+        )))
+    if "pickup" in scenarios:
+        cases.append(Case("pickup", _form("/reqs/", lambda i: {
+            "name": f"Bench {i}", "email": f"bench{i}@example.com",
+            "phone": f"98{i % 10 ** 8:08d}", "address": f"{i} Bench Road, Hyderabad",
+        }), expect=302, csrf_page="/pickup/"))
+    if "admin_search" in scenarios:
+        cases.append(Case(
+            "admin_search",
+            lambda i: ("GET", "/admin/core/pickuprequest/?" + urlencode({"q": QUERIES[i % len(QUERIES)]}), b"", None),
+            login=True,
+        ))
+    return cases
+
+
+def _result(latencies, errors, elapsed):
+    return {
+        **summarize(latencies),
+        "errors": errors,
+        "rps": round(len(latencies) / elapsed, 1) if elapsed else 0.0,
+    }
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+class Command(BaseCommand):
+    help = (
+        "End-to-end benchmark of the real URLconf: static pages, camera uploads, the chatbot "
+        "(against a fake Groq), pickup submission and admin search. By default it runs in "
+        "process with the Django test client on a throwaway test database; with --url it "
+        "drives a running server over HTTP (start it with THROTTLE=False and GROQ_BASE_URL "
+        "pointing at `manage.py fake_groq`). Write results with --output and compare two "
+        "runs with --compare."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--only", action="append", choices=SCENARIOS,
+                            help="Run only these scenarios (repeatable).")
+        parser.add_argument("--iterations", type=int, default=200, help="Requests per case.")
+        parser.add_argument("--warmup", type=int, default=10, help="Unmeasured requests per case.")
+        parser.add_argument("--rows", type=int, default=20_000, help="Pickup rows seeded for admin search.")
+        parser.add_argument("--groq-latency", type=float, default=0.0,
+                            help="Seconds the in-process fake Groq waits before answering.")
+        parser.add_argument("--url", help="Benchmark a running server instead of the test client.")
+        parser.add_argument("--concurrency", type=int, default=8, help="Concurrent requests with --url.")
+        parser.add_argument("--admin-user", help="Staff login for admin_search with --url.")
+        parser.add_argument("--admin-password")
+        parser.add_argument("--output", help="Write the results JSON to this file.")
+        parser.add_argument("--compare", help="Baseline results JSON to compare against.")
+        parser.add_argument("--fail-over", type=float, default=None, metavar="PCT",
+                            help="With --compare, exit non-zero if any p95 is more than PCT%% slower.")
+        parser.add_argument("--json", action="store_true", help="Print results as JSON.")
+
+    def handle(self, *args, **options):
+        scenarios = options["only"] or SCENARIOS
+        cases = build_cases(scenarios)
+        if options["url"]:
+            if not options["admin_user"]:
+                cases = [case for case in cases if not case.login]
+            results = asyncio.run(self._run_http(cases, options))
+        else:
+            results = self._run_in_process(cases, options)
+
+        report = {
+            "meta": {
+                "commit": git_commit(),
+                "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+                "python": platform.python_version(),
+                "mode": "http" if options["url"] else "client",
+                "url": options["url"],
+                "iterations": options["iterations"],
+                "concurrency": options["concurrency"] if options["url"] else 1,
+            },
+            "results": results,
+        }
+        if options["output"]:
+            with open(options["output"], "w", encoding="utf-8") as fh:
+                json.dump(report, fh, indent=2)
+
+        if options["json"]:
+            self.stdout.write(json.dumps(report, indent=2))
+        else:
+            self._print_table(results)
+
+        if options["compare"]:
+            self._compare(results, options["compare"], options["fail_over"])
+
+    # ============================================================
+    # IN-PROCESS (TEST CLIENT)
+    # ============================================================
+    def _run_in_process(self, cases, options):
+        groq_server = FakeGroqServer(latency=options["groq_latency"]).start()
+        fake_client = Groq(api_key="bench", base_url=groq_server.base_url, max_retries=0)
+        # Never touch the real database: build a fresh test DB with migrations applied.
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        try:
+            with providers.override("groq", fake_client), override_settings(
+                ALLOWED_HOSTS=["testserver"],
+                THROTTLE={"ENABLED": False},
+                EMAIL_QUEUE={"WORKER": "command"},
+            ):
+                return self._run_cases(cases, options)
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            groq_server.stop()
+
+    def _run_cases(self, cases, options):
+        client = Client()
+        if any(case.login for case in cases):
+            seed_pickups(options["rows"])
+            client.force_login(User.objects.create_superuser("bench", "bench@example.com", "bench"))
+
+        results = {}
+        for case in cases:
+            def send(i):
+                method, path, body, content_type = case.request(i)
+                return client.generic(method, path, body, content_type or FORM, secure=True)
+
+            for i in range(options["warmup"]):
+                send(options["iterations"] + i)
+            latencies, errors = [], 0
+            started = time.perf_counter()
+            for i in range(options["iterations"]):
+                start = time.perf_counter()
+                response = send(i)
+                latencies.append(time.perf_counter() - start)
+                errors += response.status_code != case.expect
+            results[case.name] = _result(latencies, errors, time.perf_counter() - started)
+        return results
+
+    # ============================================================
+    # OVER HTTP
+    # ============================================================
+    async def _login(self, client, options):
+        page = await client.get("/admin/login/")
+        token = CSRF_INPUT.search(page.text)
+        response = await client.post("/admin/login/", data={
+            "username": options["admin_user"], "password": options["admin_password"],
+            "csrfmiddlewaretoken": token.group(1) if token else "", "next": "/admin/",
+        }, headers={"Referer": str(page.url)})
+        if "sessionid" not in client.cookies:
+            raise CommandError(f"admin login failed ({response.status_code})")
+
+    async def _run_http(self, cases, options):
+        limits = httpx.Limits(max_connections=options["concurrency"])
+        async with httpx.AsyncClient(base_url=options["url"], limits=limits, timeout=60) as client:
+            if any(case.login for case in cases):
+                await self._login(client, options)
+            results = {}
+            for case in cases:
+                results[case.name] = await self._run_http_case(client, case, options)
+            return results
+
+    async def _run_http_case(self, client, case, options):
+        headers = {}
+        if case.csrf_page:
+            page = await client.get(case.csrf_page)
+            token = CSRF_INPUT.search(page.text)
+            headers = {"X-CSRFToken": token.group(1) if token else "", "Referer": str(page.url)}
+
+        async def send(i):
+            method, path, body, content_type = case.request(i)
+            request_headers = {**headers, "Content-Type": content_type} if content_type else headers
+            return await client.request(method, path, content=body or None, headers=request_headers)
+
+        for i in range(options["warmup"]):
+            await send(options["iterations"] + i)
+
+        counter = iter(range(options["iterations"]))
+        latencies, errors = [], 0
+
+        async def worker():
+            nonlocal errors
+            for i in counter:
+                start = time.perf_counter()
+                try:
+                    response = await send(i)
+                except httpx.HTTPError:
+                    errors += 1
+                    continue
+                latencies.append(time.perf_counter() - start)
+                errors += response.status_code != case.expect
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(options["concurrency"])))
+        return _result(latencies, errors, time.perf_counter() - started)
+
+    # ============================================================
+    # REPORTING
+    # ============================================================
+    def _print_table(self, results):
+        self.stdout.write(f"{'case':<26}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'rps':>10}{'errors':>8}")
+        for name, row in results.items():
+            self.stdout.write(
+                f"{name:<26}{row['p50_ms']:>10.2f}{row['p95_ms']:>10.2f}{row['p99_ms']:>10.2f}"
+                f"{row['rps']:>10.1f}{row['errors']:>8}"
+            )
+
+    def _compare(self, results, path, fail_over):
+        with open(path, encoding="utf-8") as fh:
+            baseline = json.load(fh)
+        self.stdout.write(f"\nvs {path} (commit {baseline['meta'].get('commit')}):")
+        self.stdout.write(f"{'case':<26}{'p50 Δ%':>10}{'p95 Δ%':>10}{'rps Δ%':>10}")
+        regressions = []
+        for name, row in results.items():
+            base = baseline["results"].get(name)
+            if base is None:
+                continue
+            delta = lambda key: (row[key] - base[key]) / base[key] * 100 if base[key] else 0.0
+            self.stdout.write(f"{name:<26}{delta('p50_ms'):>+10.1f}{delta('p95_ms'):>+10.1f}{delta('rps'):>+10.1f}")
+            if fail_over is not None and delta("p95_ms") > fail_over:
+                regressions.append(name)
+        if regressions:
+            raise CommandError(f"p95 regressed more than {fail_over}% in: {', '.join(regressions)}")
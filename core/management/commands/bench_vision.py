@@ -0,0 +1,75 @@
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core import imaging, vision
+from core.bench import make_image, summarize
+
+
+class Command(BaseCommand):
+    help = "Measure local vision model latency and throughput, with and without micro-batching."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--backend", help="Override VISION['BACKEND'].")
+        parser.add_argument("--model", help="Override VISION['MODEL_PATH'].")
+        parser.add_argument("--labels", help="Override VISION['LABELS_PATH'].")
+        parser.add_argument("--threads", type=int, help="Override VISION['THREADS'] (intra-op).")
+        parser.add_argument("--requests", type=int, default=200)
+        parser.add_argument("--concurrency", type=int, default=8)
+        parser.add_argument("--max-batch", default="1,8",
+                            help="Comma-separated batch sizes to compare.")
+        parser.add_argument("--json", action="store_true", help="Print results as JSON.")
+
+    def handle(self, *args, **options):
+        overrides = {
+            key: options[arg]
+            for key, arg in (("BACKEND", "backend"), ("MODEL_PATH", "model"),
+                             ("LABELS_PATH", "labels"), ("THREADS", "threads"))
+            if options[arg] is not None
+        }
+        if {**vision.get_options(), **overrides}["BACKEND"] == "manual":
+            raise CommandError("No vision model configured; set VISION_BACKEND or pass --backend.")
+
+        jpeg = memoryview(make_image(1280, 720))
+        results = []
+        for max_batch in (int(n) for n in options["max_batch"].split(",")):
+            recognizer = vision.build_recognizer({**overrides, "MAX_BATCH": max_batch})
+            recognizer.backend.warm_up()
+            results.append(self._measure(recognizer, jpeg, options))
+
+        if options["json"]:
+            self.stdout.write(json.dumps(results, indent=2))
+            return
+        for row in results:
+            self.stdout.write(
+                f"max_batch={row['max_batch']:<3} p50={row['p50_ms']:.1f}ms "
+                f"p99={row['p99_ms']:.1f}ms throughput={row['images_per_s']:.1f} img/s "
+                f"({row['images_per_s_per_core']:.1f} per core) "
+                f"mean batch={row['mean_batch_size']:.2f}"
+            )
+
+    def _measure(self, recognizer, jpeg, options):
+        def one(_):
+            start = time.perf_counter()
+            image = imaging.decode_resized(jpeg, recognizer.input_size)
+            recognizer.recognize(image)
+            return time.perf_counter() - start
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=options["concurrency"]) as pool:
+            latencies = list(pool.map(one, range(options["requests"])))
+        elapsed = time.perf_counter() - started
+
+        throughput = len(latencies) / elapsed
+        threads = recognizer.options["THREADS"]
+        return {
+            "max_batch": recognizer.batcher.max_batch,
+            "concurrency": options["concurrency"],
+            "intra_op_threads": threads,
+            **summarize(latencies),
+            "images_per_s": round(throughput, 2),
+            "images_per_s_per_core": round(throughput / threads, 2),
+            **recognizer.batcher.stats(),
+        }
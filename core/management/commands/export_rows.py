@@ -0,0 +1,41 @@
+from datetime import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from core import exports
+
+
+class Command(BaseCommand):
+    help = "Stream pickup requests or contact messages to CSV/NDJSON without loading them into memory."
+
+    def add_arguments(self, parser):
+        parser.add_argument("table", choices=sorted(exports.EXPORTS))
+        parser.add_argument("--format", choices=sorted(exports.FORMATS), default="csv")
+        parser.add_argument("--output", "-o", default="-", help="File path, or - for stdout.")
+        parser.add_argument("--since", help="Only rows on or after this date (YYYY-MM-DD).")
+        parser.add_argument("--before", help="Only rows before this date (YYYY-MM-DD).")
+        parser.add_argument("--chunk-size", type=int, default=exports.CHUNK_SIZE)
+
+    def handle(self, *args, **options):
+        model, fields, date_field = exports.EXPORTS[options["table"]]
+        queryset = model.objects.all()
+        for option, lookup in (("since", "gte"), ("before", "lt")):
+            if options[option]:
+                queryset = queryset.filter(**{f"{date_field}__{lookup}": _parse_date(options[option])})
+
+        chunks = exports.export_chunks(queryset, fields, options["format"], options["chunk_size"])
+        if options["output"] == "-":
+            for chunk in chunks:
+                self.stdout.write(chunk, ending="")
+            return
+        with open(options["output"], "w", encoding="utf-8", newline="") as fh:
+            fh.writelines(chunks)
+        self.stderr.write(f"Wrote {options['output']}")
+
+
+def _parse_date(value):
+    try:
+        return timezone.make_aware(datetime.strptime(value, "%Y-%m-%d"))
+    except ValueError:
+        raise CommandError(f"Invalid date {value!r}; use YYYY-MM-DD.")
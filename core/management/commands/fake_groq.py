@@ -0,0 +1,47 @@
+from django.core.management.base import BaseCommand
+
+from core.fake_groq import DEFAULT_REPLY, FakeGroqServer
+
+
+class Command(BaseCommand):
+    help = "Run a local fake Groq API for offline chatbot load tests."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--host", default="127.0.0.1")
+        parser.add_argument("--port", type=int, default=8765)
+        parser.add_argument("--latency", type=float, default=0.3,
+                            help="Seconds to wait before the first byte.")
+        parser.add_argument("--token-delay", type=float, default=0.02,
+                            help="Seconds between streamed tokens.")
+        parser.add_argument("--prompt-token-delay", type=float, default=0.0,
+                            help="Extra seconds per prompt token before the first byte.")
+        parser.add_argument("--status", type=int, default=200,
+                            help="HTTP status to answer with (e.g. 503 to simulate an outage).")
+        parser.add_argument("--model-latency", action="append", default=[], metavar="MODEL=SECONDS",
+                            help="Override --latency for one model, e.g. to exercise hedging.")
+        parser.add_argument("--reply", default=DEFAULT_REPLY)
+        parser.add_argument("--verbose", action="store_true")
+
+    def handle(self, *args, **options):
+        server = FakeGroqServer(
+            host=options["host"],
+            port=options["port"],
+            latency=options["latency"],
+            token_delay=options["token_delay"],
+            prompt_token_delay=options["prompt_token_delay"],
+            reply=options["reply"],
+            status=options["status"],
+            verbose=options["verbose"],
+            model_latency={
+                model: float(seconds)
+                for model, _, seconds in (item.partition("=") for item in options["model_latency"])
+            },
+        )
+        self.stdout.write(f"Fake Groq listening on {server.base_url}")
+        self.stdout.write(f"Run the app with GROQ_BASE_URL={server.base_url}")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
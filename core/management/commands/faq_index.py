@@ -0,0 +1,87 @@
+import json
+import time
+from collections import Counter
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.faq import FAQ_PATH, FaqIndex
+from core.views import EWASTE_ITEMS
+
+
+def read_messages(path):
+    """Chat logs are plain text (one message per line) or NDJSON with a "message" field."""
+    with open(path, encoding="utf-8") as fh:
+        for line in fh:
+            line = line.strip()
+            if not line:
+                continue
+            if line.startswith("{"):
+                try:
+                    line = json.loads(line).get("message", "")
+                except ValueError:
+                    pass
+            if line:
+                yield line
+
+
+class Command(BaseCommand):
+    help = (
+        "Validate the chatbot FAQ file and report how much of a chat log it answers. "
+        "This only checks and reports: web workers load faq.json once at startup, "
+        "so restart them to apply an edited file."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--path", default=str(FAQ_PATH), help="FAQ JSON file.")
+        parser.add_argument("--log", help="Chat log to measure coverage against.")
+        parser.add_argument("--top", type=int, default=10,
+                            help="How many unanswered messages to list.")
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        try:
+            index = FaqIndex.from_file(EWASTE_ITEMS, options["path"])
+        except (OSError, ValueError, KeyError) as e:
+            raise CommandError(f"Could not build FAQ index: {e!r}")
+        elapsed = time.perf_counter() - started
+        problems = index.validate(EWASTE_ITEMS)
+        if problems:
+            raise CommandError("FAQ file has problems:\n  " + "\n  ".join(problems))
+
+        stats = index.stats()
+        self.stdout.write(
+            f"FAQ index v{stats['version']} is valid, built in {elapsed * 1000:.1f} ms: "
+            f"{stats['entries']} entries, {stats['keywords']} keywords, "
+            f"{stats['item_phrases']} item phrases"
+        )
+
+        if not options["log"]:
+            return
+
+        answered, unanswered = Counter(), Counter()
+        total = 0
+        started = time.perf_counter()
+        for message in read_messages(options["log"]):
+            total += 1
+            match = index.match(message)
+            if match:
+                answered[match.entry.id] += 1
+            else:
+                unanswered[message.lower()] += 1
+        elapsed = time.perf_counter() - started
+
+        if not total:
+            self.stdout.write("Chat log is empty.")
+            return
+
+        hits = sum(answered.values())
+        self.stdout.write(
+            f"Coverage: {hits}/{total} messages ({hits / total:.1%}), "
+            f"{elapsed / total * 1e6:.1f} us per lookup"
+        )
+        for entry_id, count in answered.most_common():
+            self.stdout.write(f"  {count:>6}  {entry_id}")
+        if unanswered:
+            self.stdout.write("Most common unanswered:")
+            for message, count in unanswered.most_common(options["top"]):
+                self.stdout.write(f"  {count:>6}  {message}")
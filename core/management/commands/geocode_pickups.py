@@ -0,0 +1,37 @@
+from django.core.management.base import BaseCommand
+
+from core import geo
+from core.models import PickupRequest
+
+GEO_FIELDS = ["pincode", "latitude", "longitude", "geohash"]
+
+
+class Command(BaseCommand):
+    help = (
+        "Fill coordinates for pickup requests from the PIN code in their address. "
+        "Rows saved through the model are geocoded already; this covers older rows, "
+        "bulk inserts and a refreshed PIN table."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--all", action="store_true", help="Re-geocode rows that already have coordinates.")
+        parser.add_argument("--batch", type=int, default=2000)
+
+    def handle(self, *args, **options):
+        rows = PickupRequest.objects.only("id", "address", *GEO_FIELDS).order_by("pk")
+        if not options["all"]:
+            rows = rows.filter(latitude=None)
+        located = unknown = 0
+        last_pk = 0
+        while True:
+            batch = list(rows.filter(pk__gt=last_pk)[:options["batch"]])
+            if not batch:
+                break
+            for row in batch:
+                if geo.geocode(row):
+                    located += 1
+                else:
+                    unknown += 1
+            PickupRequest.objects.bulk_update(batch, GEO_FIELDS)
+            last_pk = batch[-1].pk
+        self.stdout.write(f"{located} geocoded, {unknown} without a known PIN code")
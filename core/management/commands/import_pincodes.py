@@ -0,0 +1,51 @@
+import csv
+import json
+from collections import defaultdict
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.geo import PINCODES_PATH
+
+
+class Command(BaseCommand):
+    help = (
+        "Build core/data/pincodes.json from a PIN code directory CSV (e.g. India Post's "
+        "all-India pincode directory) with pincode, latitude and longitude columns. "
+        "Offices sharing a PIN are averaged."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("csv_path")
+        parser.add_argument("--state", help="Only keep rows whose statename matches (case-insensitive).")
+        parser.add_argument("--output", default=str(PINCODES_PATH))
+
+    def handle(self, *args, **options):
+        points = defaultdict(list)
+        with open(options["csv_path"], encoding="utf-8-sig", newline="") as fh:
+            reader = csv.DictReader(fh)
+            columns = {name.lower(): name for name in reader.fieldnames or []}
+            missing = {"pincode", "latitude", "longitude"} - set(columns)
+            if missing:
+                raise CommandError(f"CSV is missing column(s): {', '.join(sorted(missing))}")
+            for row in reader:
+                if options["state"] and row.get(columns.get("statename", ""), "").lower() != options["state"].lower():
+                    continue
+                try:
+                    lat, lon = float(row[columns["latitude"]]), float(row[columns["longitude"]])
+                except ValueError:
+                    continue  # "NA" and blanks
+                pin = row[columns["pincode"]].strip()
+                if len(pin) == 6 and pin.isdigit() and -90 <= lat <= 90 and -180 <= lon <= 180:
+                    points[pin].append((lat, lon))
+
+        pincodes = {
+            pin: [round(sum(p[0] for p in pts) / len(pts), 5), round(sum(p[1] for p in pts) / len(pts), 5)]
+            for pin, pts in sorted(points.items())
+        }
+        if not pincodes:
+            raise CommandError("No usable rows found.")
+        lines = ",\n".join(f'    "{pin}": [{lat}, {lon}]' for pin, (lat, lon) in pincodes.items())
+        note = f"Averaged office coordinates imported from {options['csv_path'].rsplit('/', 1)[-1]}."
+        with open(options["output"], "w", encoding="utf-8") as fh:
+            fh.write(f'{{\n  "version": 1,\n  "note": {json.dumps(note)},\n  "pincodes": {{\n{lines}\n  }}\n}}\n')
+        self.stdout.write(f"Wrote {len(pincodes)} PIN codes to {options['output']}")
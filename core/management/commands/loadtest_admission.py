@@ -0,0 +1,100 @@
+import asyncio
+import json
+import random
+import time
+import uuid
+from collections import Counter
+
+import httpx
+
+from django.core.management.base import BaseCommand
+
+from core.bench import percentile
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure static-page latency alone and while the chatbot API is flooded. "
+        "Run against a server whose GROQ_BASE_URL points at `manage.py fake_groq`; "
+        "with --clients, start it with THROTTLE_NUM_PROXIES=1 so each fake client "
+        "gets its own bucket and the concurrency cap is what sheds load."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--url", default="http://127.0.0.1:8000")
+        parser.add_argument("--page", default="/about/")
+        parser.add_argument("--api", default="/api/chatbot/")
+        parser.add_argument("--duration", type=float, default=10.0, help="Seconds per phase.")
+        parser.add_argument("--page-concurrency", type=int, default=4)
+        parser.add_argument("--api-concurrency", type=int, default=64)
+        parser.add_argument("--clients", type=int, default=0,
+                            help="Spread API calls over this many X-Forwarded-For addresses.")
+        parser.add_argument("--respect-retry-after", action="store_true",
+                            help="API workers sleep for Retry-After when shed, like a well-behaved client.")
+        parser.add_argument("--json", action="store_true", help="Print results as JSON.")
+
+    def handle(self, *args, **options):
+        results = asyncio.run(self._run(options))
+        if options["json"]:
+            self.stdout.write(json.dumps(results, indent=2))
+            return
+        for phase, row in results.items():
+            self.stdout.write(f"{phase}:")
+            for key, value in row.items():
+                self.stdout.write(f"  {key:>18}: {value}")
+
+    async def _run(self, options):
+        limits = httpx.Limits(max_connections=options["page_concurrency"] + options["api_concurrency"])
+        async with httpx.AsyncClient(base_url=options["url"], limits=limits, timeout=60) as client:
+            baseline = await self._phase(client, options, flood=False)
+            flooded = await self._phase(client, options, flood=True)
+        return {"static-only": baseline, "static+api-flood": flooded}
+
+    async def _phase(self, client, options, flood):
+        deadline = time.perf_counter() + options["duration"]
+        page_latencies, page_errors = [], 0
+        api_statuses = Counter()
+
+        async def page_worker():
+            nonlocal page_errors
+            while time.perf_counter() < deadline:
+                start = time.perf_counter()
+                try:
+                    response = await client.get(options["page"])
+                    response.raise_for_status()
+                except httpx.HTTPError:
+                    page_errors += 1
+                    continue
+                page_latencies.append(time.perf_counter() - start)
+
+        async def api_worker():
+            while time.perf_counter() < deadline:
+                headers = {}
+                if options["clients"]:
+                    client_id = random.randrange(options["clients"])
+                    headers["X-Forwarded-For"] = f"10.{client_id // 256 % 256}.{client_id % 256}.1"
+                # Unique questions so the FAQ and response cache can't answer them.
+                message = f"Can {uuid.uuid4().hex} be recycled with {uuid.uuid4().hex}?"
+                try:
+                    response = await client.post(options["api"], data={"message": message}, headers=headers)
+                except httpx.HTTPError:
+                    api_statuses["error"] += 1
+                    continue
+                api_statuses[response.status_code] += 1
+                if options["respect_retry_after"] and "Retry-After" in response.headers:
+                    await asyncio.sleep(min(float(response.headers["Retry-After"]), deadline - time.perf_counter()))
+
+        workers = [page_worker() for _ in range(options["page_concurrency"])]
+        if flood:
+            workers += [api_worker() for _ in range(options["api_concurrency"])]
+        await asyncio.gather(*workers)
+
+        ms = lambda seconds: round(seconds * 1000, 1)
+        return {
+            "page_requests": len(page_latencies),
+            "page_errors": page_errors,
+            "page_p50_ms": ms(percentile(page_latencies, 50)),
+            "page_p95_ms": ms(percentile(page_latencies, 95)),
+            "page_p99_ms": ms(percentile(page_latencies, 99)),
+            "api_statuses": {str(status): count for status, count in sorted(api_statuses.items(), key=str)},
+        }
@@ -0,0 +1,75 @@
+import asyncio
+import json
+import statistics
+import time
+
+import httpx
+
+from django.core.management.base import BaseCommand
+
+from core.bench import percentile
+
+
+class Command(BaseCommand):
+    help = "Fire concurrent chatbot requests at a running server and report latency."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--url", default="http://127.0.0.1:8000")
+        parser.add_argument("--requests", type=int, default=200)
+        parser.add_argument("--concurrency", type=int, default=50)
+        parser.add_argument("--stream", action="store_true",
+                            help="Hit /api/chatbot/stream/ instead of /api/chatbot/.")
+        parser.add_argument("--message", default="How do I recycle a laptop battery?")
+        parser.add_argument("--json", action="store_true", help="Print results as JSON.")
+
+    def handle(self, *args, **options):
+        results = asyncio.run(self._run(options))
+        if options["json"]:
+            self.stdout.write(json.dumps(results, indent=2))
+            return
+        for key, value in results.items():
+            self.stdout.write(f"{key:>22}: {value}")
+
+    async def _run(self, options):
+        path = "/api/chatbot/stream/" if options["stream"] else "/api/chatbot/"
+        limits = httpx.Limits(max_connections=options["concurrency"])
+        semaphore = asyncio.Semaphore(options["concurrency"])
+        latencies, first_bytes, errors = [], [], 0
+
+        async with httpx.AsyncClient(base_url=options["url"], limits=limits, timeout=60) as client:
+            async def one():
+                nonlocal errors
+                async with semaphore:
+                    start = time.perf_counter()
+                    try:
+                        async with client.stream("POST", path, data={"message": options["message"]}) as response:
+                            first = None
+                            async for _ in response.aiter_bytes():
+                                if first is None:
+                                    first = time.perf_counter() - start
+                            if response.status_code != 200:
+                                errors += 1
+                                return
+                    except httpx.HTTPError:
+                        errors += 1
+                        return
+                    latencies.append(time.perf_counter() - start)
+                    first_bytes.append(first or latencies[-1])
+
+            started = time.perf_counter()
+            await asyncio.gather(*(one() for _ in range(options["requests"])))
+            elapsed = time.perf_counter() - started
+
+        ms = lambda seconds: round(seconds * 1000, 1)
+        return {
+            "endpoint": path,
+            "requests": options["requests"],
+            "concurrency": options["concurrency"],
+            "errors": errors,
+            "rps": round(len(latencies) / elapsed, 1) if elapsed else 0.0,
+            "latency_mean_ms": ms(statistics.mean(latencies)) if latencies else 0.0,
+            "latency_p50_ms": ms(percentile(latencies, 50)),
+            "latency_p99_ms": ms(percentile(latencies, 99)),
+            "first_byte_p50_ms": ms(percentile(first_bytes, 50)),
+            "first_byte_p99_ms": ms(percentile(first_bytes, 99)),
+        }
@@ -0,0 +1,80 @@
+import json
+from datetime import date, datetime, time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+
+from core import dispatch, geo, rollups
+from core.models import PickupRequest
+
+
+def parse_point(value):
+    try:
+        lat, lon = (float(part) for part in value.split(","))
+    except ValueError:
+        raise CommandError(f"Expected lat,lon, got {value!r}")
+    return lat, lon
+
+
+class Command(BaseCommand):
+    help = (
+        "Plan the day's routes: pending pickups within --radius km of the depot, "
+        "split into one compact group per vehicle by recursive bisection, and each "
+        "group ordered nearest-neighbour + 2-opt."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--date", type=date.fromisoformat, default=None,
+                            help="Plan pickups requested up to this day (default: today).")
+        parser.add_argument("--depot", type=parse_point, help="lat,lon (default: DISPATCH['DEPOT']).")
+        parser.add_argument("--vehicles", type=int)
+        parser.add_argument("--capacity", type=int, help="Most stops per vehicle.")
+        parser.add_argument("--radius", type=float, help="km from the depot.")
+        parser.add_argument("--assign", action="store_true", help="Mark planned pickups as scheduled.")
+        parser.add_argument("--json", action="store_true", help="Print routes as JSON.")
+
+    def handle(self, *args, **options):
+        defaults = dispatch.get_options()
+        depot = options["depot"] or tuple(defaults["DEPOT"])
+        radius = options["radius"] or defaults["RADIUS_KM"]
+        day = options["date"] or timezone.localdate()
+        cutoff = timezone.make_aware(datetime.combine(day, time.max))
+
+        pending = PickupRequest.objects.filter(status=PickupRequest.PENDING, created_at__lte=cutoff)
+        candidates = geo.nearby(
+            pending.only("id", "name", "address", "latitude", "longitude", "geohash"), *depot, radius,
+        )
+        rows = {row.pk: row for _, row in candidates}
+        routes, unassigned = dispatch.plan(
+            [(row.pk, row.latitude, row.longitude) for row in rows.values()],
+            depot, options["vehicles"], options["capacity"],
+        )
+        if options["assign"]:
+            with transaction.atomic():
+                assigned = PickupRequest.objects.filter(
+                    pk__in=[pk for r in routes for pk in r.stops], status=PickupRequest.PENDING,
+                ).update(status=PickupRequest.SCHEDULED)
+                rollups.pickups_moved(assigned, PickupRequest.PENDING, PickupRequest.SCHEDULED)
+        not_located = pending.filter(latitude=None).count()
+
+        if options["json"]:
+            self.stdout.write(json.dumps({
+                "date": day.isoformat(), "depot": depot, "radius_km": radius,
+                "routes": [r.as_dict() for r in routes],
+                "unassigned": unassigned, "not_geocoded": not_located,
+            }, indent=2))
+            return
+        for r in routes:
+            self.stdout.write(
+                f"Vehicle {r.vehicle}: {len(r.stops)} stops, {r.km:.1f} km "
+                f"(nearest-neighbour alone {r.nearest_neighbour_km:.1f} km)"
+            )
+            for n, pk in enumerate(r.stops, 1):
+                row = rows[pk]
+                self.stdout.write(f"  {n:>3}. #{pk} {row.name} - {' '.join(row.address.split())}")
+        self.stdout.write(
+            f"{sum(len(r.stops) for r in routes)} planned, {len(unassigned)} over capacity, "
+            f"{not_located} pending without coordinates"
+            + (" - planned pickups marked scheduled" if options["assign"] else "")
+        )
@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from core import pages
+
+
+class Command(BaseCommand):
+    help = "Render the static pages to PAGE_CACHE['DIR'] (or warm the in-memory cache)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--dir", help="Output directory; defaults to PAGE_CACHE['DIR'].")
+        parser.add_argument("--pages", help="Comma-separated template names; defaults to all cacheable pages.")
+
+    def handle(self, *args, **options):
+        names = options["pages"].split(",") if options["pages"] else pages.CACHEABLE_TEMPLATES
+        unknown = set(names) - set(pages.CACHEABLE_TEMPLATES)
+        if unknown:
+            raise CommandError(f"Not cacheable: {', '.join(sorted(unknown))}")
+
+        directory = options["dir"] or pages.get_options()["DIR"]
+        if directory:
+            manifest = pages.write_prerendered(directory, names)
+            for name, entry in manifest.items():
+                self.stdout.write(f"{name:<22}{entry['bytes']:>8} B  {entry['etag']}")
+            self.stdout.write(self.style.SUCCESS(f"Wrote {len(manifest)} pages to {directory}"))
+            return
+
+        # No directory: only useful in-process (e.g. a shell or gunicorn preload hook).
+        cache = pages.get_cache()
+        cache.clear()
+        for name, page in cache.warm(names).items():
+            self.stdout.write(f"{name:<22}{len(page.body):>8} B  {page.etag}")
+        self.stdout.write(self.style.SUCCESS(f"Warmed {len(names)} pages in memory"))
@@ -0,0 +1,24 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from core import mail_queue
+
+
+class Command(BaseCommand):
+    help = "Send queued emails. Use --loop to run as a long-lived worker process."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--loop", action="store_true", help="Keep polling instead of exiting when drained.")
+        parser.add_argument("--interval", type=float, help="Seconds between polls; defaults to EMAIL_QUEUE['POLL_INTERVAL'].")
+
+    def handle(self, *args, **options):
+        queue_options = mail_queue.get_options()
+        interval = options["interval"] or queue_options["POLL_INTERVAL"]
+        while True:
+            sent = mail_queue.process_queue(queue_options)
+            if sent or not options["loop"]:
+                self.stdout.write(f"Sent {sent} emails")
+            if not options["loop"]:
+                return
+            time.sleep(interval)
@@ -0,0 +1,102 @@
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+# Modules that should only load on first use, not at worker boot.
+HEAVY_MODULES = ("groq", "httpx", "pydantic", "PIL.Image", "numpy", "onnxruntime", "requests")
+
+# What a fresh worker does before serving: build the handler (settings, apps,
+# middleware) and, with --urls, import the URLconf and every view module.
+BOOT = """
+import json, os, resource, sys, time
+start = time.perf_counter()
+from ewaste_backend.{target} import application
+if {urls}:
+    from django.urls import get_resolver
+    get_resolver().url_patterns
+elapsed = time.perf_counter() - start
+print(json.dumps({{
+    "boot_ms": elapsed * 1000,
+    "rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    "modules": len(sys.modules),
+    "heavy": [name for name in {heavy!r} if name in sys.modules],
+}}))
+"""
+
+
+def parse_importtime(stderr):
+    """``-X importtime`` lines -> [(name, self_us, cumulative_us, depth)]."""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        depth = (len(name) - len(name.lstrip())) // 2
+        rows.append((name.strip(), int(self_us), int(cumulative_us), depth))
+    return rows
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure worker cold start in fresh interpreters: boot time and RSS over several "
+        "runs, plus a `python -X importtime` breakdown of the slowest imports."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--runs", type=int, default=5)
+        parser.add_argument("--top", type=int, default=15, help="Imports to list.")
+        parser.add_argument("--target", choices=("wsgi", "asgi"), default="wsgi")
+        parser.add_argument("--no-urls", action="store_true",
+                            help="Stop after building the handler; skip importing the URLconf.")
+        parser.add_argument("--json", action="store_true", help="Print results as JSON.")
+
+    def _child(self, code, importtime=False):
+        env = {**os.environ, "DJANGO_SETTINGS_MODULE": os.environ.get("DJANGO_SETTINGS_MODULE", "ewaste_backend.settings")}
+        args = [sys.executable, *(["-X", "importtime"] if importtime else []), "-c", code]
+        result = subprocess.run(args, capture_output=True, text=True, cwd=settings.BASE_DIR, env=env)
+        if result.returncode:
+            raise CommandError(result.stderr.strip().splitlines()[-1] if result.stderr else "boot failed")
+        return json.loads(result.stdout.strip().splitlines()[-1]), result.stderr
+
+    def handle(self, *args, **options):
+        code = BOOT.format(target=options["target"], urls=not options["no_urls"], heavy=HEAVY_MODULES)
+        runs = [self._child(code)[0] for _ in range(options["runs"])]
+        _, stderr = self._child(code, importtime=True)
+        imports = parse_importtime(stderr)
+
+        results = {
+            "target": options["target"],
+            "urls": not options["no_urls"],
+            "runs": options["runs"],
+            "boot_ms_median": round(statistics.median(r["boot_ms"] for r in runs), 1),
+            "boot_ms_min": round(min(r["boot_ms"] for r in runs), 1),
+            "rss_mb": round(statistics.median(r["rss_mb"] for r in runs), 1),
+            "modules": runs[-1]["modules"],
+            "heavy_modules_loaded": runs[-1]["heavy"],
+            "slowest_cumulative": [
+                {"module": name, "cumulative_ms": round(cum / 1000, 1), "self_ms": round(own / 1000, 1)}
+                for name, own, cum, _ in sorted(imports, key=lambda row: -row[2])[:options["top"]]
+            ],
+            "slowest_self": [
+                {"module": name, "self_ms": round(own / 1000, 1)}
+                for name, own, _, _ in sorted(imports, key=lambda row: -row[1])[:options["top"]]
+            ],
+        }
+
+        if options["json"]:
+            self.stdout.write(json.dumps(results, indent=2))
+            return
+        self.stdout.write(
+            f"{options['target']} boot{' + URLconf' if results['urls'] else ''}: "
+            f"median {results['boot_ms_median']} ms, min {results['boot_ms_min']} ms over {options['runs']} runs"
+        )
+        self.stdout.write(f"peak RSS {results['rss_mb']} MB, {results['modules']} modules")
+        self.stdout.write(f"heavy modules loaded: {', '.join(results['heavy_modules_loaded']) or 'none'}")
+        self.stdout.write(f"\n{'cumulative ms':>14}{'self ms':>10}  module")
+        for row in results["slowest_cumulative"]:
+            self.stdout.write(f"{row['cumulative_ms']:>14}{row['self_ms']:>10}  {row['module']}")
@@ -0,0 +1,88 @@
+import json
+import re
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from core import events
+from core.bench import percentile
+
+DEFAULT_GROUPS = {events.DETECTION: ["detected", "source"], events.CHAT: ["source"]}
+UNITS = {"m": "minutes", "h": "hours", "d": "days"}
+
+
+def parse_age(value):
+    match = re.fullmatch(r"(\d+)([mhd])", value)
+    if not match:
+        raise CommandError(f"Expected an age like 30m, 24h or 7d, got {value!r}")
+    return timedelta(**{UNITS[match[2]]: int(match[1])})
+
+
+def aggregate(rows, by, value="latency_ms", bucket=None):
+    """
+    Group ``(created_at, data)`` rows by the ``by`` fields (and by hour or
+    day with ``bucket``). Each group gets its count, its share of all rows,
+    and the mean/p50/p95 of the numeric ``value``.
+    """
+    groups = {}
+    for created_at, data in rows:
+        key = tuple(str(data.get(field)) for field in by)
+        if bucket:
+            local = timezone.localtime(created_at)
+            key = (local.strftime("%Y-%m-%d %H:00" if bucket == "hour" else "%Y-%m-%d"), *key)
+        groups.setdefault(key, []).append(data.get(value))
+    total = sum(len(values) for values in groups.values())
+    columns = ([bucket] if bucket else []) + list(by)
+    out = []
+    for key, values in sorted(groups.items(), key=lambda item: (item[0][:1] if bucket else (), -len(item[1]))):
+        numbers = [v for v in values if isinstance(v, (int, float)) and not isinstance(v, bool)]
+        out.append({
+            **dict(zip(columns, key)),
+            "count": len(values),
+            "share": round(len(values) / total, 4),
+            f"{value}_mean": round(sum(numbers) / len(numbers), 1) if numbers else None,
+            f"{value}_p50": percentile(numbers, 50) if numbers else None,
+            f"{value}_p95": percentile(numbers, 95) if numbers else None,
+        })
+    return out
+
+
+class Command(BaseCommand):
+    help = (
+        "Aggregate the detection/chatbot event log: counts, share and latency percentiles "
+        "grouped by any event fields, optionally per hour or day."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("kind", choices=sorted(DEFAULT_GROUPS))
+        parser.add_argument("--since", type=parse_age, default=timedelta(hours=24),
+                            help="How far back to look, e.g. 30m, 24h, 7d (default 24h).")
+        parser.add_argument("--by", action="append",
+                            help="Event field to group by; repeat for several (default: detected+source or source).")
+        parser.add_argument("--every", choices=["hour", "day"], help="Also group by time bucket.")
+        parser.add_argument("--value", default="latency_ms", help="Numeric field to summarise.")
+        parser.add_argument("--backend", choices=["db", "ndjson"],
+                            help="Where to read from (default: EVENTS['BACKEND']).")
+        parser.add_argument("--json", action="store_true", help="Print results as JSON.")
+
+    def handle(self, *args, **options):
+        config = events.get_options()
+        if options["backend"]:
+            config["BACKEND"] = options["backend"]
+        by = options["by"] or DEFAULT_GROUPS[options["kind"]]
+        rows = events.build_sink(config).read(options["kind"], timezone.now() - options["since"])
+        results = aggregate(rows, by, options["value"], options["every"])
+
+        if options["json"]:
+            self.stdout.write(json.dumps(results, indent=2))
+            return
+        if not results:
+            self.stdout.write(f"No {options['kind']} events in that window.")
+            return
+        columns = list(results[0])
+        widths = [max(len(c), *(len(str(r[c])) for r in results)) for c in columns]
+        self.stdout.write("  ".join(c.rjust(w) for c, w in zip(columns, widths)))
+        for r in results:
+            self.stdout.write("  ".join(str(r[c]).rjust(w) for c, w in zip(columns, widths)))
+        self.stdout.write(f"{sum(r['count'] for r in results)} events")
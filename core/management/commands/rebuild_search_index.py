@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from core import search
+
+
+class Command(BaseCommand):
+    help = "Rebuild the admin full-text indexes (SQLite FTS5; PostgreSQL needs no rebuild)."
+
+    def handle(self, *args, **options):
+        if not search.is_supported():
+            self.stdout.write("Full-text search is not supported on this database; nothing to do.")
+            return
+        for table in search.INDEXES:
+            search.rebuild(table)
+            self.stdout.write(f"Rebuilt {table}")
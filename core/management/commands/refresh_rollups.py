@@ -0,0 +1,22 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from core import rollups
+
+
+class Command(BaseCommand):
+    help = (
+        "Recount the recent hourly/daily rollups and every total from the source tables "
+        "(drops hourly buckets past ROLLUPS['HOURLY_DAYS']). Run from cron, more often when "
+        "ROLLUPS['INCREMENTAL'] is off."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--days", type=int, default=None,
+                            help="Days of buckets to recount (default: ROLLUPS['REFRESH_DAYS']; 0 = all history).")
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        written = rollups.refresh(options["days"])
+        self.stdout.write(f"{written} rollup rows written in {time.perf_counter() - start:.2f}s")
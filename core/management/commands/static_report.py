@@ -0,0 +1,123 @@
+import json
+import re
+from pathlib import Path
+
+from django.conf import settings
+from django.contrib.staticfiles import finders
+from django.core.management.base import BaseCommand
+from django.template.loader import render_to_string
+from django.test import RequestFactory, override_settings
+
+from core import pages
+
+# Pages with forms render per request and are not compressed (their CSRF
+# tokens would make them a BREACH target); reported for completeness.
+FORM_TEMPLATES = ("contact.html", "login.html", "signup.html", "pickup.html", "reqs.html")
+
+# Already-compressed formats gain nothing from gzip/br (same list as WhiteNoise).
+SKIP_EXTENSIONS = {
+    "jpg", "jpeg", "png", "gif", "webp", "zip", "gz", "tgz", "bz2", "tbz", "xz", "br",
+    "swf", "flv", "woff", "woff2", "3gp", "3gpp", "asf", "avi", "m4v", "mov", "mp4",
+    "mpeg", "mpg", "webm", "wmv", "mp3", "ogg", "m4a",
+}
+
+STATIC_REF = re.compile(r'(?:href|src)="(%s[^"?#]+)' % re.escape(settings.STATIC_URL))
+
+
+def wire_sizes(data, extension=""):
+    """Bytes sent with no encoding, gzip and br (uncompressed size if it wouldn't help)."""
+    if extension.lower() in SKIP_EXTENSIONS:
+        return {"raw": len(data), "gzip": len(data), "br": len(data)}
+    encoded = pages.compress(data)
+    return {
+        "raw": len(data),
+        "gzip": len(encoded.get("gzip", data)),
+        "br": len(encoded.get("br", encoded.get("gzip", data))),
+    }
+
+
+def static_file(url):
+    """Bytes of the file behind a /static/ URL, from STATIC_ROOT or the finders."""
+    name = url[len(settings.STATIC_URL):]
+    for path in (Path(settings.STATIC_ROOT) / name, finders.find(name)):
+        if path and Path(path).is_file():
+            return Path(path).read_bytes()
+    return None
+
+
+class Command(BaseCommand):
+    help = (
+        "Report bytes on the wire for each template's HTML and the static files it links, "
+        "uncompressed (before) versus gzip and Brotli (after), plus totals for STATIC_ROOT."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--json", action="store_true", help="Print results as JSON.")
+
+    @override_settings(ALLOWED_HOSTS=["testserver"])
+    def handle(self, *args, **options):
+        request = RequestFactory().get("/", secure=True)
+        templates = []
+        for name in (*pages.CACHEABLE_TEMPLATES, *FORM_TEMPLATES):
+            html = render_to_string(name, request=request).encode()
+            assets, missing = [], []
+            for url in sorted(set(STATIC_REF.findall(html.decode()))):
+                data = static_file(url)
+                if data is None:
+                    missing.append(url)
+                else:
+                    assets.append(wire_sizes(data, url.rsplit(".", 1)[-1]))
+            html_sizes = wire_sizes(html)
+            compressed = name in pages.CACHEABLE_TEMPLATES
+            templates.append({
+                "template": name,
+                "html": html_sizes,
+                "html_served": html_sizes["br"] if compressed else html_sizes["raw"],
+                "assets": {key: sum(a[key] for a in assets) for key in ("raw", "gzip", "br")},
+                "missing_assets": missing,
+            })
+
+        root = {"files": 0, "raw": 0, "gzip": 0, "br": 0}
+        static_root = Path(settings.STATIC_ROOT)
+        manifest_path = static_root / "staticfiles.json"
+        if manifest_path.exists():
+            # Served names only: the hashed copies, not the originals or variants.
+            names = json.loads(manifest_path.read_text())["paths"].values()
+            paths = [static_root / name for name in names]
+        else:
+            paths = [p for p in static_root.rglob("*") if p.is_file() and p.suffix not in (".gz", ".br")]
+        for path in paths:
+            if not path.is_file():
+                continue
+            sizes = wire_sizes(path.read_bytes(), path.suffix.lstrip("."))
+            root["files"] += 1
+            for key in ("raw", "gzip", "br"):
+                root[key] += sizes[key]
+
+        before = sum(t["html"]["raw"] + t["assets"]["raw"] for t in templates)
+        after = sum(t["html_served"] + t["assets"]["br"] for t in templates)
+        results = {
+            "templates": templates,
+            "first_visit_bytes": {"before": before, "after_br": after,
+                                  "saved_pct": round((before - after) / before * 100, 1) if before else 0.0},
+            "static_root": root,
+        }
+
+        if options["json"]:
+            self.stdout.write(json.dumps(results, indent=2))
+            return
+        self.stdout.write(f"{'template':<22}{'html':>8}{'gzip':>8}{'br':>8}{'served':>8}{'assets':>9}{'br':>8}  missing")
+        for t in templates:
+            self.stdout.write(
+                f"{t['template']:<22}{t['html']['raw']:>8}{t['html']['gzip']:>8}{t['html']['br']:>8}"
+                f"{t['html_served']:>8}"
+                f"{t['assets']['raw']:>9}{t['assets']['br']:>8}  {', '.join(t['missing_assets'])}"
+            )
+        first = results["first_visit_bytes"]
+        self.stdout.write(
+            f"\nall pages, first visit: {first['before']} -> {first['after_br']} bytes with br "
+            f"({first['saved_pct']}% saved); repeat visits fetch no hashed assets (immutable)"
+        )
+        self.stdout.write(
+            f"STATIC_ROOT ({root['files']} files): {root['raw']} raw, {root['gzip']} gzip, {root['br']} br"
+        )
@@ -0,0 +1,411 @@
+"""
+Request metrics in the Prometheus text format, without a client library.
+
+:class:`MetricsMiddleware` counts every request and records its latency and
+the in-flight gauge. A ``SAMPLE_RATE`` fraction of requests are also traced
+in detail: stage timings from :func:`stage` / :func:`timed` (decode,
+classify, llm, render), the number and duration of DB queries (through a
+connection execute wrapper), and a ``Server-Timing`` header. Unsampled
+requests skip all of that and cost two counter updates.
+
+Scrape ``/metrics``. If ``METRICS["TOKEN"]`` is set the scraper sends it as a
+bearer token; otherwise only staff users (or anyone with DEBUG on) may read it.
+
+Metrics live in each worker process, so scrape every worker or run one per
+container. Streaming responses are timed until their headers are ready.
+"""
+
+import bisect
+import functools
+import hmac
+import math
+import random
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+
+DEFAULTS = {
+    "ENABLED": True,
+    "SAMPLE_RATE": 1.0,
+    "SERVER_TIMING": True,
+    "TOKEN": "",
+}
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100)
+
+
+def get_options():
+    return {**DEFAULTS, **getattr(settings, "METRICS", {})}
+
+
+# ============================================================
+# METRIC TYPES
+# ============================================================
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(names, values, extra=()):
+    pairs = [*zip(names, values), *extra]
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+
+def _number(value):
+    if value == math.inf:
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Metric:
+    type = None
+
+    def __init__(self, name, help, labelnames=()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels):
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def clear(self):
+        with self._lock:
+            self._values.clear()
+
+    def samples(self):
+        """``(suffix, label values, extra labels, value)`` tuples."""
+        with self._lock:
+            return [("", key, (), value) for key, value in sorted(self._values.items())]
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.type}"]
+        for suffix, key, extra, value in self.samples():
+            lines.append(f"{self.name}{suffix}{_labels(self.labelnames, key, extra)} {_number(value)}")
+        return lines
+
+
+class Counter(Metric):
+    type = "counter"
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels):
+        return self._values.get(self._key(labels), 0)
+
+
+class Gauge(Counter):
+    type = "gauge"
+
+    def dec(self, amount=1, **labels):
+        self.inc(-amount, **labels)
+
+    def set(self, value, **labels):
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+
+class Histogram(Metric):
+    type = "histogram"
+
+    def __init__(self, name, help, labelnames=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            state[0][index] += 1
+            state[1] += value
+            state[2] += 1
+
+    def count(self, **labels):
+        state = self._values.get(self._key(labels))
+        return state[2] if state else 0
+
+    def samples(self):
+        with self._lock:
+            items = sorted((key, (list(counts), total, n)) for key, (counts, total, n) in self._values.items())
+        samples = []
+        for key, (counts, total, n) in items:
+            cumulative = 0
+            for bound, count in zip((*self.buckets, math.inf), counts):
+                cumulative += count
+                samples.append(("_bucket", key, (("le", _number(bound)),), cumulative))
+            samples.append(("_sum", key, (), total))
+            samples.append(("_count", key, (), n))
+        return samples
+
+
+class Registry:
+
+    def __init__(self):
+        self.metrics = []
+        self.collectors = []
+
+    def register(self, metric):
+        self.metrics.append(metric)
+        return metric
+
+    def collector(self, func):
+        """Register ``func()`` -> iterable of metrics refreshed at scrape time."""
+        self.collectors.append(func)
+        return func
+
+    def render(self):
+        lines = []
+        for metric in self.metrics:
+            lines.extend(metric.render())
+        for collect in self.collectors:
+            for metric in collect():
+                lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+REQUESTS = REGISTRY.register(Counter(
+    "http_requests_total", "Requests by view, method and status.", ("view", "method", "status"),
+))
+REQUEST_LATENCY = REGISTRY.register(Histogram(
+    "http_request_duration_seconds", "Time until the response headers were ready.", ("view",),
+))
+IN_FLIGHT = REGISTRY.register(Gauge(
+    "http_requests_in_flight", "Requests being handled by this worker.",
+))
+STAGE_LATENCY = REGISTRY.register(Histogram(
+    "stage_duration_seconds", "Time spent in a named stage of a sampled request.", ("stage",),
+))
+DB_QUERIES = REGISTRY.register(Histogram(
+    "db_queries_per_request", "DB queries issued by a sampled request.", ("view",),
+    buckets=QUERY_COUNT_BUCKETS,
+))
+DB_TIME = REGISTRY.register(Histogram(
+    "db_query_duration_seconds", "Total DB time of a sampled request.", ("view",),
+))
+ERRORS = REGISTRY.register(Counter(
+    "app_errors_total", "Handled errors by where they happened.", ("source",),
+))
+
+
+# ============================================================
+# PER-REQUEST TRACING
+# ============================================================
+class RequestTimings:
+
+    def __init__(self):
+        self.stages = []
+        self.queries = 0
+        self.query_time = 0.0
+
+    def server_timing(self, total):
+        parts = [f"total;dur={total * 1000:.1f}"]
+        if self.queries:
+            parts.append(f'db;dur={self.query_time * 1000:.1f};desc="{self.queries} queries"')
+        for name, elapsed in self.stages:
+            parts.append(f"{name};dur={elapsed * 1000:.1f}")
+        return ", ".join(parts)
+
+
+# None for requests that were not sampled (and outside requests).
+_current = ContextVar("request_timings", default=None)
+
+
+@contextmanager
+def stage(name):
+    """Time the block as stage ``name`` of the current request, if it is sampled."""
+    timings = _current.get()
+    if timings is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        timings.stages.append((name, elapsed))
+        STAGE_LATENCY.observe(elapsed, stage=name)
+
+
+def timed(name):
+    """Decorator form of :func:`stage`."""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with stage(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def _query_wrapper(execute, sql, params, many, context):
+    timings = _current.get()
+    if timings is None:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        timings.queries += 1
+        timings.query_time += time.perf_counter() - start
+
+
+def _install_query_wrapper(sender=None, connection=None, **kwargs):
+    if _query_wrapper not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_query_wrapper)
+
+
+def install_query_wrapper():
+    connection_created.connect(_install_query_wrapper, dispatch_uid="core.metrics.query_wrapper")
+    for connection in connections.all(initialized_only=True):
+        _install_query_wrapper(connection=connection)
+
+
+# ============================================================
+# STREAMING RESPONSES
+# ============================================================
+class _Closing:
+
+    def __init__(self, content, callback):
+        self._content = content
+        self._callback = callback
+
+    def close(self):
+        callback, self._callback = self._callback, None
+        if callback is not None:
+            callback()
+
+
+class _SyncClosing(_Closing):
+
+    def __iter__(self):
+        try:
+            yield from self._content
+        finally:
+            self.close()
+
+
+class _AsyncClosing(_Closing):
+
+    async def __aiter__(self):
+        try:
+            async for chunk in self._content:
+                yield chunk
+        finally:
+            self.close()
+
+
+def call_on_close(response, callback):
+    """
+    Run ``callback`` once when a streaming response has sent its last chunk,
+    or is closed early (the client went away, or it was never read).
+    """
+    content = response.streaming_content
+    wrapper = _AsyncClosing if response.is_async else _SyncClosing
+    # Setting streaming_content registers wrapper.close() with response.close().
+    response.streaming_content = wrapper(content, callback)
+    return response
+
+
+# ============================================================
+# MIDDLEWARE
+# ============================================================
+def _view_label(request):
+    match = getattr(request, "resolver_match", None)
+    if match is None:
+        return "unmatched"
+    return match.view_name or match._func_path
+
+
+class MetricsMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.options = get_options()
+        if self.options["ENABLED"] and self.options["SAMPLE_RATE"] > 0:
+            install_query_wrapper()
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def start(self):
+        sample_rate = self.options["SAMPLE_RATE"]
+        sampled = sample_rate >= 1 or (sample_rate > 0 and random.random() < sample_rate)
+        timings = RequestTimings() if sampled else None
+        IN_FLIGHT.inc()
+        return time.perf_counter(), timings, _current.set(timings)
+
+    def finish(self, request, response, state):
+        start, timings, token = state
+        _current.reset(token)
+        elapsed = time.perf_counter() - start
+        view = _view_label(request)
+        REQUESTS.inc(view=view, method=request.method, status=response.status_code)
+        REQUEST_LATENCY.observe(elapsed, view=view)
+        if timings is not None:
+            DB_QUERIES.observe(timings.queries, view=view)
+            DB_TIME.observe(timings.query_time, view=view)
+            if self.options["SERVER_TIMING"]:
+                response["Server-Timing"] = timings.server_timing(elapsed)
+        if response.streaming:
+            # Still in flight until the last chunk.
+            call_on_close(response, IN_FLIGHT.dec)
+        else:
+            IN_FLIGHT.dec()
+        return response
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if not self.options["ENABLED"]:
+            return self.get_response(request)
+        state = self.start()
+        try:
+            response = self.get_response(request)
+        except BaseException:
+            _current.reset(state[2])
+            IN_FLIGHT.dec()
+            raise
+        return self.finish(request, response, state)
+
+    async def __acall__(self, request):
+        if not self.options["ENABLED"]:
+            return await self.get_response(request)
+        state = self.start()
+        try:
+            response = await self.get_response(request)
+        except BaseException:
+            _current.reset(state[2])
+            IN_FLIGHT.dec()
+            raise
+        return self.finish(request, response, state)
+
+
+def can_scrape(request):
+    token = get_options()["TOKEN"]
+    if token:
+        return hmac.compare_digest(request.META.get("HTTP_AUTHORIZATION", ""), f"Bearer {token}")
+    user = getattr(request, "user", None)
+    return settings.DEBUG or bool(user and user.is_active and user.is_staff)
+
+
+def render():
+    return REGISTRY.render()
@@ -0,0 +1,25 @@
+# Generated by Django 5.2 on 2026-10-18 00:44
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0004_queuedemail'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='pickuprequest',
+            index=models.Index(fields=['created_at', 'id'], name='pickup_created_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='pickuprequest',
+            index=models.Index(fields=['email', 'created_at'], name='pickup_email_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='pickuprequest',
+            index=models.Index(fields=['phone'], name='pickup_phone_idx'),
+        ),
+    ]
@@ -0,0 +1,28 @@
+from django.db import migrations
+
+from core import search
+
+
+def create_indexes(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    for table in search.INDEXES:
+        for sql in search.create_sql(table, vendor):
+            schema_editor.execute(sql)
+
+
+def drop_indexes(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    for table in search.INDEXES:
+        for sql in search.drop_sql(table, vendor):
+            schema_editor.execute(sql)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0005_pickuprequest_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_indexes, drop_indexes),
+    ]
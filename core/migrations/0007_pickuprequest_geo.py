@@ -0,0 +1,62 @@
+# Generated by Django 5.2 on 2026-10-18 01:30
+
+from django.db import migrations, models
+
+from core import search
+
+TABLE = "core_pickuprequest"
+
+
+# SQLite's AddField rebuilds the table, which drops the full-text triggers
+# from 0006; take the index down first and put it back (rebuilt) afterwards.
+def drop_sqlite_fts(apps, schema_editor):
+    if schema_editor.connection.vendor == "sqlite":
+        for sql in search.drop_sql(TABLE, "sqlite"):
+            schema_editor.execute(sql)
+
+
+def create_sqlite_fts(apps, schema_editor):
+    if schema_editor.connection.vendor == "sqlite":
+        for sql in search.create_sql(TABLE, "sqlite"):
+            schema_editor.execute(sql)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0006_fulltext_search'),
+    ]
+
+    operations = [
+        migrations.RunPython(drop_sqlite_fts, create_sqlite_fts),
+        migrations.AddField(
+            model_name='pickuprequest',
+            name='geohash',
+            field=models.CharField(blank=True, max_length=12),
+        ),
+        migrations.AddField(
+            model_name='pickuprequest',
+            name='latitude',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='pickuprequest',
+            name='longitude',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='pickuprequest',
+            name='pincode',
+            field=models.CharField(blank=True, max_length=6),
+        ),
+        migrations.AddField(
+            model_name='pickuprequest',
+            name='status',
+            field=models.CharField(choices=[('pending', 'Pending'), ('scheduled', 'Scheduled'), ('collected', 'Collected')], default='pending', max_length=10),
+        ),
+        migrations.AddIndex(
+            model_name='pickuprequest',
+            index=models.Index(fields=['status', 'geohash'], name='pickup_status_geohash_idx'),
+        ),
+        migrations.RunPython(create_sqlite_fts, drop_sqlite_fts),
+    ]
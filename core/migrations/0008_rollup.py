@@ -0,0 +1,34 @@
+# Generated by Django 5.2 on 2026-10-18 01:46
+
+from django.db import migrations, models
+
+from core import rollups
+
+
+# Start from the current counts so incremental updates have a base to add to.
+def seed_rollups(apps, schema_editor):
+    rollups.refresh(days=0, apps=apps)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0007_pickuprequest_geo'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Rollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('metric', models.CharField(max_length=40)),
+                ('period', models.CharField(choices=[('hour', 'Hour'), ('day', 'Day'), ('total', 'Total')], max_length=5)),
+                ('bucket', models.DateTimeField()),
+                ('count', models.BigIntegerField(default=0)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('metric', 'period', 'bucket'), name='rollup_metric_period_bucket_uniq')],
+            },
+        ),
+        migrations.RunPython(seed_rollups, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 5.2 on 2026-10-18 01:53
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0008_rollup'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Event',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(max_length=20)),
+                ('created_at', models.DateTimeField()),
+                ('data', models.JSONField()),
+            ],
+            options={
+                'indexes': [models.Index(fields=['kind', 'created_at'], name='event_kind_created_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,25 @@
+from django.db import migrations
+
+from core import search
+
+
+# 0006 built the PostgreSQL search_vector from the default parser, which keeps
+# an email address as one lexeme. Recreate it with the current definition.
+# SQLite's FTS5 index already splits on punctuation and is left alone.
+def rebuild_postgres_vectors(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    for table in search.INDEXES:
+        for sql in search.drop_sql(table, "postgresql") + search.create_sql(table, "postgresql"):
+            schema_editor.execute(sql)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0009_event'),
+    ]
+
+    operations = [
+        migrations.RunPython(rebuild_postgres_vectors, migrations.RunPython.noop),
+    ]
@@ -3,16 +3,57 @@
 from django.db import models
 from django.contrib.auth.models import User
 
+from . import geo
+
 class PickupRequest(models.Model):
+    PENDING = "pending"
+    SCHEDULED = "scheduled"
+    COLLECTED = "collected"
+    STATUS_CHOICES = [
+        (PENDING, "Pending"),
+        (SCHEDULED, "Scheduled"),
+        (COLLECTED, "Collected"),
+    ]
+
     name = models.CharField(max_length=100)
     email = models.EmailField()
     phone = models.CharField(max_length=15) # Changed from phone_number, simplified max_length
     address = models.TextField() # Consolidated address fields into one
     created_at = models.DateTimeField(auto_now_add=True)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=PENDING)
+    # Filled by core.geo from the PIN code in the address; empty/null if unknown.
+    pincode = models.CharField(max_length=6, blank=True)
+    latitude = models.FloatField(null=True, blank=True)
+    longitude = models.FloatField(null=True, blank=True)
+    geohash = models.CharField(max_length=12, blank=True)
+
+    class Meta:
+        indexes = [
+            # Keyset pagination and the admin date filter.
+            models.Index(fields=["created_at", "id"], name="pickup_created_id_idx"),
+            models.Index(fields=["email", "created_at"], name="pickup_email_created_idx"),
+            models.Index(fields=["phone"], name="pickup_phone_idx"),
+            # "Pending pickups near a depot": geohash prefix ranges per status.
+            models.Index(fields=["status", "geohash"], name="pickup_status_geohash_idx"),
+        ]
 
     def __str__(self):
         return f"{self.name} - {self.phone}"
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # core.rollups moves a pickup between status counts when this changes.
+        instance._loaded_status = instance.__dict__.get("status")
+        return instance
+
+    def save(self, *args, **kwargs):
+        # Coordinates set by hand are kept unless the address's PIN changes.
+        if self.latitude is None or geo.find_pincode(self.address) != (self.pincode or None):
+            geo.geocode(self)
+        self.geohash = geo.encode(self.latitude, self.longitude) if self.latitude is not None else ""
+        super().save(*args, **kwargs)
+
 # Keep your ContactMessage model as it was:
 class ContactMessage(models.Model):
     name = models.CharField(max_length=100)
@@ -25,5 +66,77 @@ class ContactMessage(models.Model):
     def __str__(self):
         return f"Message from {self.name} - {self.subject or 'No Subject'}"
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # core.rollups keeps the unread backlog from this.
+        instance._loaded_read = instance.__dict__.get("read")
+        return instance
+
     class Meta:
-        ordering = ['-submitted_at']
\ No newline at end of file
+        ordering = ['-submitted_at']
+
+# Outgoing mail is written here and sent by core.mail_queue, never in the request.
+class QueuedEmail(models.Model):
+    PENDING = "pending"
+    SENDING = "sending"
+    SENT = "sent"
+    FAILED = "failed"
+    STATUS_CHOICES = [
+        (PENDING, "Pending"),
+        (SENDING, "Sending"),
+        (SENT, "Sent"),
+        (FAILED, "Failed"),
+    ]
+
+    to = models.CharField(max_length=254)
+    subject = models.CharField(max_length=200)
+    body = models.TextField()
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=PENDING)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    available_at = models.DateTimeField()  # next attempt, or lease expiry while sending
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [models.Index(fields=["status", "available_at"])]
+
+    def __str__(self):
+        return f"{self.subject} -> {self.to} ({self.status})"
+
+# Pre-aggregated counts maintained by core.rollups; the admin dashboard reads only these.
+class Rollup(models.Model):
+    HOUR = "hour"
+    DAY = "day"
+    TOTAL = "total"
+    PERIOD_CHOICES = [
+        (HOUR, "Hour"),
+        (DAY, "Day"),
+        (TOTAL, "Total"),
+    ]
+
+    metric = models.CharField(max_length=40)
+    period = models.CharField(max_length=5, choices=PERIOD_CHOICES)
+    bucket = models.DateTimeField()  # start of the hour/day (local time); a fixed date for totals
+    count = models.BigIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["metric", "period", "bucket"], name="rollup_metric_period_bucket_uniq"),
+        ]
+
+    def __str__(self):
+        return f"{self.metric} {self.period} {self.bucket:%Y-%m-%d %H:%M}: {self.count}"
+
+# Detection and chatbot events, written in batches by core.events.
+class Event(models.Model):
+    kind = models.CharField(max_length=20)
+    created_at = models.DateTimeField()  # when it happened, not when it was flushed
+    data = models.JSONField()
+
+    class Meta:
+        indexes = [models.Index(fields=["kind", "created_at"], name="event_kind_created_idx")]
+
+    def __str__(self):
+        return f"{self.kind} at {self.created_at:%Y-%m-%d %H:%M:%S}"
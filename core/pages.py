@@ -0,0 +1,215 @@
+"""
+Pre-rendered marketing pages.
+
+The static pages have no per-request data, so each template is rendered once
+and the bytes are reused until the template file changes (its mtime is part
+of the key). Pages can also be rendered at deploy time with
+``manage.py prerender_pages``; workers then load the files from
+``PAGE_CACHE["DIR"]`` instead of rendering at all.
+
+Responses carry a strong ETag, Last-Modified and Cache-Control, and
+conditional GETs are answered with an empty 304. Each page also keeps gzip
+and (with the Brotli package) br variants compressed once at render time,
+served to clients that accept them with a per-encoding ETag.
+"""
+
+import gzip
+import hashlib
+import json
+import os
+import threading
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from django.conf import settings
+from django.http import HttpResponse
+from django.shortcuts import render
+from django.template.loader import get_template, render_to_string
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+from django.utils.http import http_date
+
+from . import metrics
+
+# Templates without csrf tokens, forms or messages; safe to share between users.
+CACHEABLE_TEMPLATES = (
+    "index.html",
+    "services.html",
+    "about.html",
+    "team.html",
+    "detection.html",
+    "dd.html",
+    "re.html",
+    "ewaste-camera.html",
+)
+
+DEFAULTS = {
+    "ENABLED": True,
+    "MAX_AGE": 300,
+    "DIR": None,
+}
+
+MANIFEST_NAME = "manifest.json"
+
+ENCODING_SUFFIXES = {"gzip": "gz", "br": "br"}
+
+
+@dataclass(frozen=True)
+class CachedPage:
+    body: bytes
+    etag: str
+    last_modified: int
+    # Content-Encoding -> compressed body; only variants smaller than body.
+    encoded: dict = field(default_factory=dict)
+
+    def variant(self, encodings):
+        """``(body, etag, content-encoding)`` for the best encoding the client accepts."""
+        for encoding in ("br", "gzip"):
+            if encoding in encodings and encoding in self.encoded:
+                return self.encoded[encoding], f'{self.etag[:-1]}-{encoding}"', encoding
+        return self.body, self.etag, None
+
+
+def get_options():
+    return {**DEFAULTS, **getattr(settings, "PAGE_CACHE", {})}
+
+
+def template_mtime(template_name):
+    return int(os.stat(get_template(template_name).origin.name).st_mtime)
+
+
+@metrics.timed("compress")
+def compress(body):
+    """Pre-compressed variants of ``body`` keyed by Content-Encoding."""
+    variants = {"gzip": gzip.compress(body, compresslevel=9, mtime=0)}
+    try:
+        import brotli
+    except ImportError:
+        pass
+    else:
+        variants["br"] = brotli.compress(body, quality=11)
+    return {encoding: data for encoding, data in variants.items() if len(data) < len(body)}
+
+
+def accepted_encodings(header):
+    """Content codings from an Accept-Encoding header, minus any with q=0."""
+    encodings = set()
+    for part in header.split(","):
+        coding, _, params = part.partition(";")
+        params = params.strip().replace(" ", "")
+        if params.startswith("q="):
+            try:
+                if float(params[2:]) <= 0:
+                    continue
+            except ValueError:
+                continue
+        encodings.add(coding.strip().lower())
+    return encodings
+
+
+@metrics.timed("render")
+def render_page(template_name, mtime=None):
+    body = render_to_string(template_name).encode()
+    etag = '"%s"' % hashlib.sha256(body).hexdigest()[:32]
+    mtime = template_mtime(template_name) if mtime is None else mtime
+    return CachedPage(body, etag, mtime, compress(body))
+
+
+class PageCache:
+
+    def __init__(self, directory=None):
+        self.directory = Path(directory) if directory else None
+        self._pages = {}
+        self._lock = threading.Lock()
+
+    def _load_prerendered(self, template_name, mtime):
+        if self.directory is None:
+            return None
+        try:
+            with open(self.directory / MANIFEST_NAME, encoding="utf-8") as fh:
+                entry = json.load(fh).get(template_name)
+            if not entry or entry["mtime"] != mtime:
+                return None
+            body = (self.directory / template_name).read_bytes()
+            encoded = {
+                encoding: (self.directory / f"{template_name}.{suffix}").read_bytes()
+                for encoding, suffix in entry.get("encodings", {}).items()
+            }
+        except (OSError, ValueError):
+            return None
+        return CachedPage(body, entry["etag"], mtime, encoded)
+
+    def get(self, template_name):
+        mtime = template_mtime(template_name)
+        page = self._pages.get(template_name)
+        if page is not None and page.last_modified == mtime:
+            return page
+
+        with self._lock:
+            page = self._pages.get(template_name)
+            if page is None or page.last_modified != mtime:
+                page = self._load_prerendered(template_name, mtime) or render_page(template_name, mtime)
+                self._pages[template_name] = page
+            return page
+
+    def warm(self, template_names=CACHEABLE_TEMPLATES):
+        return {name: self.get(name) for name in template_names}
+
+    def clear(self):
+        with self._lock:
+            self._pages.clear()
+
+
+def write_prerendered(directory, template_names=CACHEABLE_TEMPLATES):
+    """Render pages into ``directory`` with a manifest of template mtimes and ETags."""
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    manifest = {}
+    for name in template_names:
+        page = render_page(name)
+        (directory / name).write_bytes(page.body)
+        encodings = {}
+        for encoding, data in page.encoded.items():
+            suffix = ENCODING_SUFFIXES[encoding]
+            (directory / f"{name}.{suffix}").write_bytes(data)
+            encodings[encoding] = suffix
+        manifest[name] = {
+            "mtime": page.last_modified, "etag": page.etag, "bytes": len(page.body), "encodings": encodings,
+        }
+    with open(directory / MANIFEST_NAME, "w", encoding="utf-8") as fh:
+        json.dump(manifest, fh, indent=2)
+    return manifest
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_cache():
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = PageCache(get_options()["DIR"])
+    return _cache
+
+
+def cached_page(request, template_name):
+    """Serve ``template_name`` from the page cache, honouring conditional GETs."""
+    options = get_options()
+    if not options["ENABLED"] or request.method not in ("GET", "HEAD"):
+        return render(request, template_name)
+
+    page = get_cache().get(template_name)
+    body, etag, encoding = page.variant(accepted_encodings(request.headers.get("Accept-Encoding", "")))
+    response = get_conditional_response(
+        request, etag=etag, last_modified=page.last_modified,
+    )
+    if response is None:
+        response = HttpResponse(body)
+        if encoding:
+            response["Content-Encoding"] = encoding
+    patch_vary_headers(response, ("Accept-Encoding",))
+    response["ETag"] = etag
+    response["Last-Modified"] = http_date(page.last_modified)
+    patch_cache_control(response, public=True, max_age=options["MAX_AGE"])
+    return response
@@ -0,0 +1,94 @@
+"""
+Keyset pagination on ``(created_at, id)``.
+
+DRF's ``CursorPagination`` keys on a single field and falls back to an
+offset for ties. Here the cursor carries both columns, so every page is one
+range scan on the ``(created_at, id)`` index, however deep the page:
+
+    WHERE created_at <= :ts AND (created_at < :ts OR id < :id)
+    ORDER BY created_at DESC, id DESC LIMIT :n
+
+The leading ``created_at <=`` bound is what lets SQLite and PostgreSQL seek
+into the index instead of scanning it from the top and filtering.
+"""
+
+import base64
+from urllib.parse import urlencode
+
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+
+
+class KeysetPagination(BasePagination):
+    page_size = 50
+    max_page_size = 200
+    cursor_query_param = "cursor"
+    page_size_query_param = "page_size"
+    invalid_cursor_message = "Invalid cursor"
+
+    def encode_cursor(self, obj):
+        position = f"{obj.created_at.isoformat()}|{obj.pk}"
+        return base64.urlsafe_b64encode(position.encode()).decode().rstrip("=")
+
+    def decode_cursor(self, cursor):
+        try:
+            padded = cursor + "=" * (-len(cursor) % 4)
+            created_at, pk = base64.urlsafe_b64decode(padded).decode().split("|")
+            created_at, pk = parse_datetime(created_at), int(pk)
+        except (ValueError, UnicodeDecodeError):
+            raise NotFound(self.invalid_cursor_message)
+        if created_at is None:
+            raise NotFound(self.invalid_cursor_message)
+        return created_at, pk
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params.get(self.page_size_query_param, self.page_size))
+        except ValueError:
+            return self.page_size
+        return max(1, min(size, self.max_page_size))
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_size_value = self.get_page_size(request)
+        queryset = queryset.order_by("-created_at", "-pk")
+
+        cursor = request.query_params.get(self.cursor_query_param)
+        if cursor:
+            created_at, pk = self.decode_cursor(cursor)
+            queryset = queryset.filter(created_at__lte=created_at).filter(
+                Q(created_at__lt=created_at) | Q(pk__lt=pk)
+            )
+
+        # One extra row tells us whether there is a next page without a COUNT.
+        rows = list(queryset[:self.page_size_value + 1])
+        self.has_next = len(rows) > self.page_size_value
+        self.page = rows[:self.page_size_value]
+        return self.page
+
+    def get_next_cursor(self):
+        return self.encode_cursor(self.page[-1]) if self.has_next else None
+
+    def get_next_link(self):
+        cursor = self.get_next_cursor()
+        if cursor is None:
+            return None
+        params = {self.cursor_query_param: cursor}
+        if self.page_size_value != self.page_size:
+            params[self.page_size_query_param] = self.page_size_value
+        return self.request.build_absolute_uri(f"{self.request.path}?{urlencode(params)}")
+
+    def get_paginated_response(self, data):
+        return Response({"next": self.get_next_link(), "results": data})
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            "type": "object",
+            "properties": {
+                "next": {"type": "string", "nullable": True, "format": "uri"},
+                "results": schema,
+            },
+        }
@@ -0,0 +1,147 @@
+"""
+Perceptual-hash cache for camera detections.
+
+Users re-submit near-identical frames of the same device. A 64-bit dHash of a
+tiny grayscale thumbnail identifies those frames, and previous results are
+looked up within a Hamming-distance tolerance using multi-index hashing: the
+hash is split into ``max_distance + 1`` chunks, so by pigeonhole any hash
+within tolerance shares at least one chunk exactly with the query.
+"""
+
+import sys
+import threading
+from collections import OrderedDict
+
+from django.conf import settings
+
+from .imaging import BufferReader, ImageRejected
+
+HASH_BITS = 64
+
+DEFAULTS = {
+    "ENABLED": True,
+    "MAX_ENTRIES": 10_000,
+    "MAX_DISTANCE": 4,
+}
+
+
+def dhash(buffer):
+    """Difference hash: compare horizontally adjacent pixels of a 9x8 thumbnail."""
+    from PIL import Image
+
+    try:
+        with Image.open(BufferReader(buffer)) as img:
+            # JPEG decodes at 1/8 scale here; only a few KB of pixels are touched.
+            img.draft("L", (64, 64))
+            small = img.convert("L").resize((9, 8), Image.BILINEAR)
+    except Exception:
+        raise ImageRejected("bad-image-data")
+
+    pixels = small.tobytes()
+    value = 0
+    for row in range(8):
+        offset = row * 9
+        for col in range(8):
+            value = (value << 1) | (pixels[offset + col] < pixels[offset + col + 1])
+    return value
+
+
+def _chunk_spans(chunks):
+    base, extra = divmod(HASH_BITS, chunks)
+    spans, start = [], 0
+    for i in range(chunks):
+        width = base + (1 if i < extra else 0)
+        spans.append((start, (1 << width) - 1))
+        start += width
+    return spans
+
+
+class PHashCache:
+
+    def __init__(self, max_entries=10_000, max_distance=4):
+        self.max_entries = max_entries
+        self.max_distance = max_distance
+        self._spans = _chunk_spans(max_distance + 1)
+        self._entries = OrderedDict()  # hash -> result
+        self._tables = [dict() for _ in self._spans]  # chunk value -> set of hashes
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _chunks(self, value):
+        return [(value >> shift) & mask for shift, mask in self._spans]
+
+    def get(self, value):
+        """Return ``(result, distance)`` for the nearest cached hash, or ``(None, None)``."""
+        with self._lock:
+            best, best_distance = None, None
+            for table, chunk in zip(self._tables, self._chunks(value)):
+                for candidate in table.get(chunk, ()):
+                    distance = (candidate ^ value).bit_count()
+                    if distance <= self.max_distance and (best_distance is None or distance < best_distance):
+                        best, best_distance = candidate, distance
+            if best is None:
+                self.misses += 1
+                return None, None
+            self.hits += 1
+            self._entries.move_to_end(best)
+            return self._entries[best], best_distance
+
+    def put(self, value, result):
+        with self._lock:
+            if value in self._entries:
+                self._entries[value] = result
+                self._entries.move_to_end(value)
+                return
+            self._entries[value] = result
+            for table, chunk in zip(self._tables, self._chunks(value)):
+                table.setdefault(chunk, set()).add(value)
+            while len(self._entries) > self.max_entries:
+                self._evict(next(iter(self._entries)))
+
+    def _evict(self, value):
+        del self._entries[value]
+        for table, chunk in zip(self._tables, self._chunks(value)):
+            bucket = table[chunk]
+            bucket.discard(value)
+            if not bucket:
+                del table[chunk]
+
+    def memory_bytes(self):
+        """Approximate footprint of the index and cached results."""
+        with self._lock:
+            size = sys.getsizeof(self._entries)
+            for value, result in self._entries.items():
+                size += sys.getsizeof(value) + sys.getsizeof(result)
+                size += sum(sys.getsizeof(k) + sys.getsizeof(v) for k, v in result.items())
+            for table in self._tables:
+                size += sys.getsizeof(table)
+                size += sum(sys.getsizeof(k) + sys.getsizeof(v) for k, v in table.items())
+            return size
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "memory_bytes": self.memory_bytes(),
+        }
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_cache():
+    """The worker's shared :class:`PHashCache`, or ``None`` when disabled."""
+    global _cache
+    options = {**DEFAULTS, **getattr(settings, "CAMERA_PHASH_CACHE", {})}
+    if not options["ENABLED"]:
+        return None
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = PHashCache(options["MAX_ENTRIES"], options["MAX_DISTANCE"])
+    return _cache
@@ -0,0 +1,65 @@
+"""
+Lazily built, process-wide clients.
+
+Heavy clients (the Groq SDK pulls in httpx and pydantic; the vision model
+loads ONNX Runtime) are registered here by name with a factory, and built
+the first time :func:`get` asks for them. Worker boot and management commands
+that never call them never import them. The built object is shared by every
+thread in the process; a factory may return ``None`` (e.g. no vision model).
+
+Tests and benchmarks swap an instance in with :func:`override`.
+"""
+
+import threading
+from contextlib import contextmanager
+
+_factories = {}
+_instances = {}
+_lock = threading.RLock()
+_MISSING = object()
+
+
+def register(name, factory):
+    _factories[name] = factory
+
+
+def get(name):
+    instance = _instances.get(name, _MISSING)
+    if instance is _MISSING:
+        with _lock:
+            instance = _instances.get(name, _MISSING)
+            if instance is _MISSING:
+                instance = _instances[name] = _factories[name]()
+    return instance
+
+
+def is_loaded(name):
+    return name in _instances
+
+
+def reset(name=None):
+    """Forget built instances so the next :func:`get` runs the factory again."""
+    with _lock:
+        if name is None:
+            _instances.clear()
+        else:
+            _instances.pop(name, None)
+
+
+@contextmanager
+def override(name, instance):
+    with _lock:
+        previous = _instances.get(name, _MISSING)
+        _instances[name] = instance
+    try:
+        yield instance
+    finally:
+        with _lock:
+            if previous is _MISSING:
+                _instances.pop(name, None)
+            else:
+                _instances[name] = previous
+
+
+def status():
+    return {name: is_loaded(name) for name in _factories}
@@ -0,0 +1,124 @@
+"""
+Failure handling for calls to remote services (Groq).
+
+* :class:`Deadline` - one time budget shared by every attempt of a call, so
+  retries and hedges can never add up to more than the caller allowed.
+* :func:`backoff` - full-jitter exponential delay between retries, so workers
+  that failed together do not retry together.
+* :class:`CircuitBreaker` - after ``threshold`` consecutive failures the
+  breaker opens and calls are refused immediately for ``reset_timeout``
+  seconds; then one trial call is let through (half-open) and its outcome
+  closes or re-opens the breaker. While open, callers fall back in
+  microseconds instead of waiting out a timeout against a degraded service.
+"""
+
+import random
+import threading
+import time
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling a service whose breaker is open."""
+
+
+class DeadlineExceeded(TimeoutError):
+    """The call's time budget ran out before any attempt succeeded."""
+
+
+# ============================================================
+# DEADLINES AND RETRIES
+# ============================================================
+class Deadline:
+
+    def __init__(self, seconds, clock=time.monotonic):
+        self.clock = clock
+        self.expires_at = clock() + seconds
+
+    def remaining(self):
+        return max(0.0, self.expires_at - self.clock())
+
+    @property
+    def expired(self):
+        return self.remaining() <= 0
+
+
+def backoff(attempt, base, cap):
+    """Seconds to wait before retry ``attempt`` (1-based): uniform in [0, min(cap, base * 2**(attempt-1))]."""
+    return random.uniform(0, min(cap, base * 2 ** (attempt - 1)))
+
+
+def is_retryable(exc):
+    """Timeouts, dropped connections, 429 and 5xx are worth another try; other 4xx are not."""
+    import groq
+
+    if isinstance(exc, (groq.APIConnectionError, TimeoutError)):  # includes APITimeoutError
+        return True
+    if isinstance(exc, groq.APIStatusError):
+        return exc.status_code == 429 or exc.status_code >= 500
+    return False
+
+
+# ============================================================
+# CIRCUIT BREAKER
+# ============================================================
+class CircuitBreaker:
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half-open"
+
+    def __init__(self, name, threshold=5, reset_timeout=30.0, clock=time.monotonic):
+        self.name = name
+        self.threshold = threshold
+        self.reset_timeout = reset_timeout
+        self.clock = clock
+        self.failures = 0
+        self.opened_at = None
+        self.trial_running = False
+        self.rejected = 0
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        with self._lock:
+            return self._state()
+
+    def _state(self):
+        if self.opened_at is None:
+            return self.CLOSED
+        if self.clock() - self.opened_at >= self.reset_timeout:
+            return self.HALF_OPEN
+        return self.OPEN
+
+    def allow(self):
+        """Return True if a call may go ahead. In half-open state only one caller gets True."""
+        with self._lock:
+            state = self._state()
+            if state == self.CLOSED:
+                return True
+            if state == self.HALF_OPEN and not self.trial_running:
+                self.trial_running = True
+                return True
+            self.rejected += 1
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self.trial_running = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.trial_running or self.failures >= self.threshold:
+                self.opened_at = self.clock()
+            self.trial_running = False
+
+    def stats(self):
+        with self._lock:
+            return {
+                "name": self.name,
+                "state": self._state(),
+                "failures": self.failures,
+                "rejected": self.rejected,
+            }
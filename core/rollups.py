@@ -0,0 +1,286 @@
+"""
+Pre-aggregated counts for the admin dashboard and changelists.
+
+:class:`~core.models.Rollup` holds one row per (metric, period, bucket):
+
+* ``hour`` and ``day`` buckets (local time) of pickups created and contact
+  messages received. "Pickups this week" is then a sum over seven rows
+  instead of a ``COUNT`` over the table;
+* one ``total`` row per metric for what exists right now: all pickups,
+  pickups per status, all contact messages and the unread backlog.
+
+With ``INCREMENTAL`` on, counts follow every write. Rows saved or deleted
+one at a time are handled by post_save/post_delete signals. The bulk
+paths call :func:`add` themselves: the contact buffer's ``bulk_create``,
+``plan_routes --assign`` and the admin read/unread actions. A change is
+one upsert per touched rollup row, inside the writer's transaction.
+
+With ``INCREMENTAL`` off nothing is written on save, and the
+``refresh_rollups`` command is the only writer (run it from cron). In
+either mode the command rebuilds the last ``REFRESH_DAYS`` of buckets and
+every total from the source tables. That fixes drift from raw SQL or a
+killed worker. It also drops hourly buckets older than ``HOURLY_DAYS``.
+Deleting or archiving rows lowers the totals but never the day buckets,
+so history survives ``archive_old_rows``.
+"""
+
+from collections import Counter
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.apps import apps as django_apps
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Count, F
+from django.db.models.functions import TruncDay, TruncHour
+from django.db.models.signals import post_delete, post_save
+from django.utils import timezone
+
+from .models import ContactMessage, PickupRequest, Rollup
+
+DEFAULTS = {
+    "INCREMENTAL": True,
+    "HOURLY_DAYS": 14,
+    "REFRESH_DAYS": 2,
+    # Changelists count exactly below this many rows, and estimate above it.
+    "EXACT_COUNT_BELOW": 10_000,
+}
+
+
+def get_options():
+    return {**DEFAULTS, **getattr(settings, "ROLLUPS", {})}
+
+
+HOUR, DAY, TOTAL = Rollup.HOUR, Rollup.DAY, Rollup.TOTAL
+TOTAL_BUCKET = datetime(2000, 1, 1, tzinfo=dt_timezone.utc)
+
+PICKUPS = "pickups"
+CONTACTS = "contacts"
+UNREAD = "contacts.unread"
+
+# metric -> (model label, date field) for the bucketed counts.
+SOURCES = {
+    PICKUPS: ("core.PickupRequest", "created_at"),
+    CONTACTS: ("core.ContactMessage", "submitted_at"),
+}
+TOTAL_METRICS = {PickupRequest: PICKUPS, ContactMessage: CONTACTS}
+
+
+def status_metric(status):
+    return f"pickups.{status}"
+
+
+def buckets(when):
+    """(hour, day) bucket starts for an aware datetime, in the current time zone."""
+    hour = timezone.localtime(when).replace(minute=0, second=0, microsecond=0)
+    return hour, hour.replace(hour=0)
+
+
+def created_counts(metric, when):
+    hour, day = buckets(when)
+    return Counter({(metric, HOUR, hour): 1, (metric, DAY, day): 1, (metric, TOTAL, TOTAL_BUCKET): 1})
+
+
+# ============================================================
+# INCREMENTAL UPDATES
+# ============================================================
+def add(deltas):
+    """Apply ``{(metric, period, bucket): n}`` to the rollup rows, creating missing ones."""
+    if not get_options()["INCREMENTAL"]:
+        return
+    rows = [(metric, period, bucket, n) for (metric, period, bucket), n in deltas.items() if n]
+    if not rows:
+        return
+    if connection.vendor in ("sqlite", "postgresql"):
+        qn = connection.ops.quote_name
+        table, count = qn(Rollup._meta.db_table), qn("count")
+        with connection.cursor() as cursor:
+            cursor.executemany(
+                f"INSERT INTO {table} (metric, period, bucket, {count}) VALUES (%s, %s, %s, %s) "
+                f"ON CONFLICT (metric, period, bucket) DO UPDATE SET {count} = {table}.{count} + excluded.{count}",
+                [(m, p, connection.ops.adapt_datetimefield_value(b), n) for m, p, b, n in rows],
+            )
+        return
+    for metric, period, bucket, n in rows:
+        with transaction.atomic():
+            if not Rollup.objects.filter(metric=metric, period=period, bucket=bucket).update(count=F("count") + n):
+                Rollup.objects.create(metric=metric, period=period, bucket=bucket, count=n)
+
+
+def pickups_moved(n, old_status, new_status):
+    """``n`` pickups changed status through ``QuerySet.update()``."""
+    add({(status_metric(old_status), TOTAL, TOTAL_BUCKET): -n, (status_metric(new_status), TOTAL, TOTAL_BUCKET): n})
+
+
+def contacts_marked(n, read):
+    """``n`` unread (or read) messages were marked read (or unread) through ``QuerySet.update()``."""
+    add({(UNREAD, TOTAL, TOTAL_BUCKET): -n if read else n})
+
+
+def contacts_created(messages):
+    deltas = Counter()
+    for message in messages:
+        deltas += created_counts(CONTACTS, message.submitted_at)
+        deltas[UNREAD, TOTAL, TOTAL_BUCKET] += not message.read
+    add(deltas)
+
+
+def _pickup_saved(sender, instance, created=False, raw=False, **kwargs):
+    if raw:
+        return
+    if created:
+        deltas = created_counts(PICKUPS, instance.created_at)
+        deltas[status_metric(instance.status), TOTAL, TOTAL_BUCKET] += 1
+        add(deltas)
+    elif getattr(instance, "_loaded_status", None) not in (None, instance.status):
+        pickups_moved(1, instance._loaded_status, instance.status)
+    instance._loaded_status = instance.status
+
+
+def _pickup_deleted(sender, instance, **kwargs):
+    add({(PICKUPS, TOTAL, TOTAL_BUCKET): -1, (status_metric(instance.status), TOTAL, TOTAL_BUCKET): -1})
+
+
+def _contact_saved(sender, instance, created=False, raw=False, **kwargs):
+    if raw:
+        return
+    if created:
+        contacts_created([instance])
+    elif getattr(instance, "_loaded_read", None) not in (None, instance.read):
+        contacts_marked(1, instance.read)
+    instance._loaded_read = instance.read
+
+
+def _contact_deleted(sender, instance, **kwargs):
+    add({(CONTACTS, TOTAL, TOTAL_BUCKET): -1, (UNREAD, TOTAL, TOTAL_BUCKET): -(not instance.read)})
+
+
+def connect():
+    """
+    Hook the signals (from ``CoreConfig.ready``). Skipped when not
+    incremental, because a delete receiver makes Django load every row it
+    deletes.
+    """
+    if not get_options()["INCREMENTAL"]:
+        return
+    post_save.connect(_pickup_saved, sender=PickupRequest, dispatch_uid="rollups.pickup_saved")
+    post_delete.connect(_pickup_deleted, sender=PickupRequest, dispatch_uid="rollups.pickup_deleted")
+    post_save.connect(_contact_saved, sender=ContactMessage, dispatch_uid="rollups.contact_saved")
+    post_delete.connect(_contact_deleted, sender=ContactMessage, dispatch_uid="rollups.contact_deleted")
+
+
+# ============================================================
+# REBUILD
+# ============================================================
+def refresh(days=None, now=None, apps=django_apps):
+    """
+    Recount the last ``days`` days of buckets (all of them with ``days=0``)
+    and every total from the source tables, in one transaction. Returns
+    the number of rollup rows written. ``apps`` lets migrations pass their
+    historical models.
+    """
+    options = get_options()
+    days = options["REFRESH_DAYS"] if days is None else days
+    now = now or timezone.now()
+    since = buckets(now)[1] - timedelta(days=days - 1) if days else None
+    hourly_since = buckets(now)[0] - timedelta(days=options["HOURLY_DAYS"])
+    rollup = apps.get_model("core", "Rollup")
+    rows = []
+
+    with transaction.atomic():
+        for metric, (label, field) in SOURCES.items():
+            model = apps.get_model(label)
+            recent = model.objects.order_by()
+            if since is not None:
+                recent = recent.filter(**{f"{field}__gte": since})
+            for period, trunc, source in (
+                (HOUR, TruncHour, recent.filter(**{f"{field}__gte": hourly_since})),
+                (DAY, TruncDay, recent),
+            ):
+                counts = source.annotate(bucket=trunc(field)).values("bucket").annotate(n=Count("pk"))
+                rows += [rollup(metric=metric, period=period, bucket=c["bucket"], count=c["n"]) for c in counts]
+            rows.append(rollup(metric=metric, period=TOTAL, bucket=TOTAL_BUCKET, count=model.objects.count()))
+
+        statuses = dict.fromkeys((value for value, _ in PickupRequest.STATUS_CHOICES), 0)
+        pickups = apps.get_model("core", "PickupRequest").objects.order_by()
+        statuses.update(pickups.values_list("status").annotate(Count("pk")))
+        rows += [rollup(metric=status_metric(s), period=TOTAL, bucket=TOTAL_BUCKET, count=n) for s, n in statuses.items()]
+        unread = apps.get_model("core", "ContactMessage").objects.filter(read=False).count()
+        rows.append(rollup(metric=UNREAD, period=TOTAL, bucket=TOTAL_BUCKET, count=unread))
+
+        stale = rollup.objects.filter(period__in=(HOUR, DAY))
+        if since is not None:
+            stale = stale.filter(bucket__gte=since)
+        stale.delete()
+        rollup.objects.filter(period=TOTAL).delete()
+        rollup.objects.filter(period=HOUR, bucket__lt=hourly_since).delete()
+        rollup.objects.bulk_create(rows, batch_size=500)
+    return len(rows)
+
+
+# ============================================================
+# READING
+# ============================================================
+def totals():
+    return dict(Rollup.objects.filter(period=TOTAL).values_list("metric", "count"))
+
+
+def series(metrics, period, start, end):
+    """``[(bucket, {metric: count})]`` for every bucket in [start, end), zero-filled."""
+    step = timedelta(hours=1) if period == HOUR else timedelta(days=1)
+    found = {}
+    for metric, bucket, n in Rollup.objects.filter(
+        metric__in=metrics, period=period, bucket__gte=start, bucket__lt=end,
+    ).values_list("metric", "bucket", "count"):
+        found[metric, timezone.localtime(bucket)] = n
+    out = []
+    bucket = start
+    while bucket < end:
+        out.append((bucket, {metric: found.get((metric, bucket), 0) for metric in metrics}))
+        bucket = timezone.localtime(bucket + step)
+    return out
+
+
+def dashboard(now=None, hours=48, days=14, weeks=8):
+    """Everything the admin dashboard shows, from three rollup queries."""
+    now = now or timezone.now()
+    hour, today = buckets(now)
+    metrics = (PICKUPS, CONTACTS)
+    hourly = series(metrics, HOUR, hour - timedelta(hours=hours - 1), hour + timedelta(hours=1))
+
+    week_start = today - timedelta(days=today.weekday() + 7 * (weeks - 1))
+    daily = series(metrics, DAY, week_start, today + timedelta(days=1))
+    weekly = {}
+    for day, counts in daily:
+        monday = day - timedelta(days=day.weekday())
+        weekly.setdefault(monday, Counter()).update(counts)
+    return {
+        "totals": totals(),
+        "hourly": hourly,
+        "daily": daily[-days:],
+        "weekly": [(monday, {metric: counts[metric] for metric in metrics}) for monday, counts in weekly.items()],
+    }
+
+
+def estimated_count(queryset):
+    """
+    A changelist's row count without ``COUNT(*)`` over a large table.
+
+    Unfiltered querysets use the rollup total. Filtered ones, on
+    PostgreSQL, use the planner's row estimate. Exact counts are used
+    when the estimate is under ``EXACT_COUNT_BELOW`` or there is none.
+    """
+    exact_below = get_options()["EXACT_COUNT_BELOW"]
+    estimate = None
+    if not queryset.query.where and queryset.model in TOTAL_METRICS:
+        estimate = Rollup.objects.filter(
+            metric=TOTAL_METRICS[queryset.model], period=TOTAL,
+        ).values_list("count", flat=True).first()
+    elif connection.vendor == "postgresql":
+        sql, params = queryset.query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute(f"EXPLAIN (FORMAT JSON) {sql}", params)
+            plan = cursor.fetchone()[0]
+        estimate = int(plan[0]["Plan"]["Plan Rows"])
+    if estimate is None or estimate < exact_below:
+        return queryset.count()
+    return estimate
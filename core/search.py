@@ -0,0 +1,160 @@
+"""
+Full-text search for the admin.
+
+Each indexed table gets a database-native index that the database itself
+keeps in sync, so bulk_create/update()/raw SQL are covered too:
+
+* SQLite - an external-content FTS5 table plus insert/update/delete triggers
+* PostgreSQL - a generated ``tsvector`` column with a GIN index, each
+  column split on non-word characters so both backends see the same words
+
+Other backends fall back to Django's ``icontains`` search.
+
+Queries are reduced to words and every word is matched as a prefix, so
+"asha 9876" finds "Asha Rao, 9876543210". :func:`search` keeps every
+match (the full-text match is a subquery filter). The admin pages through
+matches in its usual order, and :func:`rank_page` scores only the rows on
+the displayed page (with the column weights below) and puts the best first.
+"""
+
+import re
+
+from django.db import connection
+from django.db.models.expressions import RawSQL
+
+# table -> [(column, weight)]; A ranks highest.
+INDEXES = {
+    "core_pickuprequest": [("name", "A"), ("email", "A"), ("phone", "A"), ("address", "C")],
+    "core_contactmessage": [("name", "A"), ("email", "A"), ("subject", "B"), ("message", "C")],
+}
+
+WEIGHTS = {"A": 10.0, "B": 4.0, "C": 1.0}
+
+_word = re.compile(r"\w+", re.UNICODE)
+
+
+def is_supported(vendor=None):
+    return (vendor or connection.vendor) in ("sqlite", "postgresql")
+
+
+# ============================================================
+# SCHEMA (used by migrations)
+# ============================================================
+def fts_table(table):
+    return f"{table}_fts"
+
+
+def create_sql(table, vendor):
+    columns = INDEXES[table]
+    names = [name for name, _ in columns]
+    if vendor == "sqlite":
+        fts = fts_table(table)
+        cols = ", ".join(names)
+        new = ", ".join(f"new.{name}" for name in names)
+        old = ", ".join(f"old.{name}" for name in names)
+        return [
+            f"CREATE VIRTUAL TABLE {fts} USING fts5({cols}, content='{table}', content_rowid='id', "
+            f"tokenize='unicode61 remove_diacritics 2', prefix='2 3')",
+            f"CREATE TRIGGER {fts}_ai AFTER INSERT ON {table} BEGIN "
+            f"INSERT INTO {fts}(rowid, {cols}) VALUES (new.id, {new}); END",
+            f"CREATE TRIGGER {fts}_ad AFTER DELETE ON {table} BEGIN "
+            f"INSERT INTO {fts}({fts}, rowid, {cols}) VALUES ('delete', old.id, {old}); END",
+            f"CREATE TRIGGER {fts}_au AFTER UPDATE ON {table} BEGIN "
+            f"INSERT INTO {fts}({fts}, rowid, {cols}) VALUES ('delete', old.id, {old}); "
+            f"INSERT INTO {fts}(rowid, {cols}) VALUES (new.id, {new}); END",
+            f"INSERT INTO {fts}({fts}) VALUES ('rebuild')",
+        ]
+    if vendor == "postgresql":
+        # The default parser keeps "kavya.rao@example.com" as one lexeme, so
+        # "rao" or "example" would never match it. Split every column on
+        # non-word characters first, the way FTS5's unicode61 tokenizer does.
+        vector = " || ".join(
+            f"setweight(to_tsvector('simple', regexp_replace(coalesce({name}, ''), '\\W+', ' ', 'g')), "
+            f"'{weight}')"
+            for name, weight in columns
+        )
+        return [
+            f"ALTER TABLE {table} ADD COLUMN search_vector tsvector "
+            f"GENERATED ALWAYS AS ({vector}) STORED",
+            f"CREATE INDEX {table}_search_idx ON {table} USING GIN (search_vector)",
+        ]
+    return []
+
+
+def drop_sql(table, vendor):
+    if vendor == "sqlite":
+        fts = fts_table(table)
+        return [f"DROP TRIGGER IF EXISTS {fts}_{suffix}" for suffix in ("ai", "ad", "au")] + [
+            f"DROP TABLE IF EXISTS {fts}",
+        ]
+    if vendor == "postgresql":
+        return [
+            f"DROP INDEX IF EXISTS {table}_search_idx",
+            f"ALTER TABLE {table} DROP COLUMN IF EXISTS search_vector",
+        ]
+    return []
+
+
+def rebuild(table):
+    """Re-index every row; only needed on SQLite after restoring a raw dump."""
+    if connection.vendor == "sqlite":
+        fts = fts_table(table)
+        with connection.cursor() as cursor:
+            cursor.execute(f"INSERT INTO {fts}({fts}) VALUES ('rebuild')")
+
+
+# ============================================================
+# QUERIES
+# ============================================================
+def parse_terms(text):
+    return _word.findall(text.lower())
+
+
+def match_query(terms):
+    if connection.vendor == "sqlite":
+        return " ".join(f'"{term}"*' for term in terms)
+    return " & ".join(f"{term}:*" for term in terms)
+
+
+def matching_ids(table, text):
+    """``(sql, params)`` selecting the primary key of every row matching ``text``."""
+    query = match_query(parse_terms(text))
+    if connection.vendor == "sqlite":
+        fts = fts_table(table)
+        return f"SELECT rowid FROM {fts} WHERE {fts} MATCH %s", [query]
+    return f"SELECT id FROM {table} WHERE search_vector @@ to_tsquery('simple', %s)", [query]
+
+
+def search(queryset, text):
+    """Filter ``queryset`` to every row matching ``text``; the order is left alone."""
+    if not parse_terms(text):
+        return queryset.none()
+    return queryset.filter(pk__in=RawSQL(*matching_ids(queryset.model._meta.db_table, text)))
+
+
+def score(obj, table, terms):
+    """
+    Relevance of one row: for each column, its weight times the share of its
+    words that start with a search term. Higher is better.
+    """
+    terms = tuple(terms)
+    total = 0.0
+    for column, weight in INDEXES[table]:
+        words = parse_terms(str(getattr(obj, column) or ""))
+        if words:
+            total += WEIGHTS[weight] * sum(word.startswith(terms) for word in words) / len(words)
+    return total
+
+
+def rank_page(objects, text):
+    """
+    ``objects`` (one page of a :func:`search`) best match first; ties keep
+    their order. Scored in Python: bm25 in FTS5 walks every match of each
+    term to weigh the terms, which costs as much as ranking all of them.
+    """
+    objects = list(objects)
+    terms = parse_terms(text)
+    if not objects or not terms:
+        return objects
+    table = objects[0]._meta.db_table
+    return sorted(objects, key=lambda obj: -score(obj, table, terms))
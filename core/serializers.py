@@ -0,0 +1,11 @@
+# ewaste_backend/core/serializers.py
+
+from rest_framework import serializers
+
+from .models import PickupRequest
+
+
+class PickupRequestSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = PickupRequest
+        fields = ['id', 'name', 'email', 'phone', 'address', 'created_at']
@@ -0,0 +1,26 @@
+"""
+Static file storage: content-hashed names plus gzip/Brotli variants.
+
+``collectstatic`` writes ``name.<hash>.ext`` next to each file, ``.gz`` and
+(with the Brotli package installed) ``.br`` copies, and ``staticfiles.json``.
+WhiteNoise then serves the hashed names with ``Cache-Control: immutable`` and
+a ten-year max-age, picks the variant matching ``Accept-Encoding`` and
+answers Range requests.
+
+References to files that do not exist (the templates link a ``styles.css``
+that was never shipped) keep their plain URL instead of failing the page.
+"""
+
+from whitenoise.storage import CompressedManifestStaticFilesStorage
+
+
+class StaticStorage(CompressedManifestStaticFilesStorage):
+    manifest_strict = False
+
+    def hashed_name(self, name, content=None, filename=None):
+        try:
+            return super().hashed_name(name, content, filename)
+        except ValueError:
+            if content is not None or self.exists(filename or name):
+                raise
+            return name
@@ -1,3 +1,1189 @@
-from django.test import TestCase
+import base64
+import csv
+import gzip
+import importlib.util
+import io
+import json
+import math
+import random
+import socket
+import tempfile
+import time
+import unittest
+from datetime import timedelta
+from unittest import mock
 
-# Create your tests here.
+from groq import Groq
+from PIL import Image
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core import mail
+from django.core.cache import caches
+from django.core.management import call_command
+from django.core.signals import request_started
+from django.db import connection
+from django.http import HttpResponse, StreamingHttpResponse
+from django.test import RequestFactory, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from ewaste_backend.database import database_config
+
+from . import (
+    chat_cache, classifier, contact_intake, conversations, dispatch, events, exports, geo, llm, mail_queue, metrics, pages, phash, providers, resilience,
+    rollups, search, throttle, views, vision,
+)
+from .admin import ContactMessageAdmin
+from .models import ContactMessage, Event, PickupRequest, QueuedEmail, Rollup
+from .bench import make_image
+from .fake_groq import FakeGroqServer
+from .forms import ContactForm
+from .management.commands.bench_contact_flood import make_flood
+
+
+def setUpModule():
+    # Requests record events; no flusher thread may write them mid-test.
+    patcher = mock.patch.object(events.EventLog, "_start")
+    patcher.start()
+    unittest.addModuleCleanup(patcher.stop)
+    # Nor a mail worker thread: tests drain the queue themselves.
+    patcher = mock.patch.object(mail_queue, "kick")
+    patcher.start()
+    unittest.addModuleCleanup(patcher.stop)
+
+
+class FakeGroqMixin:
+    reply = "Drop batteries at a certified collection point."
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.groq_server = FakeGroqServer(reply=cls.reply).start()
+        cls.addClassCleanup(cls.groq_server.stop)
+
+    def setUp(self):
+        super().setUp()
+        self.enterContext(providers.override(
+            "groq", Groq(api_key="test", base_url=self.groq_server.base_url, max_retries=0),
+        ))
+        settings_override = override_settings(
+            GROQ_API_KEY="test", GROQ_BASE_URL=self.groq_server.base_url,
+        )
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        cache_patcher = mock.patch.object(chat_cache, "_cache", None)
+        cache_patcher.start()
+        self.addCleanup(cache_patcher.stop)
+        breaker_patcher = mock.patch.object(llm, "_breakers", {})
+        breaker_patcher.start()
+        self.addCleanup(breaker_patcher.stop)
+        store_patcher = mock.patch.object(conversations, "_store", None)
+        store_patcher.start()
+        self.addCleanup(store_patcher.stop)
+
+
+class ChatbotTests(FakeGroqMixin, TestCase):
+
+    def test_chatbot_response(self):
+        response = self.client.post("/api/chatbot/", {"message": "battery?"}, secure=True)
+        self.assertEqual(response.json(), {"response": self.reply, "conversation": mock.ANY})
+
+    async def test_chatbot_stream_sends_tokens_then_done(self):
+        response = await self.async_client.post(
+            "/api/chatbot/stream/", {"message": "battery?"}, secure=True,
+        )
+        self.assertEqual(response["Content-Type"], "text/event-stream")
+        body = b"".join([chunk async for chunk in response.streaming_content]).decode()
+
+        events = [e for e in body.split("\n\n") if e]
+        tokens = [json.loads(e[len("data: "):])["token"] for e in events[:-1]]
+        self.assertEqual("".join(tokens), self.reply)
+        self.assertTrue(events[-1].startswith("event: done"))
+
+    def test_repeated_and_similar_questions_are_cached(self):
+        before = len(self.groq_server.requests)
+        for message in (
+            "Which metals are inside a circuit board?",
+            "which metals are inside a CIRCUIT board",
+            "Which metals are inside circuit boards",
+        ):
+            response = self.client.post("/api/chatbot/", {"message": message}, secure=True)
+            self.assertEqual(response.json(), {"response": self.reply, "conversation": mock.ANY})
+
+        self.assertEqual(len(self.groq_server.requests) - before, 1)
+        stats = chat_cache.get_cache().stats()
+        self.assertEqual((stats["hits"], stats["similar_hits"], stats["misses"]), (1, 1, 1))
+
+    def test_faq_answers_without_llm(self):
+        before = len(self.groq_server.requests)
+        response = self.client.post(
+            "/api/chatbot/", {"message": "How do I recycle a laptop battery?"}, secure=True,
+        )
+        entry = next(e for e in views.FAQ_INDEX.entries if e.id == "recycle-battery")
+        self.assertEqual(response.json(), {"response": entry.answer, "conversation": mock.ANY})
+        self.assertEqual(len(self.groq_server.requests), before)
+
+
+class ConversationTests(FakeGroqMixin, TestCase):
+
+    def ask(self, message, conversation=None):
+        data = {"message": message}
+        if conversation:
+            data["conversation"] = conversation
+        return self.client.post("/api/chatbot/", data, secure=True).json()
+
+    def test_follow_up_sends_history_and_skips_response_cache(self):
+        before = len(self.groq_server.requests)
+        first = self.ask("Which metals are inside a circuit board?")
+        self.ask("Which metals are inside a circuit board?", first["conversation"])
+
+        messages = self.groq_server.requests[-1]["messages"]
+        self.assertEqual(len(self.groq_server.requests) - before, 2)
+        self.assertEqual(messages[0], llm.SYSTEM_MESSAGE)
+        self.assertEqual([m["role"] for m in messages[1:]], ["user", "assistant", "user"])
+        self.assertEqual(messages[2]["content"], self.reply)
+
+    def test_unknown_conversation_starts_a_new_one(self):
+        reply = self.ask("Which metals are inside a circuit board?", "expired-conversation-id")
+        self.assertNotEqual(reply["conversation"], "expired-conversation-id")
+        self.assertEqual(len(self.groq_server.requests[-1]["messages"]), 2)
+
+    def test_compaction_keeps_history_within_budget(self):
+        conversation = conversations.Conversation("c" * 16)
+        options = {**conversations.DEFAULTS, "HISTORY_TOKENS": 200, "SUMMARY_TOKENS": 80}
+        answer = "Remove the battery first. " + "Then bring it to a recycler near you. " * 8
+        for n in range(10):
+            conversation.record(f"Question number {n} about recycling?", answer, options)
+
+        self.assertLessEqual(conversation.history_tokens(), 200 + conversations.estimate_tokens(answer))
+        self.assertEqual(conversation.turns[-1][0], "Question number 9 about recycling?")
+        self.assertTrue(conversation.summary)
+        self.assertIn("| You: Remove the battery first.", conversation.summary[-1])
+        restored = conversations.Conversation.from_json(conversation.id, conversation.to_json())
+        self.assertEqual(restored.context(), conversation.context())
+
+
+class LlmResilienceTests(FakeGroqMixin, TestCase):
+
+    def set_server(self, **attrs):
+        for name, value in attrs.items():
+            self.addCleanup(setattr, self.groq_server, name, getattr(self.groq_server, name))
+            setattr(self.groq_server, name, value)
+
+    @override_settings(LLM={"RETRIES": 1, "BACKOFF_BASE": 0, "BREAKER_THRESHOLD": 2, "HEDGE_MODEL": ""})
+    def test_open_breaker_falls_back_without_calling_groq(self):
+        self.set_server(status=503)
+        before = len(self.groq_server.requests)
+        message = "Is a cracked solar panel hazardous to store in a garage?"
+
+        with self.assertLogs("core.views", "ERROR") as logs:
+            response = self.client.post("/api/chatbot/", {"message": message}, secure=True)
+            self.assertEqual(response.json(), {
+                "response": llm.FALLBACK_REPLY, "fallback": True, "conversation": mock.ANY,
+            })
+            self.assertEqual(len(self.groq_server.requests) - before, 2)  # first try + one retry
+            # One failure per call, however many attempts it made.
+            self.assertEqual(llm.get_breaker(llm.CHAT_MODEL).stats()["failures"], 1)
+            self.client.post("/api/chatbot/", {"message": message}, secure=True)
+            self.assertEqual(llm.get_breaker(llm.CHAT_MODEL).state, "open")
+            self.assertEqual(len(self.groq_server.requests) - before, 4)
+
+            start = time.perf_counter()
+            response = self.client.post("/api/chatbot/", {"message": message}, secure=True)
+            self.assertLess(time.perf_counter() - start, 0.05)
+            self.assertTrue(response.json()["fallback"])
+            self.assertEqual(len(self.groq_server.requests) - before, 4)
+        self.assertEqual([r.message for r in logs.records], ["Groq chat failed; sending the fallback reply"] * 3)
+
+    @override_settings(LLM={"BREAKER_THRESHOLD": 1, "HEDGE_MODEL": ""})
+    def test_client_errors_do_not_trip_the_breaker(self):
+        self.set_server(status=400)
+        with self.assertRaises(Exception):
+            llm.complete("What is inside a hard drive?")
+        self.assertEqual(llm.get_breaker(llm.CHAT_MODEL).state, "closed")
+
+    @override_settings(LLM={"HEDGE_MODEL": "hedge-model", "HEDGE_DELAY": 0.05})
+    def test_hedge_model_answers_when_primary_is_slow(self):
+        self.set_server(model_latency={llm.CHAT_MODEL: 1.0})
+        start = time.perf_counter()
+        self.assertEqual(llm.complete("What is inside a hard drive?"), self.reply)
+        self.assertLess(time.perf_counter() - start, 0.5)
+        self.assertIn("hedge-model", [r["model"] for r in self.groq_server.requests])
+
+    @override_settings(LLM={"HEDGE_DELAY": 0.05})
+    def test_hedging_is_off_unless_configured(self):
+        self.set_server(model_latency={llm.CHAT_MODEL: 0.2})
+        before = len(self.groq_server.requests)
+        self.assertEqual(llm.complete("What is inside a hard drive?"), self.reply)
+        self.assertEqual([r["model"] for r in self.groq_server.requests[before:]], [llm.CHAT_MODEL])
+
+    @override_settings(LLM={"DEADLINE": 0.2, "RETRIES": 0, "HEDGE_MODEL": ""})
+    def test_deadline_bounds_a_slow_call(self):
+        self.set_server(latency=1.0)
+        start = time.perf_counter()
+        with self.assertRaises(Exception):
+            llm.complete("What is inside a hard drive?")
+        self.assertLess(time.perf_counter() - start, 0.5)
+
+    def test_breaker_half_open_lets_one_trial_through(self):
+        now = [0.0]
+        breaker = resilience.CircuitBreaker("m", threshold=2, reset_timeout=10, clock=lambda: now[0])
+        breaker.record_failure()
+        self.assertTrue(breaker.allow())
+        breaker.record_failure()
+        self.assertFalse(breaker.allow())
+
+        now[0] = 10.0
+        self.assertTrue(breaker.allow())
+        self.assertFalse(breaker.allow())
+        breaker.record_failure()
+        self.assertEqual(breaker.state, "open")
+
+        now[0] = 20.0
+        self.assertTrue(breaker.allow())
+        breaker.record_success()
+        self.assertEqual(breaker.state, "closed")
+
+
+class ChatResponseCacheTests(TestCase):
+
+    def test_unrelated_question_misses(self):
+        cache = chat_cache.ChatResponseCache()
+        cache.set("How do I recycle a laptop battery?", "battery answer")
+        cache.set("Where can I drop off an old monitor?", "monitor answer")
+        self.assertIsNone(cache.get("How do I recycle a phone charger?"))
+
+    def test_lru_eviction(self):
+        cache = chat_cache.ChatResponseCache({"MAX_ENTRIES": 2})
+        cache.set("laptop", "a")
+        cache.set("monitor", "b")
+        cache.get("laptop")
+        cache.set("charger", "c")
+        self.assertEqual(cache.get("laptop"), "a")
+        self.assertIsNone(cache.get("monitor"))
+
+    def test_ttl_expiry(self):
+        cache = chat_cache.ChatResponseCache({"TTL": 60})
+        cache.set("laptop", "a")
+        with mock.patch("core.chat_cache.time.monotonic", return_value=time.monotonic() + 61):
+            self.assertIsNone(cache.get("laptop"))
+
+
+class FaqIndexTests(TestCase):
+
+    def match(self, message):
+        found = views.FAQ_INDEX.match(message)
+        return found and found.entry.id
+
+    def test_longest_item_phrase_wins(self):
+        self.assertEqual(self.match("How do I recycle a laptop battery?"), "recycle-battery")
+        self.assertEqual(self.match("how to recycle my old laptop"), "recycle-laptop")
+
+    def test_ambiguous_or_unrelated_questions_fall_through(self):
+        self.assertIsNone(self.match("how do I recycle a laptop and a phone"))
+        self.assertIsNone(self.match("best laptop to buy this year"))
+        self.assertIsNone(self.match("recycle"))
+
+    def test_generic_words_alone_do_not_answer(self):
+        for message in (
+            "where can i get a new phone",
+            "my old laptop is slow how to speed it up",
+            "how much do you pay for old laptops",
+            "my phone gets hot while gaming",
+            "do you pick up from bangalore",
+            "do you collect from bangalore",
+            "can I sell my broken tablet",
+        ):
+            self.assertIsNone(self.match(message), message)
+        self.assertEqual(self.match("how do I get rid of my old phone"), "recycle-phone")
+        self.assertEqual(self.match("how do I book a pickup"), "book-pickup")
+        self.assertEqual(self.match("my laptop battery is swollen"), "damaged-battery")
+
+    def test_shipped_faq_is_valid(self):
+        self.assertEqual(views.FAQ_INDEX.validate(views.EWASTE_ITEMS), [])
+        out = io.StringIO()
+        call_command("faq_index", stdout=out)
+        self.assertIn("is valid", out.getvalue())
+
+
+class CameraApiTests(TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.jpeg = make_image(320, 240)
+
+    def post_raw(self, body, **extra):
+        return self.client.post(
+            "/api/camera-detect/?item=phone", body, content_type="image/jpeg", secure=True, **extra,
+        )
+
+    def test_raw_body_upload(self):
+        response = self.post_raw(self.jpeg)
+        self.assertEqual(response.json(), {
+            "detected": "ewaste", "caption": "phone", **classifier.classify("phone").as_dict(),
+        })
+
+    def test_multipart_upload(self):
+        response = self.client.post(
+            "/api/camera-detect/", {"image": io.BytesIO(self.jpeg), "item": "laptop"}, secure=True,
+        )
+        self.assertEqual(response.json()["caption"], "laptop")
+
+    def test_data_url_upload(self):
+        data_url = "data:image/jpeg;base64," + base64.b64encode(self.jpeg).decode()
+        response = self.client.post(
+            "/api/camera-detect/", {"image": data_url, "item": "cable"}, secure=True,
+        )
+        self.assertEqual(response.json()["caption"], "cable")
+
+    @override_settings(CAMERA_MAX_UPLOAD_BYTES=5000)
+    def test_oversize_upload_rejected_before_reading(self):
+        with mock.patch("django.core.handlers.wsgi.WSGIRequest.read") as read:
+            response = self.post_raw(self.jpeg)
+        self.assertEqual(response.status_code, 413)
+        self.assertEqual(response.json()["caption"], "too-large-image")
+        read.assert_not_called()
+
+    def test_rejects_non_image_and_corrupt_data(self):
+        response = self.post_raw(b"GIF89a" + b"\0" * 5000)
+        self.assertEqual(response.json()["caption"], "unsupported-format")
+        response = self.post_raw(self.jpeg[:3] + b"\0" * 5000)
+        self.assertEqual(response.json()["caption"], "bad-image-data")
+
+    def test_batch_reports_per_image_results_in_order(self):
+        response = self.client.post("/api/camera-detect/batch/", {
+            "images": [
+                io.BytesIO(self.jpeg),
+                io.BytesIO(b"not an image" * 500),
+                io.BytesIO(self.jpeg),
+            ],
+            "items": ["laptop", "phone", "sofa"],
+        }, secure=True)
+        results = [(r["detected"], r["caption"]) for r in response.json()["results"]]
+        self.assertEqual(results, [
+            ("ewaste", "laptop"),
+            ("error", "unsupported-format"),
+            ("not-ewaste", "unknown"),
+        ])
+
+    @override_settings(CAMERA_BATCH_MAX_IMAGES=2)
+    def test_batch_rejects_too_many_images(self):
+        response = self.client.post("/api/camera-detect/batch/", {
+            "images": [io.BytesIO(self.jpeg) for _ in range(3)],
+        }, secure=True)
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json(), {"error": "too-many-images"})
+
+
+class KeywordClassifierTests(TestCase):
+
+    def test_every_selectable_item_is_ewaste(self):
+        for item in views.EWASTE_ITEMS:
+            self.assertIsNotNone(classifier.classify(item), item)
+
+    def test_matches_whole_words_and_plurals_only(self):
+        self.assertEqual(classifier.classify("two USB cables").category, "cable")
+        self.assertEqual(classifier.classify("old iPhones").category, "phone")
+        self.assertEqual(classifier.classify("a power bank").hazard, "lithium")
+        self.assertIsNone(classifier.classify("stretching technique"))
+        self.assertEqual(classifier.classify_many(["mice", "sofa"])[1], None)
+
+
+class StubVisionBackend(vision.VisionBackend):
+    """Labels every image by its dominant channel; records batch sizes."""
+
+    LABELS = ("cellular telephone, cellphone", "studio couch, sofa", "laptop, laptop computer")
+
+    def load(self):
+        self.batch_sizes = []
+
+    def predict(self, images):
+        self.batch_sizes.append(len(images))
+        predictions = []
+        for image in images:
+            means = [sum(band.getdata()) for band in image.split()]
+            predictions.append(vision.Prediction(self.LABELS[means.index(max(means))], 0.9))
+        return predictions
+
+
+@override_settings(VISION={"BACKEND": "core.tests.StubVisionBackend", "MAX_WAIT_MS": 50})
+class VisionTests(TestCase):
+
+    def setUp(self):
+        providers.reset("vision")
+        self.addCleanup(providers.reset, "vision")
+        patcher = mock.patch.object(phash, "_cache", None)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def solid_jpeg(self, color, quality=95):
+        """A noisy horizontal gradient tinted towards ``color``."""
+        out = io.BytesIO()
+        gradient = Image.linear_gradient("L").rotate(90).resize((320, 240))
+        noisy = Image.blend(gradient, Image.effect_noise((320, 240), 64), 0.3)
+        Image.merge("RGB", [noisy.point(lambda p, c=c: p * c // 255) for c in color]).save(
+            out, "JPEG", quality=quality,
+        )
+        return out.getvalue()
+
+    # Both test frames share one gradient, so their perceptual hashes match.
+    @override_settings(CAMERA_PHASH_CACHE={"ENABLED": False})
+    def test_model_labels_are_mapped_to_items(self):
+        response = self.client.post(
+            "/api/camera-detect/", self.solid_jpeg((200, 0, 0)),
+            content_type="image/jpeg", secure=True,
+        )
+        self.assertEqual(response.json()["caption"], "phone")
+        self.assertEqual(response.json()["confidence"], 0.9)
+
+        response = self.client.post(
+            "/api/camera-detect/", self.solid_jpeg((0, 200, 0)),
+            content_type="image/jpeg", secure=True,
+        )
+        self.assertEqual(response.json()["detected"], "not-ewaste")
+        self.assertEqual(response.json()["caption"], "studio couch")
+
+    def test_manual_selection_skips_the_model(self):
+        response = self.client.post(
+            "/api/camera-detect/?item=cable", self.solid_jpeg((200, 0, 0)),
+            content_type="image/jpeg", secure=True,
+        )
+        self.assertEqual(response.json()["caption"], "cable")
+        self.assertEqual(vision.get_recognizer().backend.batch_sizes, [])
+
+    def test_concurrent_requests_share_a_batch(self):
+        recognizer = vision.get_recognizer()
+        images = [Image.new("RGB", (8, 8), color) for color in ("red", "blue", "red", "blue")]
+        futures = [recognizer.batcher.submit(image) for image in images]
+        labels = [f.result(timeout=5).label.split(",")[0] for f in futures]
+
+        self.assertEqual(labels, ["cellular telephone", "laptop"] * 2)
+        self.assertEqual(recognizer.backend.batch_sizes, [4])
+
+    def test_near_duplicate_frames_skip_inference(self):
+        for quality in (95, 70):
+            response = self.client.post(
+                "/api/camera-detect/", self.solid_jpeg((200, 0, 0), quality),
+                content_type="image/jpeg", secure=True,
+            )
+            self.assertEqual(response.json()["caption"], "phone")
+
+        self.assertEqual(vision.get_recognizer().backend.batch_sizes, [1])
+        stats = phash.get_cache().stats()
+        self.assertEqual((stats["hits"], stats["misses"]), (1, 1))
+
+
+class PHashCacheTests(TestCase):
+
+    def test_lookup_within_hamming_distance(self):
+        cache = phash.PHashCache(max_entries=10, max_distance=4)
+        base = 0x0F0F_F0F0_1234_ABCD
+        cache.put(base, {"caption": "laptop"})
+        self.assertEqual(cache.get(base ^ 0b1011), ({"caption": "laptop"}, 3))
+        self.assertEqual(cache.get(base ^ 0b11111), (None, None))
+
+    def test_lru_eviction_cleans_the_index(self):
+        cache = phash.PHashCache(max_entries=2, max_distance=2)
+        for value in (0, 0xFFFF_FFFF_0000_0000, 0x0000_0000_FFFF_FFFF):
+            cache.put(value, {"v": value})
+        self.assertEqual(cache.get(0), (None, None))
+        self.assertEqual(sum(len(t) for t in cache._tables), 2 * 3)
+
+
+class PageCacheTests(TestCase):
+
+    def setUp(self):
+        patcher = mock.patch.object(pages, "_cache", None)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_conditional_get_returns_304(self):
+        response = self.client.get("/about/", secure=True)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("public", response["Cache-Control"])
+        self.assertTrue(response["Last-Modified"])
+
+        etag = response["ETag"]
+        response = self.client.get("/about/", HTTP_IF_NONE_MATCH=etag, secure=True)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b"")
+        self.assertEqual(response["ETag"], etag)
+
+    @override_settings(METRICS={"SAMPLE_RATE": 1.0})
+    def test_first_hit_times_render_and_compress_separately(self):
+        timing = self.client.get("/about/", secure=True)["Server-Timing"]
+        self.assertIn("render;dur=", timing)
+        self.assertIn("compress;dur=", timing)
+        self.assertNotIn("compress;dur=", self.client.get("/about/", secure=True)["Server-Timing"])
+
+    def test_rerenders_when_template_changes(self):
+        cache = pages.get_cache()
+        first = cache.get("team.html")
+        self.assertIs(cache.get("team.html"), first)
+
+        with mock.patch.object(pages, "template_mtime", return_value=first.last_modified + 1):
+            second = cache.get("team.html")
+        self.assertIsNot(second, first)
+        self.assertEqual(second.last_modified, first.last_modified + 1)
+
+    def test_serves_prerendered_files(self):
+        with tempfile.TemporaryDirectory() as directory:
+            manifest = pages.write_prerendered(directory, ["re.html"])
+            page = pages.PageCache(directory).get("re.html")
+        self.assertEqual(page.etag, manifest["re.html"]["etag"])
+        self.assertEqual(gzip.decompress(page.encoded["gzip"]), page.body)
+
+    def test_compressed_variant_has_its_own_etag(self):
+        plain = self.client.get("/about/", secure=True)
+        response = self.client.get("/about/", HTTP_ACCEPT_ENCODING="gzip, deflate", secure=True)
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        self.assertIn("Accept-Encoding", response["Vary"])
+        self.assertEqual(gzip.decompress(response.content), plain.content)
+        self.assertNotEqual(response["ETag"], plain["ETag"])
+
+        response = self.client.get(
+            "/about/", HTTP_ACCEPT_ENCODING="gzip", HTTP_IF_NONE_MATCH=response["ETag"], secure=True,
+        )
+        self.assertEqual(response.status_code, 304)
+        refused = self.client.get("/about/", HTTP_ACCEPT_ENCODING="gzip;q=0", secure=True)
+        self.assertNotIn("Content-Encoding", refused)
+
+
+class StaticFilesTests(TestCase):
+
+    def test_collectstatic_hashes_compresses_and_serves_immutable(self):
+        with tempfile.TemporaryDirectory() as source, tempfile.TemporaryDirectory() as root:
+            with open(f"{source}/site.css", "w") as fh:
+                fh.write("body { color: #333; }\n" * 200)
+            with override_settings(
+                STATICFILES_DIRS=[source], STATIC_ROOT=root,
+                STATICFILES_FINDERS=["django.contrib.staticfiles.finders.FileSystemFinder"],
+            ):
+                call_command("collectstatic", interactive=False, verbosity=0)
+                from django.contrib.staticfiles.storage import staticfiles_storage
+
+                url = staticfiles_storage.url("site.css")
+                self.assertRegex(url, r"^/static/site\.[0-9a-f]{12}\.css$")
+                # Missing files keep their plain URL instead of breaking the page.
+                self.assertEqual(staticfiles_storage.url("styles.css"), "/static/styles.css")
+
+                response = self.client.get(url, HTTP_ACCEPT_ENCODING="gzip", secure=True)
+                self.assertEqual(response.status_code, 200)
+                self.assertIn("immutable", response["Cache-Control"])
+                self.assertEqual(response["Content-Encoding"], "gzip")
+
+                response = self.client.get(url, HTTP_RANGE="bytes=0-9", secure=True)
+                self.assertEqual(response.status_code, 206)
+                self.assertEqual(b"".join(response.streaming_content), b"body { col")
+
+
+PICKUP = {"name": "Asha", "email": "asha@example.com", "phone": "9876543210", "address": "12 MG Road"}
+
+
+@override_settings(EMAIL_QUEUE={"WORKER": "command"})
+class PickupQueueTests(TestCase):
+
+    def test_submission_is_saved_and_emails_queued(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post("/reqs/", PICKUP, secure=True)
+        self.assertRedirects(response, "/reqs/", fetch_redirect_response=False)
+        self.assertEqual(PickupRequest.objects.count(), 1)
+        self.assertEqual(len(mail.outbox), 0)
+
+        self.assertEqual(mail_queue.process_queue(), 2)
+        self.assertEqual(sorted(m.to[0] for m in mail.outbox), ["asha@example.com", settings.ADMIN_EMAIL])
+        self.assertFalse(QueuedEmail.objects.exclude(status=QueuedEmail.SENT).exists())
+
+    def test_invalid_submission_is_rejected(self):
+        response = self.client.post("/reqs/", {**PICKUP, "email": "nope"}, secure=True)
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(PickupRequest.objects.exists())
+        self.assertFalse(QueuedEmail.objects.exists())
+
+    def test_batch_uses_one_connection(self):
+        mail_queue.enqueue([(f"user{i}@example.com", "Hi", "Body") for i in range(5)])
+        with mock.patch.object(mail_queue, "get_connection", wraps=mail_queue.get_connection) as get_connection:
+            self.assertEqual(mail_queue.process_queue(), 5)
+        self.assertEqual(get_connection.call_count, 1)
+
+    @override_settings(EMAIL_QUEUE={"WORKER": "thread"})
+    def test_worker_starts_with_the_first_request(self):
+        mail_queue.connect()
+        self.addCleanup(request_started.disconnect, dispatch_uid="mail_queue.start")
+        mail_queue.kick.reset_mock()
+        self.client.get("/about/", secure=True)
+        self.client.get("/about/", secure=True)
+        mail_queue.kick.assert_called_once_with()
+
+    def test_claim_skips_rows_taken_after_select(self):
+        mail_queue.enqueue([(f"user{i}@example.com", "Hi", "Body") for i in range(3)])
+        taken = timezone.now() + timedelta(minutes=5)
+        select = mail_queue._candidates
+
+        def race(due, batch_size):
+            pks = select(due, batch_size)
+            # Another worker claims the first row between our SELECT and UPDATE.
+            QueuedEmail.objects.filter(pk=pks[0]).update(status=QueuedEmail.SENDING, available_at=taken)
+            return pks
+
+        with mock.patch.object(mail_queue, "_candidates", race):
+            rows = mail_queue.claim(10, 60)
+        self.assertEqual([row.to for row in rows], ["user1@example.com", "user2@example.com"])
+        self.assertEqual(QueuedEmail.objects.get(to="user0@example.com").available_at, taken)
+
+    def test_failures_back_off_then_give_up(self):
+        mail_queue.enqueue([("user@example.com", "Hi", "Body")])
+        options = {**mail_queue.get_options(), "MAX_ATTEMPTS": 2}
+        with mock.patch("django.core.mail.backends.locmem.EmailBackend.send_messages", side_effect=OSError("down")):
+            self.assertEqual(mail_queue.process_queue(options), 0)
+            row = QueuedEmail.objects.get()
+            self.assertEqual((row.status, row.attempts), (QueuedEmail.PENDING, 1))
+            self.assertGreater(row.available_at, timezone.now())
+
+            QueuedEmail.objects.update(available_at=timezone.now())
+            mail_queue.process_queue(options)
+        row.refresh_from_db()
+        self.assertEqual((row.status, row.last_error), (QueuedEmail.FAILED, "down"))
+
+    @unittest.skipUnless(importlib.util.find_spec("aiosmtpd"), "aiosmtpd is not installed")
+    def test_sends_over_smtp(self):
+        from aiosmtpd.controller import Controller
+        from aiosmtpd.handlers import Sink
+
+        class Recorder(Sink):
+            messages = []
+
+            async def handle_DATA(self, server, session, envelope):
+                self.messages.append(envelope.rcpt_tos)
+                return "250 OK"
+
+        with socket.socket() as sock:
+            sock.bind(("127.0.0.1", 0))
+            port = sock.getsockname()[1]
+        handler = Recorder()
+        controller = Controller(handler, hostname="127.0.0.1", port=port)
+        controller.start()
+        self.addCleanup(controller.stop)
+
+        mail_queue.enqueue([("a@example.com", "Hi", "Body"), ("b@example.com", "Hi", "Body")])
+        with override_settings(
+            EMAIL_BACKEND="django.core.mail.backends.smtp.EmailBackend",
+            EMAIL_HOST="127.0.0.1", EMAIL_PORT=port,
+            EMAIL_USE_TLS=False, EMAIL_HOST_USER="", EMAIL_HOST_PASSWORD="",
+        ):
+            self.assertEqual(mail_queue.process_queue(), 2)
+        self.assertEqual(handler.messages, [["a@example.com"], ["b@example.com"]])
+
+
+CONTACT = {
+    "name": "Ravi", "email": "ravi@example.com", "subject": "Pickup",
+    "message": "Hi, I have two old laptops and a CRT monitor to recycle. Can you collect them from Madhapur?",
+}
+
+
+class ContactIntakeTests(TestCase):
+
+    def setUp(self):
+        self.buffer = contact_intake.ContactBuffer(batch_size=3, flush_interval=3600)
+        for patcher in (
+            mock.patch.object(contact_intake, "_buffer", self.buffer),
+            mock.patch.object(contact_intake, "_recent", contact_intake.NearDuplicateIndex(600)),
+            mock.patch.object(self.buffer, "_start"),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        caches["default"].clear()
+
+    def post(self, **fields):
+        return self.client.post("/contact/", {**CONTACT, **fields}, secure=True)
+
+    def test_accepted_messages_are_written_in_batches(self):
+        for i in range(2):
+            response = self.post(email=f"user{i}@example.com", message=f"{CONTACT['message']} Flat {i * 37}, block {i}.")
+            self.assertRedirects(response, "/contact/", fetch_redirect_response=False)
+        self.assertEqual((ContactMessage.objects.count(), self.buffer.pending()), (0, 2))
+
+        self.post(email="user9@example.com", message="Do you take old fridges too?")
+        self.assertEqual((ContactMessage.objects.count(), self.buffer.pending()), (3, 0))
+
+    def test_duplicates_and_near_duplicates_are_dropped(self):
+        self.post()
+        self.post()
+        self.post(email="other@example.com", message=CONTACT["message"] + " Thanks")
+        self.buffer.flush()
+        self.assertEqual(ContactMessage.objects.count(), 1)
+
+    def test_spam_is_dropped_without_telling_the_sender(self):
+        spam = "Guaranteed SEO backlinks for your website ranking! Visit http://seo.example.xyz now!!!!"
+        self.assertGreater(contact_intake.SPAM_MODEL.score("Bot", "", spam), 0.8)
+        self.assertLess(contact_intake.SPAM_MODEL.score(CONTACT["name"], "", CONTACT["message"]), 0.2)
+
+        response = self.post(message=spam)
+        self.assertRedirects(response, "/contact/", fetch_redirect_response=False)
+        self.buffer.flush()
+        self.assertFalse(ContactMessage.objects.exists())
+
+    def test_invalid_submission_is_rejected(self):
+        response = self.post(email="nope")
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(self.buffer.pending(), 0)
+
+    def test_flood_costs_one_insert_per_batch(self):
+        flood = make_flood(120, {"unique": 0.4, "duplicate": 0.2, "near": 0.2, "spam": 0.2})
+        forms = [ContactForm(data) for _, data in flood]
+        self.assertTrue(all(form.is_valid() for form in forms))
+        with CaptureQueriesContext(connection) as queries:
+            outcomes = [contact_intake.submit(form) for form in forms]
+            self.buffer.flush()
+        accepted = outcomes.count(contact_intake.ACCEPTED)
+        self.assertEqual(accepted, sum(kind == "unique" for kind, _ in flood))
+        self.assertEqual(ContactMessage.objects.count(), accepted)
+        inserts = [q for q in queries if q["sql"].startswith('INSERT INTO "core_contactmessage"')]
+        self.assertEqual(len(inserts), math.ceil(accepted / 3))
+
+
+class PickupListingTests(TestCase):
+
+    def setUp(self):
+        self.staff = User.objects.create_user("staff", password="pw", is_staff=True)
+        now = timezone.now()
+        PickupRequest.objects.bulk_create([
+            PickupRequest(name=f"user{i}", email=f"u{i}@example.com", phone="1", address="x")
+            for i in range(7)
+        ])
+        # Two timestamp ties so the id tie-breaker is exercised.
+        for i, pk in enumerate(PickupRequest.objects.order_by("pk").values_list("pk", flat=True)):
+            PickupRequest.objects.filter(pk=pk).update(created_at=now - timedelta(minutes=i // 3))
+
+    def test_cursor_walks_every_row_once(self):
+        self.client.force_login(self.staff)
+        seen, url = [], "/api/pickups/?page_size=3"
+        while url:
+            body = self.client.get(url, secure=True).json()
+            seen += [row["id"] for row in body["results"]]
+            url = body["next"]
+        expected = list(PickupRequest.objects.order_by("-created_at", "-id").values_list("id", flat=True))
+        self.assertEqual(seen, expected)
+
+    def test_requires_staff(self):
+        self.assertEqual(self.client.get("/api/pickups/", secure=True).status_code, 403)
+        self.assertEqual(self.client.get("/api/pickups/?cursor=bogus", secure=True).status_code, 403)
+        self.client.force_login(self.staff)
+        self.assertEqual(self.client.get("/api/pickups/?cursor=bogus", secure=True).status_code, 404)
+
+    def test_listing_page(self):
+        self.client.force_login(self.staff)
+        response = self.client.get("/pickups/", secure=True)
+        self.assertEqual(len(response.context["pickup_requests"]), 7)
+        self.assertIsNone(response.context["next_cursor"])
+
+    def test_bad_cursor_is_404_on_page_and_api(self):
+        self.client.force_login(self.staff)
+        for cursor in ("garbage", "bm9waXBl", "%FF"):
+            self.assertEqual(self.client.get(f"/pickups/?cursor={cursor}", secure=True).status_code, 404)
+            self.assertEqual(self.client.get(f"/api/pickups/?cursor={cursor}", secure=True).status_code, 404)
+
+
+class DispatchTests(TestCase):
+    DEPOT = (17.3850, 78.4867)
+
+    def test_address_pin_code_is_geocoded_on_save(self):
+        pickup = PickupRequest.objects.create(**{**PICKUP, "address": "4 Hitech Road, Madhapur, Hyderabad 500 081"})
+        self.assertEqual(pickup.pincode, "500081")
+        self.assertAlmostEqual(pickup.latitude, geo.PINCODES["500081"][0])
+        self.assertEqual(pickup.geohash, geo.encode(pickup.latitude, pickup.longitude))
+
+        unknown = PickupRequest.objects.create(**PICKUP)
+        self.assertEqual((unknown.pincode, unknown.latitude, unknown.geohash), ("", None, ""))
+
+    def test_geohash_matches_reference_encoding(self):
+        self.assertEqual(geo.encode(42.6, -5.6, 5), "ezs42")
+        self.assertEqual(geo.encode(57.64911, 10.40744, 11), "u4pruydqqvj")
+
+    def test_prefix_ranges_hold_in_any_collation_that_orders_base32(self):
+        self.assertEqual(geo.prefix_range("tepz"), ("tepz", "teq"))
+        self.assertEqual(geo.prefix_range("zz"), ("zz", None))
+        # Compare by alphabet position, not by this database's (or Python's) string order.
+        position = lambda s: [geo._BASE32.index(c) for c in s]
+        rng = random.Random(3)
+        hashes = ["".join(rng.choice(geo._BASE32) for _ in range(5)) for _ in range(2000)] + ["tepz", "teq00", "tep"]
+        for cell in ("tepz", "te", "9", "zz", "0z"):
+            low, high = geo.prefix_range(cell)
+            self.assertTrue(set(low + (high or "")) <= set(geo._BASE32))
+            for h in hashes:
+                inside = position(low) <= position(h) and (high is None or position(h) < position(high))
+                self.assertEqual(inside, h.startswith(cell), (cell, h))
+
+    def test_nearby_uses_geohash_ranges_and_matches_brute_force(self):
+        rng = random.Random(3)
+        for i in range(200):
+            PickupRequest.objects.create(
+                **{**PICKUP, "address": f"Stop {i}"},
+                latitude=self.DEPOT[0] + rng.uniform(-0.1, 0.1), longitude=self.DEPOT[1] + rng.uniform(-0.1, 0.1),
+            )
+        pending = PickupRequest.objects.filter(status=PickupRequest.PENDING)
+        for radius in (0.5, 2, 6):
+            expected = sorted(
+                row.pk for row in pending
+                if geo.haversine_km(*self.DEPOT, row.latitude, row.longitude) <= radius
+            )
+            with CaptureQueriesContext(connection) as queries:
+                found = geo.nearby(pending, *self.DEPOT, radius)
+            self.assertEqual(sorted(row.pk for _, row in found), expected)
+            self.assertEqual([km for km, _ in found], sorted(km for km, _ in found))
+            self.assertIn("geohash", queries[0]["sql"])
+
+    def test_plan_respects_capacity_and_improves_on_nearest_neighbour(self):
+        rng = random.Random(7)
+        stops = [(i, self.DEPOT[0] + rng.uniform(-0.1, 0.1), self.DEPOT[1] + rng.uniform(-0.1, 0.1)) for i in range(60)]
+        routes, unassigned = dispatch.plan(stops, self.DEPOT, vehicles=3, capacity=25)
+        self.assertEqual(unassigned, [])
+        self.assertEqual(sorted(pk for r in routes for pk in r.stops), list(range(60)))
+        self.assertTrue(all(len(r.stops) <= 25 for r in routes))
+        self.assertLessEqual(sum(r.km for r in routes), sum(r.nearest_neighbour_km for r in routes))
+
+        routes, unassigned = dispatch.plan(stops, self.DEPOT, vehicles=3, capacity=15)
+        self.assertEqual(len(unassigned), 15)
+        farthest = max(geo.haversine_km(*self.DEPOT, lat, lon) for i, lat, lon in stops if i not in unassigned)
+        self.assertTrue(all(geo.haversine_km(*self.DEPOT, *stops[i][1:]) >= farthest for i in unassigned))
+
+    def test_plan_routes_command_schedules_pending_pickups(self):
+        for pin in ("500081", "500032", "500034", "500072"):
+            PickupRequest.objects.create(**{**PICKUP, "address": f"Hyderabad {pin}"})
+        PickupRequest.objects.create(**PICKUP)  # no PIN, stays pending
+
+        out = io.StringIO()
+        call_command("plan_routes", "--assign", "--vehicles", "2", "--json", stdout=out)
+        result = json.loads(out.getvalue())
+        self.assertEqual(sum(len(r["stops"]) for r in result["routes"]), 4)
+        self.assertEqual(result["not_geocoded"], 1)
+        self.assertEqual(PickupRequest.objects.filter(status=PickupRequest.SCHEDULED).count(), 4)
+
+
+class RollupTests(TestCase):
+
+    def snapshot(self):
+        return sorted(Rollup.objects.exclude(count=0).values_list("metric", "period", "bucket", "count"))
+
+    def test_incremental_counts_match_a_full_recount(self):
+        pickups = [
+            PickupRequest.objects.create(name=f"u{i}", email="u@example.com", phone="1", address="Hyderabad 500032")
+            for i in range(4)
+        ]
+        pickups[0].status = PickupRequest.COLLECTED
+        pickups[0].save()
+        loaded = PickupRequest.objects.get(pk=pickups[1].pk)
+        loaded.status = PickupRequest.SCHEDULED
+        loaded.save()
+
+        buffer = contact_intake.ContactBuffer(batch_size=10, flush_interval=3600)
+        buffer._thread = object()  # no flusher thread
+        for i in range(3):
+            buffer.add(ContactMessage(name="n", email=f"c{i}@example.com", message="hello"))
+        buffer.flush()
+        ContactMessageAdmin(ContactMessage, None).mark_as_read(
+            mock.Mock(), ContactMessage.objects.filter(email="c0@example.com"),
+        )
+
+        incremental = self.snapshot()
+        rollups.refresh(days=0)
+        self.assertEqual(self.snapshot(), incremental)
+        totals = rollups.totals()
+        self.assertEqual(totals[rollups.status_metric(PickupRequest.PENDING)], 2)
+        self.assertEqual(totals[rollups.UNREAD], 2)
+
+        # Deleting lowers the totals but keeps the history.
+        pickups[3].delete()
+        day = rollups.buckets(pickups[3].created_at)[1]
+        self.assertEqual(rollups.totals()[rollups.PICKUPS], 3)
+        self.assertEqual(Rollup.objects.get(metric=rollups.PICKUPS, period=rollups.DAY, bucket=day).count, 4)
+
+    def test_dashboard_reads_only_rollups(self):
+        PickupRequest.objects.create(name="a", email="a@example.com", phone="1", address="x")
+        ContactMessage.objects.create(name="b", email="b@example.com", message="hi")
+        self.client.force_login(User.objects.create_user("staff", password="pw", is_staff=True))
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get("/admin/analytics/", secure=True)
+        self.assertContains(response, "Last 14 days")
+        sql = " ".join(q["sql"] for q in queries)
+        self.assertNotIn("core_pickuprequest", sql)
+        self.assertNotIn("core_contactmessage", sql)
+        day = response.context["series"][1][2][-1]
+        self.assertEqual(day[1], {rollups.PICKUPS: 1, rollups.CONTACTS: 1})
+
+    @override_settings(ROLLUPS={"EXACT_COUNT_BELOW": 100})
+    def test_changelist_count_is_estimated_from_rollups(self):
+        PickupRequest.objects.create(name="a", email="a@example.com", phone="1", address="x")
+        Rollup.objects.filter(metric=rollups.PICKUPS, period=rollups.TOTAL).update(count=5000)
+        self.assertEqual(rollups.estimated_count(PickupRequest.objects.all()), 5000)
+        self.assertEqual(rollups.estimated_count(PickupRequest.objects.filter(name="a")), 1)
+
+        self.client.force_login(User.objects.create_superuser("admin", password="pw"))
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get("/admin/core/pickuprequest/", secure=True)
+        self.assertContains(response, "5000 pickup requests")
+        self.assertFalse([q for q in queries if "COUNT(" in q["sql"] and "core_pickuprequest" in q["sql"]])
+
+
+class FullTextSearchTests(TestCase):
+
+    def setUp(self):
+        PickupRequest.objects.bulk_create([
+            PickupRequest(name="Asha Rao", email="asha@example.com", phone="9876543210", address="12 MG Road"),
+            PickupRequest(name="Ravi Kumar", email="ravi@example.com", phone="9123456780", address="Near Asha Hospital"),
+            PickupRequest(name="Meera Iyer", email="meera@example.com", phone="9000000000", address="Banjara Hills"),
+        ])
+
+    def names(self, text):
+        return [p.name for p in search.rank_page(search.search(PickupRequest.objects.all(), text), text)]
+
+    def test_prefix_and_ranking(self):
+        # Name matches outrank address matches.
+        self.assertEqual(self.names("asha"), ["Asha Rao", "Ravi Kumar"])
+        self.assertEqual(self.names("98765"), ["Asha Rao"])
+        self.assertEqual(self.names("mee ban"), ["Meera Iyer"])
+        self.assertEqual(self.names("\"*'"), [])
+
+    def test_email_parts_match_on_both_backends(self):
+        self.assertEqual(self.names("rao exam"), ["Asha Rao"])
+        self.assertEqual(self.names("ravi@example"), ["Ravi Kumar"])
+
+        # PostgreSQL: the vector splits each column on non-word characters, so
+        # "asha@example.com" is indexed as asha/example/com like FTS5 does.
+        vector = search.create_sql("core_pickuprequest", "postgresql")[0]
+        for column in ("name", "email", "phone", "address"):
+            self.assertIn(f"to_tsvector('simple', regexp_replace(coalesce({column}, ''), '\\W+', ' ', 'g'))", vector)
+        with mock.patch.object(connection, "vendor", "postgresql"):
+            sql, params = search.matching_ids("core_pickuprequest", "ravi@example")
+        self.assertIn("search_vector @@ to_tsquery('simple', %s)", sql)
+        self.assertEqual(params, ["ravi:* & example:*"])
+
+    def test_every_match_is_kept(self):
+        PickupRequest.objects.bulk_create(
+            [PickupRequest(name=f"Asha {n}", email="a@example.com", phone="1", address="x") for n in range(300)]
+        )
+        queryset = search.search(PickupRequest.objects.all(), "asha")
+        self.assertEqual(queryset.count(), 302)
+        self.assertNotIn("LIMIT", str(queryset.query))
+
+    def test_index_follows_updates_and_deletes(self):
+        PickupRequest.objects.filter(name="Meera Iyer").update(address="Jubilee Hills")
+        self.assertEqual(self.names("banjara"), [])
+        self.assertEqual(self.names("jubilee"), ["Meera Iyer"])
+        PickupRequest.objects.filter(name="Meera Iyer").delete()
+        self.assertEqual(self.names("jubilee"), [])
+
+    def test_admin_changelist_uses_search(self):
+        admin_user = User.objects.create_superuser("admin", "admin@example.com", "pw")
+        self.client.force_login(admin_user)
+        response = self.client.get("/admin/core/pickuprequest/?q=asha", secure=True)
+        self.assertEqual(
+            [obj.name for obj in response.context["cl"].result_list], ["Asha Rao", "Ravi Kumar"],
+        )
+
+
+class DatabaseConfigTests(TestCase):
+
+    def test_sqlite_gets_wal_and_immediate_transactions(self):
+        config = database_config("sqlite:////tmp/example.sqlite3")
+        self.assertIn("PRAGMA journal_mode=WAL", config["OPTIONS"]["init_command"])
+        self.assertEqual(config["OPTIONS"]["transaction_mode"], "IMMEDIATE")
+        self.assertEqual(config["CONN_MAX_AGE"], 60)
+
+    def test_postgres_pool_replaces_persistent_connections(self):
+        config = database_config("postgres://u:p@db.example.com/ewaste", pool=True)
+        self.assertTrue(config["CONN_HEALTH_CHECKS"])
+        with mock.patch("importlib.util.find_spec", return_value=object()):
+            pooled = database_config("postgres://u:p@db.example.com/ewaste", pool=True)
+        self.assertEqual((pooled["OPTIONS"]["pool"], pooled["CONN_MAX_AGE"]), (True, 0))
+        self.assertNotIn("pool", database_config("postgres://u:p@db.example.com/ewaste")["OPTIONS"])
+
+
+class ExportTests(TestCase):
+
+    def setUp(self):
+        ContactMessage.objects.bulk_create([
+            ContactMessage(name=f"Visitor {i}", email=f"v{i}@example.com", subject="Hi, there", message="Line one\nline two")
+            for i in range(5)
+        ])
+
+    def test_admin_action_streams_csv(self):
+        admin_user = User.objects.create_superuser("admin", "admin@example.com", "pw")
+        self.client.force_login(admin_user)
+        response = self.client.post("/admin/core/contactmessage/", {
+            "action": "export_csv",
+            "_selected_action": list(ContactMessage.objects.values_list("pk", flat=True)),
+        }, secure=True)
+        self.assertTrue(response.streaming)
+        rows = list(csv.reader(io.StringIO(b"".join(response.streaming_content).decode())))
+        self.assertEqual(rows[0], ["id", "name", "email", "subject", "message", "submitted_at", "read"])
+        self.assertEqual(len(rows), 6)
+        self.assertEqual(rows[1][4], "Line one\nline two")
+
+    def test_csv_cells_cannot_start_a_formula(self):
+        rows = [(1, "=HYPERLINK(\"http://x\")", "+919876543210", "-2", "@SUM(A1)", "\tx", "plain", -2)]
+        out = list(csv.reader(io.StringIO("".join(exports.csv_chunks(rows, ["id"] * 8)))))
+        self.assertEqual(out[1], ["1", "'=HYPERLINK(\"http://x\")", "'+919876543210", "'-2", "'@SUM(A1)", "'\tx", "plain", "-2"])
+
+    def test_export_command_ndjson(self):
+        out = io.StringIO()
+        call_command("export_rows", "contacts", "--format", "ndjson", "--chunk-size", "2", stdout=out)
+        lines = [json.loads(line) for line in out.getvalue().splitlines()]
+        self.assertEqual([line["name"] for line in lines], [f"Visitor {i}" for i in range(5)])
+
+    def test_archive_and_delete_in_chunks(self):
+        ContactMessage.objects.filter(name__in=["Visitor 0", "Visitor 1", "Visitor 2"]).update(
+            submitted_at=timezone.now() - timedelta(days=400),
+        )
+        archive, progress = io.StringIO(), []
+        old = ContactMessage.objects.filter(submitted_at__lt=timezone.now() - timedelta(days=365))
+        self.assertEqual(exports.archive_and_delete(old, chunk_size=2, archive=archive, progress=progress.append), 3)
+        self.assertEqual(progress, [2, 3])
+        self.assertEqual(len(archive.getvalue().splitlines()), 3)
+        self.assertEqual(ContactMessage.objects.count(), 2)
+
+
+class AdmissionTests(TestCase):
+    rules = {"api": {"PATHS": ["/api/*"], "RATE": "60/min", "BURST": 2, "CONCURRENCY": 1}}
+
+    def middleware(self, get_response, **options):
+        with override_settings(THROTTLE={"RULES": self.rules, **options}):
+            return throttle.AdmissionMiddleware(get_response)
+
+    def test_token_bucket_refills(self):
+        buckets = throttle.LocMemBuckets()
+        self.assertEqual([buckets.take("k", 1.0, 2, now=0) for _ in range(3)], [0, 0, 1.0])
+        self.assertEqual(buckets.take("k", 1.0, 2, now=1.5), 0)
+
+    def test_rate_limit_returns_429(self):
+        middleware = self.middleware(lambda request: HttpResponse("ok"))
+        request = RequestFactory().post("/api/chatbot/")
+        statuses = [middleware(request).status_code for _ in range(3)]
+        self.assertEqual(statuses, [200, 200, 429])
+        self.assertEqual(middleware(request)["Retry-After"], "1")
+        other = RequestFactory().post("/api/chatbot/", REMOTE_ADDR="10.0.0.2")
+        self.assertEqual(middleware(other).status_code, 200)
+        self.assertEqual(middleware(RequestFactory().get("/about/")).status_code, 200)
+
+    def test_concurrency_limit_sheds_until_stream_closes(self):
+        middleware = self.middleware(lambda request: StreamingHttpResponse(iter(["a", "b"])))
+        factory = RequestFactory()
+        first = middleware(factory.post("/api/x/", REMOTE_ADDR="10.0.0.1"))
+        busy = middleware(factory.post("/api/x/", REMOTE_ADDR="10.0.0.2"))
+        self.assertEqual((busy.status_code, json.loads(busy.content)), (503, {"error": "busy"}))
+        self.assertIn("Retry-After", busy)
+
+        first.close()
+        second = middleware(factory.post("/api/x/", REMOTE_ADDR="10.0.0.3"))
+        self.assertEqual(b"".join(second), b"ab")
+        self.assertEqual(middleware(factory.post("/api/x/", REMOTE_ADDR="10.0.0.4")).status_code, 200)
+
+    def test_rule_paths_match_exactly(self):
+        rules = settings.THROTTLE["RULES"]
+        camera = throttle.Rule("camera", rules["camera"])
+        self.assertTrue(camera.matches("/api/camera-detect/"))
+        self.assertFalse(camera.matches("/api/camera-detect/batch/"))
+        self.assertFalse(camera.matches("/api/camera-detect/stats/"))
+        self.assertTrue(throttle.Rule("camera-batch", rules["camera-batch"]).matches("/api/camera-detect/batch/"))
+        self.assertFalse(any(throttle.Rule(n, s).matches("/api/camera-detect/stats/") for n, s in rules.items()))
+
+    def test_forwarded_for_with_trusted_proxy(self):
+        request = RequestFactory().get("/", HTTP_X_FORWARDED_FOR="6.6.6.6, 203.0.113.9", REMOTE_ADDR="10.0.0.1")
+        self.assertEqual(throttle.client_ip(request), "10.0.0.1")
+        self.assertEqual(throttle.client_ip(request, num_proxies=1), "203.0.113.9")
+
+
+class MetricsTests(TestCase):
+
+    @override_settings(METRICS={"SAMPLE_RATE": 1.0, "TOKEN": "scrape-me"})
+    def test_sampled_request_is_timed_and_scraped(self):
+        staff = User.objects.create_user("staff", password="pw", is_staff=True)
+        self.client.force_login(staff)
+        before = metrics.REQUESTS.value(view="list_pickup_requests", method="GET", status=200)
+
+        response = self.client.get("/pickups/", secure=True)
+        timing = response["Server-Timing"]
+        self.assertIn("total;dur=", timing)
+        self.assertRegex(timing, r'db;dur=[\d.]+;desc="\d+ queries"')
+        self.assertIn("render;dur=", timing)
+
+        self.assertEqual(self.client.get("/metrics", secure=True).status_code, 403)
+        scrape = self.client.get("/metrics", secure=True, HTTP_AUTHORIZATION="Bearer scrape-me")
+        self.assertEqual(scrape.status_code, 200)
+        body = scrape.content.decode()
+        self.assertIn('http_requests_total{view="list_pickup_requests",method="GET",status="200"} '
+                      f"{before + 1}", body)
+        self.assertIn('db_queries_per_request_count{view="list_pickup_requests"}', body)
+        self.assertIn('http_request_duration_seconds_bucket{view="list_pickup_requests",le="+Inf"}', body)
+
+    @override_settings(METRICS={"SAMPLE_RATE": 0.0})
+    def test_unsampled_requests_are_only_counted(self):
+        before = metrics.REQUESTS.value(view="contact", method="GET", status=200)
+        response = self.client.get("/contact/", secure=True)
+        self.assertNotIn("Server-Timing", response)
+        self.assertEqual(metrics.REQUESTS.value(view="contact", method="GET", status=200), before + 1)
+
+    def test_stage_outside_a_request_is_a_no_op(self):
+        before = metrics.STAGE_LATENCY.count(stage="unit-test")
+        with metrics.stage("unit-test"):
+            pass
+        self.assertEqual(metrics.STAGE_LATENCY.count(stage="unit-test"), before)
+
+
+class EventLogTests(FakeGroqMixin, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.log = events.EventLog(events.DatabaseSink(), capacity=100, batch_size=2)
+        self.enterContext(mock.patch.object(events, "_log", self.log))
+
+    def test_requests_buffer_events_without_touching_the_database(self):
+        with CaptureQueriesContext(connection) as queries:
+            self.client.post("/api/camera-detect/?item=phone", make_image(320, 240),
+                             content_type="image/jpeg", secure=True)
+            for _ in range(2):
+                self.client.post("/api/chatbot/", {"message": "Is a cracked CRT screen dangerous?"}, secure=True)
+        self.assertFalse([q for q in queries if "core_event" in q["sql"]])
+        self.assertEqual(self.log.pending(), 3)
+
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(self.log.flush(), 3)
+        self.assertEqual(len([q for q in queries if q["sql"].startswith('INSERT INTO "core_event"')]), 2)
+
+        detection = Event.objects.get(kind=events.DETECTION).data
+        self.assertEqual(
+            {k: detection[k] for k in ("detected", "caption", "source", "width", "height")},
+            {"detected": "ewaste", "caption": "phone", "source": "manual", "width": 320, "height": 240},
+        )
+        chats = Event.objects.filter(kind=events.CHAT).order_by("created_at", "pk")
+        self.assertEqual([e.data["source"] for e in chats], ["llm", "cache"])
+        self.assertIsInstance(chats[0].data["latency_ms"], float)
+
+    def test_full_ring_overwrites_oldest(self):
+        log = events.EventLog(events.DatabaseSink(), capacity=3, batch_size=10)
+        for n in range(5):
+            log.record(events.CHAT, {"n": n})
+        self.assertEqual(log.flush(), 3)
+        self.assertEqual(log.stats()["dropped"], 2)
+        self.assertEqual(sorted(e.data["n"] for e in Event.objects.all()), [2, 3, 4])
+
+    def test_ndjson_rotation_and_query_command(self):
+        directory = self.enterContext(tempfile.TemporaryDirectory())
+        sink = events.NdjsonSink(directory, max_bytes=600, backups=2)
+        log = events.EventLog(sink, batch_size=4)
+        for n in range(40):
+            log.record(events.CHAT, {"source": "llm" if n % 4 else "cache", "latency_ms": n})
+        log.flush()
+        files = sorted(p.name for p in sink.directory.iterdir())
+        self.assertEqual(files, [sink.path.name, f"{sink.path.name}.1", f"{sink.path.name}.2"])
+
+        kept = list(sink.read(events.CHAT, timezone.now() - timedelta(hours=1)))
+        self.assertLess(len(kept), 40)
+        out = io.StringIO()
+        with override_settings(EVENTS={"NDJSON_DIR": directory}):
+            call_command("query_events", "chat", "--backend", "ndjson", "--json", stdout=out)
+        results = {r["source"]: r for r in json.loads(out.getvalue())}
+        self.assertEqual(sum(r["count"] for r in results.values()), len(kept))
+        self.assertEqual(results["llm"]["latency_ms_p95"], 39)
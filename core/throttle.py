@@ -0,0 +1,215 @@
+"""
+Admission control for the expensive API endpoints.
+
+:class:`AdmissionMiddleware` runs before sessions, auth and the view, and for
+the first rule in ``settings.THROTTLE["RULES"]`` that lists the request path
+(exactly; a path ending in ``*`` matches as a prefix):
+
+1. takes a token from the client's bucket (``RATE`` per second, ``BURST``
+   deep) - an empty bucket is a 429 with ``Retry-After``;
+2. takes a slot from the endpoint's semaphore (``CONCURRENCY`` per worker
+   process) - none free is a 503 with ``Retry-After``.
+
+Either way the request is shed before any image decoding or Groq call, so a
+flood of API traffic cannot occupy every worker thread and the static pages
+keep their latency. The slot is released when the response is closed, which
+for streamed chatbot replies is after the last token.
+"""
+
+import math
+import threading
+import time
+from collections import OrderedDict
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+
+from django.conf import settings
+from django.core.cache import caches
+from django.http import JsonResponse
+
+from .metrics import call_on_close
+
+DEFAULTS = {
+    "ENABLED": True,
+    "BACKEND": "locmem",
+    "CACHE_ALIAS": "default",
+    "KEY": "ip",
+    "NUM_PROXIES": 0,
+    "MAX_CLIENTS": 10_000,
+    "RETRY_AFTER": 1,
+    "RULES": {},
+}
+
+
+def get_options():
+    return {**DEFAULTS, **getattr(settings, "THROTTLE", {})}
+
+
+def parse_rate(rate):
+    """``"10/min"`` -> tokens per second."""
+    count, _, period = rate.partition("/")
+    seconds = {"s": 1, "sec": 1, "m": 60, "min": 60, "h": 3600, "hour": 3600, "d": 86400, "day": 86400}
+    return int(count) / seconds[period]
+
+
+# ============================================================
+# TOKEN BUCKETS
+# ============================================================
+class LocMemBuckets:
+    """Per-process buckets; the least recently seen clients are dropped first."""
+
+    def __init__(self, max_clients=10_000):
+        self.max_clients = max_clients
+        self._buckets = OrderedDict()
+        self._lock = threading.Lock()
+
+    def take(self, key, rate, burst, now=None):
+        """Return 0 if a token was taken, else seconds until one is available."""
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            tokens, updated = self._buckets.pop(key, (burst, now))
+            tokens = min(burst, tokens + (now - updated) * rate)
+            if tokens >= 1:
+                self._buckets[key] = (tokens - 1, now)
+                wait = 0.0
+            else:
+                self._buckets[key] = (tokens, now)
+                wait = (1 - tokens) / rate
+            while len(self._buckets) > self.max_clients:
+                self._buckets.popitem(last=False)
+            return wait
+
+
+class CacheBuckets:
+    """
+    Buckets in a Django cache shared by all workers. The read-modify-write is
+    not atomic, so under heavy contention a client can get a few extra tokens.
+    """
+
+    def __init__(self, alias="default"):
+        self.cache = caches[alias]
+
+    def take(self, key, rate, burst, now=None):
+        now = time.time() if now is None else now
+        cache_key = f"throttle:{key}"
+        tokens, updated = self.cache.get(cache_key) or (burst, now)
+        tokens = min(burst, tokens + (now - updated) * rate)
+        wait = 0.0 if tokens >= 1 else (1 - tokens) / rate
+        if tokens >= 1:
+            tokens -= 1
+        self.cache.set(cache_key, (tokens, now), timeout=math.ceil(burst / rate) + 1)
+        return wait
+
+
+def build_buckets(options):
+    if options["BACKEND"] == "cache":
+        return CacheBuckets(options["CACHE_ALIAS"])
+    return LocMemBuckets(options["MAX_CLIENTS"])
+
+
+# ============================================================
+# MIDDLEWARE
+# ============================================================
+class Rule:
+
+    def __init__(self, name, spec):
+        self.name = name
+        self.paths = frozenset(p for p in spec["PATHS"] if not p.endswith("*"))
+        self.prefixes = tuple(p[:-1] for p in spec["PATHS"] if p.endswith("*"))
+        self.rate = parse_rate(spec["RATE"]) if spec.get("RATE") else None
+        self.burst = spec.get("BURST", 1)
+        self.concurrency = spec.get("CONCURRENCY")
+        self.semaphore = threading.BoundedSemaphore(self.concurrency) if self.concurrency else None
+        self.rejected = {"rate": 0, "concurrency": 0}
+
+    def matches(self, path):
+        return path in self.paths or path.startswith(self.prefixes)
+
+
+def client_ip(request, num_proxies=0):
+    """The client address, trusting the last ``num_proxies`` X-Forwarded-For hops."""
+    if num_proxies:
+        forwarded = [ip.strip() for ip in request.META.get("HTTP_X_FORWARDED_FOR", "").split(",") if ip.strip()]
+        if len(forwarded) >= num_proxies:
+            return forwarded[-num_proxies]
+    return request.META.get("REMOTE_ADDR", "")
+
+
+def _rejected(error, status, retry_after):
+    response = JsonResponse({"error": error}, status=status)
+    response["Retry-After"] = str(max(1, math.ceil(retry_after)))
+    return response
+
+
+class AdmissionMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.options = get_options()
+        self.buckets = build_buckets(self.options)
+        self.rules = [Rule(name, spec) for name, spec in self.options["RULES"].items()]
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def client_key(self, request):
+        if self.options["KEY"] == "session":
+            session = request.COOKIES.get(settings.SESSION_COOKIE_NAME)
+            if session:
+                return f"s:{session}"
+        return f"ip:{client_ip(request, self.options['NUM_PROXIES'])}"
+
+    def admit(self, request):
+        """Return ``(rule, None)`` to continue or ``(None, response)`` to shed."""
+        if not self.options["ENABLED"]:
+            return None, None
+        rule = next((rule for rule in self.rules if rule.matches(request.path)), None)
+        if rule is None:
+            return None, None
+
+        if rule.rate is not None:
+            wait = self.buckets.take(f"{rule.name}:{self.client_key(request)}", rule.rate, rule.burst)
+            if wait:
+                rule.rejected["rate"] += 1
+                return None, _rejected("rate-limited", 429, wait)
+
+        if rule.semaphore is not None and not rule.semaphore.acquire(blocking=False):
+            rule.rejected["concurrency"] += 1
+            return None, _rejected("busy", 503, self.options["RETRY_AFTER"])
+        return rule, None
+
+    def release_on_close(self, rule, response):
+        if rule is None or rule.semaphore is None:
+            return response
+        if response.streaming:
+            call_on_close(response, rule.semaphore.release)
+        else:
+            rule.semaphore.release()
+        return response
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        rule, rejected = self.admit(request)
+        if rejected is not None:
+            return rejected
+        try:
+            response = self.get_response(request)
+        except BaseException:
+            if rule is not None and rule.semaphore is not None:
+                rule.semaphore.release()
+            raise
+        return self.release_on_close(rule, response)
+
+    async def __acall__(self, request):
+        rule, rejected = self.admit(request)
+        if rejected is not None:
+            return rejected
+        try:
+            response = await self.get_response(request)
+        except BaseException:
+            if rule is not None and rule.semaphore is not None:
+                rule.semaphore.release()
+            raise
+        return self.release_on_close(rule, response)
@@ -1,18 +1,33 @@
-import base64
-import io
+import json
+import logging
+import time
+from concurrent.futures import TimeoutError as FutureTimeoutError
 
-from groq import Groq
-from PIL import Image
+from asgiref.sync import sync_to_async
 
-from django.http import JsonResponse
+from django.http import Http404, HttpResponse, JsonResponse, StreamingHttpResponse
 from django.views.decorators.csrf import csrf_exempt
-from django.shortcuts import render
+from django.shortcuts import redirect
+from django.shortcuts import render as _render
+from django.db import transaction
 from django.conf import settings
-
-# ============================================================
-# CONFIGURE GROQ (TEXT ONLY)
-# ============================================================
-groq_client = Groq(api_key=settings.GROQ_API_KEY)
+from django.contrib import messages
+from django.contrib.admin.views.decorators import staff_member_required
+from rest_framework import generics, permissions
+from rest_framework.exceptions import NotFound
+from rest_framework.request import Request
+
+from . import (
+    chat_cache, classifier, contact_intake, conversations, events, imaging, llm, mail_queue, metrics, pages,
+    phash, rollups, vision,
+)
+from .forms import ContactForm, PickupRequestForm
+from .models import PickupRequest
+from .pagination import KeysetPagination
+from .serializers import PickupRequestSerializer
+from .faq import FaqIndex
+
+logger = logging.getLogger(__name__)
 
 # Predefined e-waste items
 EWASTE_ITEMS = {
@@ -35,23 +50,41 @@ EWASTE_ITEMS = {
     "webcam": "webcam",
 }
 
+# Curated FAQ compiled once per worker; see core/data/faq.json
+FAQ_INDEX = FaqIndex.from_file(EWASTE_ITEMS)
+
+# Template rendering shows up as the "render" stage in Server-Timing
+render = metrics.timed("render")(_render)
+
 # ============================================================
 # STATIC PAGE ROUTES
 # ============================================================
+# Pages without forms are served from the pre-rendered page cache
+# (core/pages.py); the ones with csrf tokens still render per request.
 def homepage(request): 
-    return render(request, "index.html")
+    return pages.cached_page(request, "index.html")
 
 def services(request): 
-    return render(request, "services.html")
+    return pages.cached_page(request, "services.html")
 
 def about(request): 
-    return render(request, "about.html")
+    return pages.cached_page(request, "about.html")
 
 def team(request): 
-    return render(request, "team.html")
+    return pages.cached_page(request, "team.html")
 
-def contact(request): 
-    return render(request, "contact.html")
+def contact(request):
+    if request.method != "POST":
+        return render(request, "contact.html", {"form": ContactForm()})
+
+    form = ContactForm(request.POST)
+    if not form.is_valid():
+        return render(request, "contact.html", {"form": form}, status=400)
+
+    # Duplicates and spam get the same reply; see core.contact_intake.
+    contact_intake.submit(form)
+    messages.success(request, "Thanks for your message! We'll get back to you soon.")
+    return redirect("contact")
 
 def login(request): 
     return render(request, "login.html")
@@ -62,72 +95,152 @@ def signup(request):
 def pickup(request): 
     return render(request, "pickup.html")
 
-def reqs(request): 
-    return render(request, "reqs.html")
+def reqs(request):
+    if request.method != "POST":
+        return render(request, "reqs.html")
+
+    form = PickupRequestForm(request.POST)
+    if not form.is_valid():
+        return render(request, "pickup.html", {"form": form}, status=400)
+
+    # Emails are queued in the same transaction and sent by core.mail_queue.
+    with transaction.atomic():
+        pickup_request = form.save()
+        mail_queue.enqueue(_pickup_emails(pickup_request))
+    return redirect("reqs")
+
+# Columns shown by the listing page and API; only() keeps the query narrow
+# as PickupRequest grows.
+PICKUP_LIST_FIELDS = ("id", "name", "email", "phone", "address", "created_at")
+
+class PickupRequestList(generics.ListAPIView):
+    serializer_class = PickupRequestSerializer
+    pagination_class = KeysetPagination
+    permission_classes = [permissions.IsAdminUser]
+
+    def get_queryset(self):
+        return PickupRequest.objects.only(*PICKUP_LIST_FIELDS)
+
+@staff_member_required
+def list_pickup_requests(request):
+    paginator = KeysetPagination()
+    try:
+        page = paginator.paginate_queryset(
+            PickupRequest.objects.only(*PICKUP_LIST_FIELDS), Request(request),
+        )
+    except NotFound as e:
+        # Plain Django view: DRF's exception handler does not run here.
+        raise Http404(e.detail)
+    return render(request, "list_pickup_requests.html", {
+        "pickup_requests": page,
+        "next_cursor": paginator.get_next_cursor(),
+    })
+
+def _pickup_emails(pickup_request):
+    details = (
+        f"Name: {pickup_request.name}\n"
+        f"Email: {pickup_request.email}\n"
+        f"Phone: {pickup_request.phone}\n"
+        f"Address: {pickup_request.address}\n"
+    )
+    return [
+        (
+            settings.ADMIN_EMAIL,
+            f"New pickup request from {pickup_request.name}",
+            f"A new e-waste pickup was requested.\n\n{details}",
+        ),
+        (
+            pickup_request.email,
+            "We received your e-waste pickup request",
+            f"Hi {pickup_request.name},\n\n"
+            "Thanks for requesting a pickup. Our team will contact you shortly "
+            f"to confirm a time.\n\n{details}",
+        ),
+    ]
 
 def detection(request): 
-    return render(request, "detection.html")
+    return pages.cached_page(request, "detection.html")
 
 def data_destruction(request): 
-    return render(request, "dd.html")
+    return pages.cached_page(request, "dd.html")
 
 def refurbishment(request): 
-    return render(request, "re.html")
+    return pages.cached_page(request, "re.html")
 
 # ============================================================
 # CAMERA PAGE
 # ============================================================
 def ewaste_camera_page(request):
-    return render(request, "ewaste-camera.html")
+    return pages.cached_page(request, "ewaste-camera.html")
 
 # ============================================================
-# E-WASTE DETECTION - MANUAL SELECTION
+# E-WASTE DETECTION - MANUAL SELECTION OR LOCAL MODEL
 # ============================================================
 @csrf_exempt
 def camera_ai_api(request):
     if request.method != "POST":
         return JsonResponse({"error": "Invalid request"}, status=400)
 
-    # Get either auto-detected item or manual selection
-    image_data = request.POST.get("image")
-    manual_item = request.POST.get("item")  # Manual selection from user
-
-    # ---- Validate image ----
-    if not image_data or "," not in image_data:
-        return JsonResponse(
-            {"detected": "error", "caption": "invalid-image"}, 
-            status=400
-        )
-
+    # ---- Validate image (size, header, dimensions; no pixel decode) ----
+    start = time.perf_counter()
+    info = None
     try:
-        header, base64_data = image_data.split(",", 1)
-
-        if not (
-            header.startswith("data:image/jpeg")
-            or header.startswith("data:image/png")
-        ):
-            return JsonResponse(
-                {"detected": "error", "caption": "unsupported-format"},
-                status=400,
-            )
-
-        image_bytes = base64.b64decode(base64_data, validate=True)
-
-        if len(image_bytes) < 4000:
-            return JsonResponse(
-                {"detected": "error", "caption": "too-small-image"},
-                status=400,
-            )
-
-        # Validate image
-        img = Image.open(io.BytesIO(image_bytes)).convert("RGB")
-
-    except Exception:
-        return JsonResponse(
-            {"detected": "error", "caption": "bad-image-data"},
-            status=400,
-        )
+        with imaging.read_upload(request) as image_buffer:
+            with metrics.stage("inspect"):
+                info = imaging.inspect_image(image_buffer)
+
+            # Raw image bodies carry the manual selection in the query string
+            manual_item = request.GET.get("item") or request.POST.get("item")
+            result, source = _detect_image(image_buffer, manual_item)
+    except imaging.ImageRejected as e:
+        result = {"detected": "error", "caption": e.code}
+        _log_detection(result, "rejected", info, start)
+        return JsonResponse(result, status=e.status)
+
+    _log_detection(result, source, info, start)
+    return JsonResponse(result)
+
+def _log_detection(result, source, info, start, **extra):
+    events.record(
+        events.DETECTION,
+        detected=result["detected"], caption=result["caption"], source=source,
+        width=info.width if info else None, height=info.height if info else None,
+        bytes=info.nbytes if info else None,
+        latency_ms=round((time.perf_counter() - start) * 1000, 1), **extra,
+    )
 
+def _detect_image(image_buffer, manual_item):
+    """
+    Manual selection wins; otherwise ask the local model, if one is configured.
+    Returns ``(result, source)``, source being manual, cache or model.
+    """
+    recognizer = vision.get_recognizer()
+    if recognizer is None or (manual_item and manual_item in EWASTE_ITEMS):
+        return _detect(manual_item), "manual"
+
+    # Near-identical re-submissions skip the full decode and inference
+    image_cache = phash.get_cache()
+    if image_cache is not None:
+        image_hash = phash.dhash(image_buffer)
+        cached, _ = image_cache.get(image_hash)
+        if cached is not None:
+            return dict(cached), "cache"
+
+    with metrics.stage("decode"):
+        image = imaging.decode_resized(image_buffer, recognizer.input_size)
+    try:
+        with metrics.stage("classify"):
+            caption, score = recognizer.recognize(image)
+    except FutureTimeoutError:
+        metrics.ERRORS.inc(source="vision-timeout")
+        raise imaging.ImageRejected("model-timeout", status=503)
+
+    result = {**_classify_caption(caption), "confidence": round(score, 4)}
+    if image_cache is not None:
+        image_cache.put(image_hash, result)
+    return result, "model"
+
+def _detect(manual_item):
     # Use manual selection if provided, otherwise use a placeholder
     if manual_item and manual_item in EWASTE_ITEMS:
         caption = manual_item.lower()
@@ -135,21 +248,119 @@ def camera_ai_api(request):
         # Default: ask user to select manually
         caption = "unknown"
 
+    return _classify_caption(caption)
+
+def _classify_caption(caption):
     # ---- Check if electronic (e-waste) ----
-    ewaste_keywords = list(EWASTE_ITEMS.keys()) + [
-        "mobile", "smartphone", "wire", "usb", "airpods",
-        "gadget", "device", "electronic", "tech",
-    ]
+    match = classifier.classify(caption)
+    if match is None:
+        return {"detected": "not-ewaste", "caption": caption}
 
-    detected = "ewaste" if any(k in caption for k in ewaste_keywords) else "not-ewaste"
+    return {"detected": "ewaste", "caption": caption, **match.as_dict()}
 
-    return JsonResponse(
-        {"detected": detected, "caption": caption}
-    )
+# ============================================================
+# E-WASTE DETECTION - BATCH
+# ============================================================
+def _detect_upload(upload, manual_item):
+    start = time.perf_counter()
+    info = None
+    try:
+        with imaging.read_uploaded_file(upload) as image_buffer:
+            info = imaging.inspect_image(image_buffer)
+            result, source = _detect_image(image_buffer, manual_item)
+    except imaging.ImageRejected as e:
+        result, source = {"detected": "error", "caption": e.code}, "rejected"
+    _log_detection(result, source, info, start, batch=True)
+    return result
+
+@csrf_exempt
+def camera_batch_api(request):
+    """Multipart POST with repeated ``images`` files and optional ``items`` labels."""
+    if request.method != "POST":
+        return JsonResponse({"error": "Invalid request"}, status=400)
+
+    try:
+        uploads, items = imaging.read_batch_uploads(request)
+    except imaging.ImageRejected as e:
+        return JsonResponse({"error": e.code}, status=e.status)
+
+    # One bad image only fails its own slot; results keep upload order.
+    results = list(imaging.get_executor().map(_detect_upload, uploads, items))
+
+    return JsonResponse({"results": results})
+
+# ============================================================
+# DETECTION CACHE / MODEL STATS (STAFF ONLY)
+# ============================================================
+@staff_member_required
+def camera_stats(request):
+    image_cache = phash.get_cache()
+    recognizer = vision.get_recognizer()
+    return JsonResponse({
+        "phash_cache": image_cache.stats() if image_cache else None,
+        "vision_batcher": recognizer.batcher.stats() if recognizer else None,
+    })
+
+# ============================================================
+# ANALYTICS DASHBOARD (STAFF ONLY, ROLLUPS ONLY)
+# ============================================================
+@staff_member_required
+def analytics_dashboard(request):
+    data = rollups.dashboard()
+    totals = data["totals"]
+    return render(request, "admin/analytics.html", {
+        "title": "Analytics",
+        "pickups_total": totals.get(rollups.PICKUPS, 0),
+        "pickups_by_status": [
+            (label, totals.get(rollups.status_metric(status), 0)) for status, label in PickupRequest.STATUS_CHOICES
+        ],
+        "contacts_total": totals.get(rollups.CONTACTS, 0),
+        "contacts_unread": totals.get(rollups.UNREAD, 0),
+        "series": [
+            ("Last 48 hours", "D d M, H:i", data["hourly"]),
+            ("Last 14 days", "D d M", data["daily"]),
+            ("Last 8 weeks (by Monday)", "d M Y", data["weekly"]),
+        ],
+    })
 
 # ============================================================
 # CHATBOT USING GROQ TEXT
 # ============================================================
+def fallback_reply(user_message):
+    """Best answer available without Groq: a looser FAQ match, a similar cached reply, or a canned one."""
+    options = llm.get_options()
+    return (
+        FAQ_INDEX.answer(user_message, min_confidence=0.5, max_words=40)
+        or chat_cache.get_cache().closest(user_message, options["FALLBACK_SIMILARITY"])
+        or llm.FALLBACK_REPLY
+    )
+
+def _load_conversation(request):
+    if not conversations.get_options()["ENABLED"]:
+        return None
+    return conversations.get_store().load(request.POST.get("conversation"))
+
+def _remember(conversation, user_message, reply):
+    if conversation is not None:
+        conversations.get_store().record(conversation, user_message, reply)
+
+def _context(conversation, user_message):
+    if conversation is None:
+        return []
+    conversations.PROMPT_TOKENS.observe(conversation.prompt_tokens(user_message))
+    return conversation.context()
+
+def _log_chat(user_message, source, start, first_turn, **extra):
+    events.record(
+        events.CHAT, chars=len(user_message), source=source, follow_up=not first_turn,
+        latency_ms=round((time.perf_counter() - start) * 1000, 1), **extra,
+    )
+
+def _chat_json(conversation, reply, **extra):
+    if conversation is not None:
+        extra["conversation"] = conversation.id
+    return JsonResponse({"response": reply, **extra})
+
 @csrf_exempt
 def chatbot_response(request):
     if request.method != "POST":
@@ -160,39 +371,116 @@ def chatbot_response(request):
     if not user_message:
         return JsonResponse({"response": "Please enter a message."})
 
-    try:
-        # Groq text call
-        completion = groq_client.chat.completions.create(
-            model="llama-3.1-8b-instant",
-            messages=[
-                {
-                    "role": "system",
-                    "content": (
-                        "You are an e-waste guide assistant. Answer briefly and helpfully about "
-                        "electronic waste recycling, proper disposal, environmental impact, and best practices. "
-                        "Keep responses under 100 words."
-                    ),
-                },
-                {
-                    "role": "user",
-                    "content": user_message,
-                },
-            ],
-            temperature=0.4,
-            max_tokens=256,
-        )
+    start = time.perf_counter()
+    conversation = _load_conversation(request)
+    first_turn = conversation is None or conversation.is_new
+
+    faq_reply = FAQ_INDEX.answer(user_message)
+    if faq_reply is not None:
+        _remember(conversation, user_message, faq_reply)
+        _log_chat(user_message, "faq", start, first_turn)
+        return _chat_json(conversation, faq_reply)
+
+    # Cached answers are context-free, so only a conversation's first
+    # question may use (or fill) the response cache.
+    response_cache = chat_cache.get_cache()
+    bot_reply = response_cache.get(user_message) if first_turn else None
+    if bot_reply is not None:
+        _remember(conversation, user_message, bot_reply)
+        _log_chat(user_message, "cache", start, first_turn)
+        return _chat_json(conversation, bot_reply)
 
-        bot_reply = completion.choices[0].message.content
+    try:
+        with metrics.stage("llm"):
+            bot_reply = llm.complete(user_message, _context(conversation, user_message))
+        if first_turn:
+            response_cache.set(user_message, bot_reply)
 
     except Exception as e:
-        print("Groq Chat Error:", repr(e))
-        bot_reply = "Sorry, technical issue occurred."
+        logger.exception("Groq chat failed; sending the fallback reply")
+        metrics.ERRORS.inc(source="groq")
+        reply = fallback_reply(user_message)
+        _log_chat(user_message, "fallback", start, first_turn, error=type(e).__name__)
+        return _chat_json(conversation, reply, fallback=True)
 
-    return JsonResponse({"response": bot_reply})
+    _remember(conversation, user_message, bot_reply)
+    _log_chat(user_message, "llm", start, first_turn)
+    return _chat_json(conversation, bot_reply)
 
-#google site verification
-from django.http import HttpResponse
+# ============================================================
+# STREAMING CHATBOT (ASYNC, SERVE VIA ASGI)
+# ============================================================
+def _sse(data, event=None):
+    prefix = f"event: {event}\n" if event else ""
+    return f"{prefix}data: {json.dumps(data)}\n\n"
+
+@csrf_exempt
+async def chatbot_stream(request):
+    if request.method != "POST":
+        return JsonResponse({"response": "Invalid request"}, status=400)
+
+    user_message = request.POST.get("message", "")
 
+    if not user_message:
+        return JsonResponse({"response": "Please enter a message."})
+
+    start = time.perf_counter()
+    conversation = await sync_to_async(_load_conversation)(request)
+    first_turn = conversation is None or conversation.is_new
+    done = {"conversation": conversation.id} if conversation is not None else {}
+
+    response_cache = chat_cache.get_cache()
+    source = "faq"
+    cached_reply = FAQ_INDEX.answer(user_message)
+    if cached_reply is None and first_turn:
+        source = "cache"
+        cached_reply = await sync_to_async(response_cache.get)(user_message)
+
+    async def stream():
+        if cached_reply is not None:
+            await sync_to_async(_remember)(conversation, user_message, cached_reply)
+            yield _sse({"token": cached_reply})
+            yield _sse(done, event="done")
+            _log_chat(user_message, source, start, first_turn, stream=True)
+            return
+
+        tokens = []
+        first_token_ms = None
+        try:
+            context = _context(conversation, user_message)
+            async for token in llm.stream_completion(user_message, context):
+                if first_token_ms is None:
+                    first_token_ms = round((time.perf_counter() - start) * 1000, 1)
+                tokens.append(token)
+                yield _sse({"token": token})
+        except Exception as e:
+            logger.exception("Groq stream failed; sending the fallback reply")
+            metrics.ERRORS.inc(source="groq-stream")
+            reply = await sync_to_async(fallback_reply)(user_message)
+            yield _sse({"response": reply, "fallback": True, **done}, event="error")
+            _log_chat(user_message, "fallback", start, first_turn, stream=True, error=type(e).__name__)
+            return
+        reply = "".join(tokens)
+        if first_turn:
+            await sync_to_async(response_cache.set)(user_message, reply)
+        await sync_to_async(_remember)(conversation, user_message, reply)
+        yield _sse(done, event="done")
+        _log_chat(user_message, "llm", start, first_turn, stream=True, first_token_ms=first_token_ms)
+
+    response = StreamingHttpResponse(stream(), content_type="text/event-stream")
+    response["Cache-Control"] = "no-cache"
+    response["X-Accel-Buffering"] = "no"
+    return response
+
+# ============================================================
+# PROMETHEUS METRICS
+# ============================================================
+def prometheus_metrics(request):
+    if not metrics.can_scrape(request):
+        return HttpResponse(status=403)
+    return HttpResponse(metrics.render(), content_type="text/plain; version=0.0.4; charset=utf-8")
+
+#google site verification
 def google_verify(request):
     return HttpResponse(
         "google-site-verification: googleb5949ab1058f2676.html",
@@ -0,0 +1,308 @@
+"""
+Local image recognition for the camera API.
+
+``settings.VISION["BACKEND"]`` selects the model:
+
+* ``"manual"`` - no model; users pick the item themselves (the default)
+* ``"onnx"`` - a MobileNet-class ImageNet classifier run with ONNX Runtime
+* a dotted path to a :class:`VisionBackend` subclass
+
+The backend is loaded once per worker and shared by all request threads.
+Requests go through a :class:`MicroBatcher`, which groups images that arrive
+within a few milliseconds of each other into one inference call.
+"""
+
+import math
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import NamedTuple
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.utils.module_loading import import_string
+
+from . import providers
+
+DEFAULTS = {
+    "BACKEND": "manual",
+    "MODEL_PATH": "",
+    "LABELS_PATH": "",
+    "THREADS": 1,
+    "MAX_BATCH": 8,
+    "MAX_WAIT_MS": 5,
+    "MIN_SCORE": 0.3,
+    "TIMEOUT": 5.0,
+    "WARMUP": True,
+    "LABEL_MAP": {},
+}
+
+# ImageNet class names (any comma-separated alias) -> EWASTE_ITEMS key.
+DEFAULT_LABEL_MAP = {
+    "cellular telephone": "phone",
+    "cellphone": "phone",
+    "mobile phone": "phone",
+    "dial telephone": "phone",
+    "laptop": "laptop",
+    "notebook": "laptop",
+    "desktop computer": "laptop",
+    "computer keyboard": "keyboard",
+    "keypad": "keyboard",
+    "typewriter keyboard": "keyboard",
+    "mouse": "mouse",
+    "computer mouse": "mouse",
+    "monitor": "monitor",
+    "screen": "monitor",
+    "crt screen": "monitor",
+    "television": "monitor",
+    "television system": "monitor",
+    "loudspeaker": "speaker",
+    "speaker unit": "speaker",
+    "headphone": "headphones",
+    "earphone": "headphones",
+    "remote control": "remote",
+    "remote": "remote",
+    "digital camera": "camera",
+    "reflex camera": "camera",
+    "polaroid camera": "camera",
+    "hand-held computer": "tablet",
+}
+
+
+class Prediction(NamedTuple):
+    label: str
+    score: float
+
+
+def get_options():
+    return {**DEFAULTS, **getattr(settings, "VISION", {})}
+
+
+# ============================================================
+# BACKENDS
+# ============================================================
+class VisionBackend:
+    """Base class: subclasses load a model and classify batches of RGB images."""
+
+    input_size = (224, 224)
+
+    def __init__(self, options):
+        self.options = options
+
+    def load(self):
+        pass
+
+    def predict(self, images):
+        """Return one :class:`Prediction` per image, in order."""
+        raise NotImplementedError
+
+    def warm_up(self):
+        from PIL import Image
+
+        # First inference pays for lazy allocation and kernel selection.
+        self.predict([Image.new("RGB", self.input_size)] * self.options["MAX_BATCH"])
+
+
+class OnnxBackend(VisionBackend):
+    """ImageNet-style classifier (e.g. MobileNetV2/V3) exported to ONNX, NCHW input."""
+
+    MEAN = (0.485, 0.456, 0.406)
+    STD = (0.229, 0.224, 0.225)
+
+    def load(self):
+        try:
+            import numpy
+            import onnxruntime
+        except ImportError as e:
+            raise ImproperlyConfigured(
+                "VISION BACKEND 'onnx' requires the onnxruntime and numpy packages."
+            ) from e
+        if not self.options["MODEL_PATH"]:
+            raise ImproperlyConfigured("VISION BACKEND 'onnx' requires MODEL_PATH.")
+
+        session_options = onnxruntime.SessionOptions()
+        session_options.intra_op_num_threads = self.options["THREADS"]
+        session_options.inter_op_num_threads = 1
+        session_options.graph_optimization_level = onnxruntime.GraphOptimizationLevel.ORT_ENABLE_ALL
+        self.session = onnxruntime.InferenceSession(
+            str(self.options["MODEL_PATH"]), session_options, providers=["CPUExecutionProvider"],
+        )
+
+        model_input = self.session.get_inputs()[0]
+        self.input_name = model_input.name
+        batch_dim, _, height, width = model_input.shape
+        if isinstance(height, int) and isinstance(width, int):
+            self.input_size = (width, height)
+        # Models exported with a fixed batch of 1 are run image by image.
+        self.fixed_batch = batch_dim == 1
+
+        self.np = numpy
+        self.mean = numpy.array(self.MEAN, dtype=numpy.float32)
+        self.std = numpy.array(self.STD, dtype=numpy.float32)
+        self.labels = self._read_labels()
+
+    def _read_labels(self):
+        path = self.options["LABELS_PATH"]
+        if not path:
+            return None
+        with open(path, encoding="utf-8") as fh:
+            return [line.strip() for line in fh if line.strip()]
+
+    def _run(self, batch):
+        logits = self.session.run(None, {self.input_name: batch})[0]
+        logits = logits - logits.max(axis=1, keepdims=True)
+        probs = self.np.exp(logits)
+        return probs / probs.sum(axis=1, keepdims=True)
+
+    def predict(self, images):
+        np = self.np
+        batch = np.stack([np.asarray(img, dtype=np.float32) for img in images]) / 255.0
+        batch = ((batch - self.mean) / self.std).transpose(0, 3, 1, 2)
+        batch = np.ascontiguousarray(batch, dtype=np.float32)
+
+        if self.fixed_batch:
+            probs = np.concatenate([self._run(batch[i:i + 1]) for i in range(len(batch))])
+        else:
+            probs = self._run(batch)
+
+        predictions = []
+        for row in probs:
+            index = int(row.argmax())
+            label = self.labels[index] if self.labels else str(index)
+            predictions.append(Prediction(label, float(row[index])))
+        return predictions
+
+
+BACKENDS = {
+    "onnx": OnnxBackend,
+}
+
+
+# ============================================================
+# MICRO-BATCHING
+# ============================================================
+class MicroBatcher:
+    """
+    Collects images from concurrent requests and runs them through the backend
+    together: a batch closes at ``max_batch`` images or ``max_wait`` seconds
+    after its first image, whichever comes first.
+    """
+
+    def __init__(self, backend, max_batch, max_wait):
+        self.backend = backend
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self.batches = 0
+        self.images = 0
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name="vision-batcher", daemon=True)
+        self._thread.start()
+
+    def submit(self, image):
+        future = Future()
+        self._queue.put((image, future))
+        return future
+
+    def _collect(self):
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            futures = [future for _, future in batch]
+            try:
+                predictions = self.backend.predict([image for image, _ in batch])
+            except Exception as e:
+                for future in futures:
+                    future.set_exception(e)
+                continue
+            self.batches += 1
+            self.images += len(batch)
+            for future, prediction in zip(futures, predictions):
+                future.set_result(prediction)
+
+    def stats(self):
+        return {
+            "batches": self.batches,
+            "images": self.images,
+            "mean_batch_size": self.images / self.batches if self.batches else 0.0,
+        }
+
+
+# ============================================================
+# RECOGNIZER
+# ============================================================
+class Recognizer:
+
+    def __init__(self, backend, options):
+        self.backend = backend
+        self.options = options
+        self.batcher = MicroBatcher(backend, options["MAX_BATCH"], options["MAX_WAIT_MS"] / 1000)
+        self.label_map = {
+            key.lower(): value
+            for key, value in {**DEFAULT_LABEL_MAP, **options["LABEL_MAP"]}.items()
+        }
+
+    @property
+    def input_size(self):
+        return self.backend.input_size
+
+    def map_label(self, label):
+        """Map a model label to an EWASTE_ITEMS key, or fall back to its first alias."""
+        aliases = [alias.strip().lower() for alias in label.split(",")]
+        for alias in aliases:
+            if alias in self.label_map:
+                return self.label_map[alias]
+        return aliases[0]
+
+    def recognize(self, image):
+        """Return ``(caption, score)``; caption is ``"unknown"`` below MIN_SCORE."""
+        prediction = self.batcher.submit(image).result(timeout=self.options["TIMEOUT"])
+        if math.isnan(prediction.score) or prediction.score < self.options["MIN_SCORE"]:
+            return "unknown", prediction.score
+        return self.map_label(prediction.label), prediction.score
+
+
+def build_recognizer(options=None):
+    options = {**get_options(), **(options or {})}
+    name = options["BACKEND"]
+    if name == "manual":
+        return None
+
+    backend_class = BACKENDS.get(name) or import_string(name)
+    backend = backend_class(options)
+    backend.load()
+    return Recognizer(backend, options)
+
+
+providers.register("vision", build_recognizer)
+
+
+def get_recognizer():
+    """The worker's shared :class:`Recognizer`, or ``None`` for manual selection."""
+    return providers.get("vision")
+
+
+def warm_up():
+    recognizer = get_recognizer()
+    if recognizer is not None:
+        recognizer.backend.warm_up()
+
+
+def warm_up_in_background():
+    """Called from AppConfig.ready() so the first real request is not the slow one."""
+    options = get_options()
+    if options["BACKEND"] == "manual" or not options["WARMUP"]:
+        return
+    threading.Thread(target=warm_up, name="vision-warmup", daemon=True).start()
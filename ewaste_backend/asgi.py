@@ -3,6 +3,10 @@ ASGI config for ewaste_backend project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
 
+The streaming chatbot (/api/chatbot/stream/) is an async view and should be
+served from here, e.g.
+``gunicorn ewaste_backend.asgi:application -k uvicorn.workers.UvicornWorker``.
+
 For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
 """
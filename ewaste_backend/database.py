@@ -0,0 +1,68 @@
+"""
+DATABASES["default"] from ``DATABASE_URL``.
+
+* PostgreSQL - persistent connections with health checks, or a psycopg 3
+  connection pool when ``DATABASE_POOL=True`` (Django requires
+  ``CONN_MAX_AGE = 0`` with a pool, so the two are exclusive).
+* SQLite (the default when ``DATABASE_URL`` is unset) - WAL journal plus
+  pragmas that let readers run alongside the single writer, and
+  ``BEGIN IMMEDIATE`` so concurrent writers queue on the busy timeout instead
+  of failing with "database is locked" when a read lock is upgraded.
+"""
+
+import importlib.util
+import os
+
+import dj_database_url
+
+SQLITE_PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    # Durable at every checkpoint; a power cut can lose only the last commits.
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA cache_size=-20000",  # 20 MB
+    "PRAGMA mmap_size=134217728",  # 128 MB
+)
+
+SQLITE_OPTIONS = {
+    "init_command": ";".join(SQLITE_PRAGMAS),
+    "transaction_mode": "IMMEDIATE",
+    "timeout": 20,  # busy timeout: how long a writer waits for the lock
+}
+
+
+def _env_bool(name, default):
+    return os.environ.get(name, str(default)) == "True"
+
+
+def database_config(url, conn_max_age=60, health_checks=True, pool=False, pool_options=None):
+    config = dj_database_url.parse(url, conn_max_age=conn_max_age, conn_health_checks=health_checks)
+    engine = config["ENGINE"]
+    options = config.setdefault("OPTIONS", {})
+
+    if engine == "django.db.backends.sqlite3":
+        for key, value in SQLITE_OPTIONS.items():
+            options.setdefault(key, value)
+
+    elif engine == "django.db.backends.postgresql":
+        options.setdefault("connect_timeout", 5)
+        # The pool needs psycopg 3; psycopg2 setups keep persistent connections.
+        if pool and importlib.util.find_spec("psycopg_pool"):
+            options["pool"] = pool_options or True
+            config["CONN_MAX_AGE"] = 0
+
+    return config
+
+
+def default_database(base_dir):
+    return database_config(
+        os.environ.get("DATABASE_URL") or f"sqlite:///{base_dir / 'db.sqlite3'}",
+        conn_max_age=int(os.environ.get("DATABASE_CONN_MAX_AGE", 60)),
+        health_checks=_env_bool("DATABASE_HEALTH_CHECKS", True),
+        pool=_env_bool("DATABASE_POOL", False),
+        pool_options={
+            "min_size": int(os.environ.get("DATABASE_POOL_MIN", 2)),
+            "max_size": int(os.environ.get("DATABASE_POOL_MAX", 10)),
+            "timeout": float(os.environ.get("DATABASE_POOL_TIMEOUT", 10)),
+        },
+    )
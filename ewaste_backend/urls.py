@@ -1,8 +1,6 @@
 from django.contrib import admin
 from django.urls import path
 from core import views
-from django.conf import settings
-from django.conf.urls.static import static
 from django.contrib.sitemaps.views import sitemap
 from core.sitemaps import StaticViewSitemap
 
@@ -28,6 +26,8 @@ urlpatterns = [
     path("detection/", views.detection, name="detection"),
     path("ewaste-camera/", views.ewaste_camera_page, name="ewaste_camera_page"),
     path("api/camera-detect/", views.camera_ai_api, name="camera_ai"),
+    path("api/camera-detect/batch/", views.camera_batch_api, name="camera_ai_batch"),
+    path("api/camera-detect/stats/", views.camera_stats, name="camera_ai_stats"),
 
     # SERVICES
     path("data-destruction/", views.data_destruction, name="data_destruction"),
@@ -38,12 +38,17 @@ urlpatterns = [
 
     # ADMIN REQUESTS
     path("reqs/", views.reqs, name="reqs"),
+    path("pickups/", views.list_pickup_requests, name="list_pickup_requests"),
+    path("api/pickups/", views.PickupRequestList.as_view(), name="pickup_request_list"),
 
     # CHATBOT
     path("api/chatbot/", views.chatbot_response, name="chatbot_response"),
+    path("api/chatbot/stream/", views.chatbot_stream, name="chatbot_stream"),
 
     # ADMIN
+    path("admin/analytics/", views.analytics_dashboard, name="analytics_dashboard"),
     path("admin/", admin.site.urls),
+    path("metrics", views.prometheus_metrics, name="metrics"),
 
     # GOOGLE VERIFICATION
     path("googleb5949ab1058f2676.html", views.google_verify),
@@ -52,6 +57,3 @@ urlpatterns = [
     path("robots.txt", views.robots_txt),
     path("sitemap.xml", sitemap, {"sitemaps": sitemaps}, name="sitemap"),
 ]
-
-if settings.DEBUG:
-    urlpatterns += static(settings.STATIC_URL, document_root=settings.STATIC_ROOT)